@@ -0,0 +1,479 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+import httpx
+
+from bench.fuseki_stub import FusekiStub
+from bench.pod_stub import PodStub
+from bench.synthetic import synthetic_records
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ("list", "count", "poll", "create", "update", "delete", "export", "harvest")
+# Lower is better for latencies, higher for throughput.
+COMPARED = (("p50_ms", 1), ("p99_ms", 1), ("throughput_per_s", -1))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float, units: int) -> dict:
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "units": units,
+        "duration_s": round(elapsed, 3),
+        "throughput_per_s": round(units / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        "p50_ms": round(_percentile(values, 0.50) * 1000, 3),
+        "p90_ms": round(_percentile(values, 0.90) * 1000, 3),
+        "p99_ms": round(_percentile(values, 0.99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+    }
+
+
+class RssSampler:
+    """
+    Tracks the peak resident set size of a process and its descendants (uvicorn
+    workers, validation pools) from /proc, where available. Each sample sums the
+    current RSS of the whole tree; the parent's own high-water mark is a floor.
+    """
+
+    def __init__(self, pid: int, interval: float = 0.05):
+        self.pid = pid
+        self.path = f"/proc/{pid}/status"
+        self.interval = interval
+        self.peak_kb = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _tree(self) -> list[int]:
+        children: dict[int, list[int]] = {}
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat") as stat:
+                    # The command name may contain spaces; the parent PID is the second field after it.
+                    ppid = int(stat.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+        pids, pending = [], [self.pid]
+        while pending:
+            pid = pending.pop()
+            pids.append(pid)
+            pending.extend(children.get(pid, ()))
+        return pids
+
+    def _status(self, pid: int) -> dict[str, int]:
+        values = {}
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith(("VmRSS:", "VmHWM:")):
+                    values[line[:5]] = int(line.split()[1])
+        return values
+
+    def _read(self) -> int:
+        parent = self._status(self.pid)
+        total = parent.get("VmRSS", 0)
+        for pid in self._tree()[1:]:
+            try:
+                total += self._status(pid).get("VmRSS", 0)
+            except OSError:
+                continue
+        return max(total, parent.get("VmHWM", 0))
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.peak_kb = max(self.peak_kb, self._read())
+            except OSError:
+                return
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if os.path.exists(self.path):
+            self._thread.start()
+
+    def stop(self) -> Optional[float]:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        return round(self.peak_kb / 1024, 1) if self.peak_kb else None
+
+
+class Server:
+    def __init__(
+        self,
+        fuseki: Optional[str],
+        data_dir: str,
+        workers: Optional[int],
+        server_workers: int = 1,
+        webids: Optional[list[str]] = None,
+    ):
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        # Pods are only harvested on request, so the harvest scenario controls every round.
+        env = dict(os.environ, DATA_DIR=data_dir, HARVEST_REGISTRIES="", HARVEST_INTERVAL="0")
+        env["HARVEST_WEBIDS"] = ",".join(webids or ())
+        if fuseki is None:
+            env["TRIPLESTORE_BACKEND"] = "embedded"
+        else:
+            env.update(TRIPLESTORE_BACKEND="fuseki", FUSEKI_ENDPOINT=fuseki)
+        if workers is not None:
+            env["VALIDATION_WORKERS"] = str(workers)
+        command = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(self.port), "--log-level", "warning"]
+        if server_workers > 1:
+            env["STATE_MODE"] = "shared"
+            command += ["--workers", str(server_workers)]
+        self.process = subprocess.Popen(
+            command,
+            cwd=BACKEND_DIR,
+            env=env,
+        )
+        self.rss = RssSampler(self.process.pid)
+
+    def wait_ready(self, timeout: float = 120.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Server exited with status {self.process.returncode}")
+            try:
+                if httpx.get(f"{self.url}/api", timeout=1).status_code == 200:
+                    self.rss.start()
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.1)
+        raise RuntimeError("Server did not become ready")
+
+    def stop(self) -> Optional[float]:
+        peak = self.rss.stop()
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        if peak is None:
+            import resource
+
+            maxrss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+            peak = round(maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+        return peak
+
+
+def run_concurrent(count: int, concurrency: int, call: Callable[[int], httpx.Response], ok: Callable) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one(i: int):
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            response = call(i)
+            failed = not ok(response)
+        except httpx.HTTPError:
+            failed = True
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            errors += failed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, range(count)))
+    return summarize(latencies, errors, time.perf_counter() - started, count - errors)
+
+
+def _form(record: dict) -> dict:
+    return {key: str(value).lower() if isinstance(value, bool) else str(value) for key, value in record.items()}
+
+
+def seed(client: httpx.Client, args) -> dict:
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    for offset in range(0, args.records, args.seed_batch):
+        size = min(args.seed_batch, args.records - offset)
+        body = "".join(
+            json.dumps(record, separators=(",", ":")) + "\n"
+            for record in synthetic_records(size, seed=args.seed, start=offset, **args.distribution)
+        )
+        request_started = time.perf_counter()
+        response = client.post(
+            "/api/datasets/bulk", content=body.encode("utf-8"), headers={"Content-Type": "application/x-ndjson"}
+        )
+        latencies.append(time.perf_counter() - request_started)
+        errors += response.json()["failed"] if response.status_code == 200 else size
+    return summarize(latencies, errors, time.perf_counter() - started, args.records - errors)
+
+
+def wait_replicated(client: httpx.Client, timeout: float) -> Optional[float]:
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if client.get("/api/replication").json()["pending"] == 0:
+            return round(time.perf_counter() - started, 3)
+        time.sleep(0.1)
+    return None
+
+
+def harvest(client: httpx.Client, pods: PodStub) -> dict:
+    """
+    Harvest the stand-in pods three times: a first full harvest, a repeat in
+    which every document revalidates with 304, and one after a dataset was
+    removed from each pod. Each round counts as an error if its outcome is off.
+    """
+    expected = sum(len(identifiers) for identifiers in pods.pods.values())
+    rounds = []
+
+    def run() -> tuple[float, dict]:
+        started = time.perf_counter()
+        response = client.post("/api/harvest")
+        response.raise_for_status()
+        return time.perf_counter() - started, response.json()
+
+    elapsed, first = run()
+    rounds.append((elapsed, first["stored"] == expected and first["dropped"] == 0))
+
+    before = dict(pods.requests)
+    elapsed, repeat = run()
+    fetched = sum(count for kind, count in pods.requests.items() if not kind.endswith("304")) - sum(
+        count for kind, count in before.items() if not kind.endswith("304")
+    )
+    revalidated = pods.requests.get("dataset 304", 0) - before.get("dataset 304", 0)
+    rounds.append((elapsed, repeat["stored"] == 0 and fetched == 0 and revalidated == expected))
+
+    removed = 0
+    for pod, identifiers in pods.pods.items():
+        pods.remove(pod, identifiers[0])
+        removed += 1
+    count = client.get("/api/datasets/count").json()["count"]
+    elapsed, after = run()
+    remaining = client.get("/api/datasets/count").json()["count"]
+    rounds.append((elapsed, after["stored"] == 0 and after["dropped"] == removed and remaining == count - removed))
+
+    result = summarize(
+        [elapsed for elapsed, _ in rounds],
+        sum(not ok for _, ok in rounds),
+        sum(elapsed for elapsed, _ in rounds),
+        len(rounds),
+    )
+    result.update(
+        harvested=first["stored"], revalidated=revalidated, dropped=after["dropped"], datasets_after=remaining
+    )
+    return result
+
+
+def scenario(name: str, client: httpx.Client, args) -> dict:
+    rng = random.Random(args.seed)
+    ok = lambda response: response.status_code < 400  # noqa: E731
+    ops, concurrency = args.ops, args.concurrency
+    seeded = [f"bench-{args.seed}-{number:07d}" for number in range(args.records)]
+
+    if name == "list":
+        pages = [
+            {
+                "skip": rng.randrange(max(args.records - 50, 1)),
+                "limit": 50,
+                "sort": rng.choice(("title", "modified", "issued")),
+                **({"theme": f"https://themes.example.org/{rng.randrange(5)}"} if rng.random() < 0.3 else {}),
+            }
+            for _ in range(ops)
+        ]
+        return run_concurrent(ops, concurrency, lambda i: client.get("/api/datasets", params=pages[i]), ok)
+    if name == "count":
+        return run_concurrent(ops, concurrency, lambda i: client.get("/api/datasets/count"), ok)
+    if name == "poll":
+        etag = client.get("/api/datasets", params={"limit": 50}).headers.get("ETag", "")
+        return run_concurrent(
+            ops,
+            concurrency,
+            lambda i: client.get("/api/datasets", params={"limit": 50}, headers={"If-None-Match": etag}),
+            lambda response: response.status_code == 304,
+        )
+    if name == "create":
+        records = list(synthetic_records(ops, seed=args.seed, start=args.records, **args.distribution))
+        return run_concurrent(ops, concurrency, lambda i: client.post("/api/datasets", data=_form(records[i])), ok)
+    if name == "update":
+        targets = rng.sample(seeded, min(ops, len(seeded)))
+        return run_concurrent(
+            len(targets),
+            concurrency,
+            lambda i: client.put(f"/api/datasets/{targets[i]}", data={"title": f"Updated title {i}"}),
+            ok,
+        )
+    if name == "delete":
+        targets = rng.sample(seeded, min(ops, len(seeded)))
+        return run_concurrent(len(targets), concurrency, lambda i: client.delete(f"/api/datasets/{targets[i]}"), ok)
+    if name == "export":
+        replicated = wait_replicated(client, args.replication_timeout)
+        exported = []
+
+        def export(i: int) -> httpx.Response:
+            response = client.get("/api/export/catalog", params={"format": args.export_format, "gzip": "false"})
+            exported.append(len(response.content))
+            return response
+
+        result = run_concurrent(args.export_ops, 1, export, ok)
+        result["bytes"] = max(exported, default=0)
+        result["replication_wait_s"] = replicated
+        return result
+    raise ValueError(f"Unknown scenario: {name}")
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    print(f"\n{'scenario':<10} {'metric':<18} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        for metric, direction in COMPARED:
+            before, after = previous.get(metric), current.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            flag = ""
+            if change * direction > threshold:
+                flag = "  REGRESSION"
+                regressions.append(f"{name}.{metric}")
+            print(f"{name:<10} {metric:<18} {before:>12} {after:>12} {change:>+7.1%}{flag}")
+    return regressions
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Benchmark the catalog API end to end.")
+    parser.add_argument("--records", type=int, default=10000, help="datasets to seed before the scenarios")
+    parser.add_argument("--ops", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--seed-batch", type=int, default=5000, help="records per bulk request while seeding")
+    parser.add_argument("--themes", type=int, default=40)
+    parser.add_argument("--publishers", type=int, default=500)
+    parser.add_argument("--theme-distribution", default="zipf:1.1")
+    parser.add_argument("--publisher-distribution", default="zipf:0.8")
+    parser.add_argument("--export-ops", type=int, default=5)
+    parser.add_argument("--export-format", default="ntriples")
+    parser.add_argument("--replication-timeout", type=float, default=600.0)
+    parser.add_argument("--workers", type=int, default=None, help="VALIDATION_WORKERS for the server")
+    parser.add_argument(
+        "--server-workers", type=int, default=1, help="uvicorn worker processes (more than one uses STATE_MODE=shared)"
+    )
+    parser.add_argument("--harvest-pods", type=int, default=3, help="stand-in pods for the harvest scenario")
+    parser.add_argument("--harvest-datasets", type=int, default=100, help="datasets per stand-in pod")
+    parser.add_argument("--fuseki", default=None, help="use this Fuseki dataset URL instead of the stand-in")
+    parser.add_argument("--embedded", action="store_true", help="run the server on the embedded quad store")
+    parser.add_argument("--fuseki-discard", action="store_true", help="stand-in drops writes (for huge runs)")
+    parser.add_argument("--fuseki-latency", type=float, default=0.0, help="seconds the stand-in adds per request")
+    parser.add_argument("--out", default=None, help="write the JSON results to this file")
+    parser.add_argument("--compare", default=None, help="baseline JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative change counted as a regression")
+    args = parser.parse_args(argv)
+    args.distribution = {
+        "themes": args.themes,
+        "publishers": args.publishers,
+        "theme_distribution": args.theme_distribution,
+        "publisher_distribution": args.publisher_distribution,
+    }
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+
+    stub = None
+    fuseki = args.fuseki
+    if fuseki is None and not args.embedded:
+        stub = FusekiStub(discard=args.fuseki_discard, latency=args.fuseki_latency)
+        fuseki = stub.start()
+    pods = None
+    if "harvest" in names:
+        pods = PodStub(args.harvest_pods, args.harvest_datasets)
+        pods.start()
+    data_dir = tempfile.mkdtemp(prefix="sdc-bench-")
+    server = Server(fuseki, data_dir, args.workers, args.server_workers, pods.webids() if pods else None)
+    results = {
+        "format": 1,
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "config": {key: value for key, value in vars(args).items() if key not in {"out", "compare", "distribution"}},
+        "scenarios": {},
+    }
+    try:
+        server.wait_ready()
+        limits = httpx.Limits(max_connections=64)
+        with httpx.Client(base_url=server.url, timeout=httpx.Timeout(300.0), limits=limits) as client:
+            if args.records:
+                results["scenarios"]["seed"] = seed(client, args)
+                print(f"seed: {json.dumps(results['scenarios']['seed'])}", file=sys.stderr)
+            for name in names:
+                if name == "harvest":
+                    results["scenarios"][name] = harvest(client, pods)
+                else:
+                    results["scenarios"][name] = scenario(name, client, args)
+                print(f"{name}: {json.dumps(results['scenarios'][name])}", file=sys.stderr)
+    finally:
+        results["peak_rss_mb"] = server.stop()
+        if stub is not None:
+            results["fuseki"] = {"triples": stub.triples(), "requests": stub.requests}
+            stub.stop()
+        if pods is not None:
+            results["pods"] = {"requests": pods.requests}
+            pods.stop()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    output = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as out:
+            out.write(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline:
+            regressions = compare(results, json.load(baseline), args.threshold)
+        if regressions:
+            print(f"\nRegressions: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
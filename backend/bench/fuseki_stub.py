@@ -0,0 +1,243 @@
+import argparse
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+from rdflib import Dataset, Graph, URIRef
+
+
+DROP = re.compile(r"DROP\s+SILENT\s+GRAPH\s+<([^>]*)>\s*$", re.S)
+GRAPH_DATA = re.compile(r"(INSERT|DELETE)\s+DATA\s*\{\s*GRAPH\s+<([^>]*)>\s*\{(.*)\}\s*\}\s*$", re.S)
+EXPORT_QUERY = re.compile(r"\s*CONSTRUCT\s*\{\s*\?s \?p \?o\s*\}\s*WHERE\s*\{\s*GRAPH \?g\s*\{\s*\?s \?p \?o\s*\}\s*\}\s*")
+STATEMENT_SPLIT = re.compile(r" ;\n(?=DROP |INSERT |DELETE )")
+NT_TYPES = {"application/n-triples", "text/plain"}
+# N-Triples is a subset of Turtle, so Turtle requests get the stored lines as is.
+PLAIN_EXPORTS = {"application/n-triples", "text/turtle"}
+
+
+def _triple_lines(body: str) -> list[str]:
+    """Split N-Triples (or a single inline triple) into one statement per line."""
+    lines = []
+    for line in body.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        lines.append(line if line.endswith(".") else line + " .")
+    return lines
+
+
+class FusekiStub:
+    """
+    In-memory stand-in for the parts of a Fuseki dataset this backend uses.
+
+    - ``POST``/``DELETE /data?graph=`` for the graph store protocol
+    - ``POST /update`` for the updates built by ``build_sync_update``
+    - ``POST /sparql`` for the export queries
+    - ``GET /`` for the N-Quads dump
+
+    Graphs are kept as N-Triples lines, so the statement forms the outbox
+    sends are applied without a SPARQL parser. Other updates and queries fall
+    back to rdflib. With ``discard=True`` writes are accepted and dropped,
+    which keeps memory flat for very large runs. ``latency`` adds a fixed
+    delay to every request.
+    """
+
+    def __init__(self, discard: bool = False, latency: float = 0.0):
+        self.discard = discard
+        self.latency = latency
+        self.graphs: dict[str, dict[str, None]] = {}
+        self.requests: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def count(self, kind: str):
+        with self._lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+
+    def triples(self) -> int:
+        with self._lock:
+            return sum(len(lines) for lines in self.graphs.values())
+
+    def replace(self, graph: str, lines: list[str]):
+        if self.discard:
+            return
+        with self._lock:
+            self.graphs[graph] = dict.fromkeys(lines)
+
+    def add(self, graph: str, lines: list[str]):
+        if self.discard:
+            return
+        with self._lock:
+            self.graphs.setdefault(graph, {}).update(dict.fromkeys(lines))
+
+    def remove(self, graph: str, lines: Optional[list[str]] = None):
+        with self._lock:
+            if lines is None:
+                self.graphs.pop(graph, None)
+                return
+            stored = self.graphs.get(graph, {})
+            for line in lines:
+                stored.pop(line, None)
+
+    def dataset(self) -> Dataset:
+        dataset = Dataset()
+        with self._lock:
+            snapshot = {graph: "\n".join(lines) for graph, lines in self.graphs.items()}
+        for graph, data in snapshot.items():
+            dataset.graph(URIRef(graph)).parse(data=data, format="nt")
+        return dataset
+
+    def apply_update(self, update: str):
+        for statement in STATEMENT_SPLIT.split(update.strip()):
+            statement = statement.strip()
+            dropped = DROP.match(statement)
+            data = GRAPH_DATA.match(statement)
+            if dropped:
+                self.remove(dropped.group(1))
+            elif data and data.group(1) == "INSERT":
+                self.add(data.group(2), _triple_lines(data.group(3)))
+            elif data:
+                self.remove(data.group(2), _triple_lines(data.group(3)))
+            else:
+                self._rdflib_update(statement)
+
+    def _rdflib_update(self, statement: str):
+        dataset = self.dataset()
+        dataset.update(statement)
+        if self.discard:
+            return
+        with self._lock:
+            self.graphs = {
+                str(graph.identifier): dict.fromkeys(_triple_lines(graph.serialize(format="nt")))
+                for graph in dataset.graphs()
+                if len(graph) and isinstance(graph.identifier, URIRef)
+            }
+
+    def export(self, accept: str, quads: bool) -> tuple[bytes, str]:
+        with self._lock:
+            snapshot = {graph: list(lines) for graph, lines in self.graphs.items()}
+        if quads:
+            body = "".join(f"{line[:-1].rstrip()} <{graph}> .\n" for graph, lines in snapshot.items() for line in lines)
+            return body.encode("utf-8"), "application/n-quads"
+        media_type = accept.split(",")[0].split(";")[0].strip() or "text/turtle"
+        if media_type in PLAIN_EXPORTS:
+            merged = dict.fromkeys(line for lines in snapshot.values() for line in lines)
+            return "".join(f"{line}\n" for line in merged).encode("utf-8"), media_type
+        graph = Graph()
+        graph.parse(data="\n".join(line for lines in snapshot.values() for line in lines), format="nt")
+        return graph.serialize(format=media_type).encode("utf-8"), media_type
+
+    def query(self, query: str, accept: str) -> tuple[bytes, str]:
+        if EXPORT_QUERY.fullmatch(query):
+            return self.export(accept, quads=False)
+        result = self.dataset().query(query)
+        if result.type in {"CONSTRUCT", "DESCRIBE"}:
+            media_type = accept.split(",")[0].split(";")[0].strip() or "text/turtle"
+            return result.serialize(format=media_type), media_type
+        if "xml" in accept:
+            return result.serialize(format="xml"), "application/sparql-results+xml"
+        return result.serialize(format="json"), "application/sparql-results+json"
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _body(self) -> bytes:
+                return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+            def _reply(self, status: int, body: bytes = b"", content_type: str = "text/plain"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _route(self, method: str):
+                if stub.latency:
+                    time.sleep(stub.latency)
+                url = urlparse(self.path)
+                endpoint = url.path.rstrip("/").rsplit("/", 1)[-1]
+                params = parse_qs(url.query)
+                stub.count(f"{method} {endpoint}")
+                try:
+                    if endpoint == "data" and method == "POST":
+                        self._store(params.get("graph", [""])[0])
+                    elif endpoint == "data" and method == "DELETE":
+                        self._body()
+                        stub.remove(params["graph"][0])
+                        self._reply(204)
+                    elif endpoint == "update" and method == "POST":
+                        stub.apply_update(self._body().decode("utf-8"))
+                        self._reply(204)
+                    elif endpoint == "sparql":
+                        body = self._body().decode("utf-8")
+                        query = parse_qs(body).get("query", [""])[0] if body else params.get("query", [""])[0]
+                        data, content_type = stub.query(query, self.headers.get("Accept", ""))
+                        self._reply(200, data, content_type)
+                    elif method == "GET":
+                        data, content_type = stub.export(self.headers.get("Accept", ""), quads=True)
+                        self._reply(200, data, content_type)
+                    else:
+                        self._reply(404)
+                except Exception as e:
+                    self._reply(400, str(e).encode("utf-8"))
+
+            def _store(self, graph: str):
+                content_type = self.headers.get("Content-Type", "text/turtle").split(";")[0].strip()
+                body = self._body().decode("utf-8")
+                if content_type in NT_TYPES:
+                    lines = _triple_lines(body)
+                else:
+                    parsed = Graph()
+                    parsed.parse(data=body, format=content_type)
+                    lines = _triple_lines(parsed.serialize(format="nt"))
+                stub.add(graph, lines)
+                self._reply(204)
+
+            def do_GET(self):
+                self._route("GET")
+
+            def do_POST(self):
+                self._route("POST")
+
+            def do_DELETE(self):
+                self._route("DELETE")
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://{host}:{self._server.server_address[1]}/bench"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the in-memory Fuseki stand-in.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3030)
+    parser.add_argument("--discard", action="store_true", help="accept writes without keeping them")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    args = parser.parse_args(argv)
+
+    stub = FusekiStub(discard=args.discard, latency=args.latency)
+    print(f"Fuseki stand-in listening on {stub.start(args.host, args.port)}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
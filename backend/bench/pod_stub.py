@@ -0,0 +1,155 @@
+import argparse
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import urlparse
+
+
+PREFIXES = """@prefix dcat: <http://www.w3.org/ns/dcat#> .
+@prefix dct: <http://purl.org/dc/terms/> .
+@prefix foaf: <http://xmlns.com/foaf/0.1/> .
+@prefix vcard: <http://www.w3.org/2006/vcard/ns#> .
+@prefix sdp: <https://w3id.org/solid-dcat-profile#> .
+@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+"""
+
+
+class PodStub:
+    """
+    Solid pods for the harvester, served from memory.
+
+    - ``GET /<pod>/profile/card`` for the WebID profile (``#me``), linking its catalog via ``sdp:catalog``
+    - ``GET /<pod>/catalog/cat.ttl`` for the catalog and its ``dcat:dataset`` links
+    - ``GET /<pod>/catalog/ds/<identifier>.ttl`` for one dataset each
+
+    Every document has a strong ETag derived from its body and is answered
+    with 304 when ``If-None-Match`` matches. ``remove`` takes a dataset out
+    of its pod's catalog, so the next harvest has to drop it.
+    """
+
+    def __init__(self, pods: int = 3, datasets: int = 10):
+        self.pods: dict[str, list[str]] = {
+            f"pod{pod}": [f"pod{pod}-ds{number:05d}" for number in range(datasets)] for pod in range(pods)
+        }
+        self.requests: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self.base = ""
+
+    def count(self, kind: str):
+        with self._lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+
+    def webids(self) -> list[str]:
+        return [f"{self.base}/{pod}/profile/card#me" for pod in self.pods]
+
+    def remove(self, pod: str, identifier: str):
+        with self._lock:
+            self.pods[pod].remove(identifier)
+
+    def document(self, path: str) -> Optional[tuple[str, str]]:
+        """Return the kind and Turtle body of the document at ``path``, or None."""
+        parts = path.strip("/").split("/")
+        with self._lock:
+            identifiers = list(self.pods.get(parts[0], ())) if parts and parts[0] in self.pods else None
+        if identifiers is None:
+            return None
+        pod_url = f"{self.base}/{parts[0]}"
+        if parts[1:] == ["profile", "card"]:
+            return "profile", (
+                f"{PREFIXES}<{pod_url}/profile/card#me> a foaf:Person ;\n"
+                f"    sdp:catalog <{pod_url}/catalog/cat.ttl#it> .\n"
+            )
+        if parts[1:] == ["catalog", "cat.ttl"]:
+            links = "".join(f"    dcat:dataset <{pod_url}/catalog/ds/{name}.ttl#it> ;\n" for name in identifiers)
+            return "catalog", (
+                f"{PREFIXES}<{pod_url}/catalog/cat.ttl#it> a dcat:Catalog ;\n"
+                f'{links}    dct:title "{parts[0]}" .\n'
+            )
+        if len(parts) == 4 and parts[1:3] == ["catalog", "ds"] and parts[3].endswith(".ttl"):
+            identifier = parts[3][: -len(".ttl")]
+            if identifier not in identifiers:
+                return None
+            return "dataset", (
+                f"{PREFIXES}<{pod_url}/catalog/ds/{identifier}.ttl#it> a dcat:Dataset ;\n"
+                f'    dct:identifier "{identifier}" ;\n'
+                f'    dct:title "Dataset {identifier}" ;\n'
+                f'    dct:description "Harvested from {parts[0]}" ;\n'
+                f'    dct:issued "2024-01-01T00:00:00+00:00"^^xsd:dateTime ;\n'
+                f'    dct:modified "2024-06-01T00:00:00+00:00"^^xsd:dateTime ;\n'
+                f'    dct:publisher [ foaf:name "{parts[0]} publisher" ] ;\n'
+                f"    dcat:contactPoint [ vcard:hasEmail <mailto:{parts[0]}@pods.example.org> ] ;\n"
+                f'    dct:accessRights "public" ;\n'
+                f"    dct:creator <{pod_url}/profile/card#me> ;\n"
+                f"    dcat:theme <https://themes.example.org/{len(identifier) % 5}> ;\n"
+                f"    dcat:distribution [ dcat:downloadURL <https://data.example.org/{identifier}.csv> ;"
+                f' dcat:mediaType "text/csv" ] .\n'
+            )
+        return None
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, body: bytes = b"", headers: Optional[dict] = None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                found = stub.document(urlparse(self.path).path)
+                if found is None:
+                    stub.count("missing")
+                    self._reply(404)
+                    return
+                kind, text = found
+                body = text.encode("utf-8")
+                etag = f'"{hashlib.sha1(body).hexdigest()}"'
+                if etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+                    stub.count(f"{kind} 304")
+                    self._reply(304, headers={"ETag": etag})
+                    return
+                stub.count(kind)
+                self._reply(200, body, {"Content-Type": "text/turtle", "ETag": etag})
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.base = f"http://{host}:{self._server.server_address[1]}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.base
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve sample Solid pods for the harvester.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3031)
+    parser.add_argument("--pods", type=int, default=3)
+    parser.add_argument("--datasets", type=int, default=10, help="datasets per pod")
+    args = parser.parse_args(argv)
+
+    stub = PodStub(args.pods, args.datasets)
+    print(f"Pod stand-in listening on {stub.start(args.host, args.port)}")
+    print(f"HARVEST_WEBIDS={','.join(stub.webids())}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
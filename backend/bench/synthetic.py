@@ -0,0 +1,115 @@
+import argparse
+import itertools
+import json
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Iterator
+
+
+WORDS = (
+    "air quality traffic energy water soil noise weather mobility parking bike sensor grid solar wind "
+    "household consumption emission forest river flood heat urban rural health school budget census "
+    "election transport rail bus harbour waste recycling building permit land use biodiversity bird "
+    "insect crop yield irrigation groundwater temperature humidity pressure rainfall snow"
+).split()
+FILE_FORMATS = (
+    ("text/csv", 50),
+    ("application/json", 25),
+    ("application/ld+json", 10),
+    ("text/turtle", 10),
+    ("application/xml", 5),
+)
+EPOCH = datetime(2015, 1, 1, tzinfo=timezone.utc)
+SPAN_SECONDS = 10 * 365 * 86400
+
+
+def cumulative_weights(spec: str, size: int) -> list[float]:
+    """Weights for ``size`` categories from ``uniform`` or ``zipf:<exponent>``."""
+    if spec == "uniform":
+        weights = [1.0] * size
+    elif spec.startswith("zipf:"):
+        exponent = float(spec.split(":", 1)[1])
+        weights = [1.0 / (rank**exponent) for rank in range(1, size + 1)]
+    else:
+        raise ValueError(f"Unknown distribution: {spec}")
+    return list(itertools.accumulate(weights))
+
+
+def synthetic_records(
+    count: int,
+    seed: int = 0,
+    start: int = 0,
+    themes: int = 40,
+    publishers: int = 500,
+    theme_distribution: str = "zipf:1.1",
+    publisher_distribution: str = "zipf:0.8",
+    public_ratio: float = 0.85,
+) -> Iterator[dict]:
+    """
+    Yield ``count`` dataset records in the shape the API accepts. The same
+    seed always produces the same records, so runs are comparable.
+    """
+    rng = random.Random(seed)
+    theme_weights = cumulative_weights(theme_distribution, themes)
+    publisher_weights = cumulative_weights(publisher_distribution, publishers)
+    format_weights = list(itertools.accumulate(weight for _, weight in FILE_FORMATS))
+    theme_ids = range(themes)
+    publisher_ids = range(publishers)
+
+    for number in range(start, start + count):
+        (theme,) = rng.choices(theme_ids, cum_weights=theme_weights)
+        (publisher,) = rng.choices(publisher_ids, cum_weights=publisher_weights)
+        ((file_format, _),) = rng.choices(FILE_FORMATS, cum_weights=format_weights)
+        issued = EPOCH + timedelta(seconds=rng.randrange(SPAN_SECONDS))
+        modified = issued + timedelta(seconds=rng.randrange(365 * 86400))
+        title_words = rng.sample(WORDS, 3)
+        is_public = rng.random() < public_ratio
+        # Restricted datasets can only be offered as downloads.
+        download = not is_public or rng.random() < 0.8
+        yield {
+            "identifier": f"bench-{seed}-{number:07d}",
+            "title": f"{' '.join(title_words).capitalize()} {number}",
+            "description": " ".join(rng.choices(WORDS, k=rng.randint(12, 40))).capitalize() + ".",
+            "issued": issued.isoformat(),
+            "modified": modified.isoformat(),
+            "publisher": f"Publisher {publisher}",
+            "contact_point": f"data@publisher{publisher}.example",
+            "is_public": is_public,
+            "access_url_dataset": f"https://data.publisher{publisher}.example/files/{number}",
+            "distribution_access_type": "download" if download else "access",
+            "file_format": file_format,
+            "theme": f"https://themes.example.org/{theme}",
+            "webid": f"https://pod{publisher}.example/profile/card#me",
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write synthetic DCAT dataset records as NDJSON.")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--themes", type=int, default=40)
+    parser.add_argument("--publishers", type=int, default=500)
+    parser.add_argument("--theme-distribution", default="zipf:1.1")
+    parser.add_argument("--publisher-distribution", default="zipf:0.8")
+    parser.add_argument("--out", default="-", help="output file, '-' for stdout")
+    args = parser.parse_args(argv)
+
+    out = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8")
+    try:
+        for record in synthetic_records(
+            args.count,
+            seed=args.seed,
+            themes=args.themes,
+            publishers=args.publishers,
+            theme_distribution=args.theme_distribution,
+            publisher_distribution=args.publisher_distribution,
+        ):
+            out.write(json.dumps(record, separators=(",", ":")) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
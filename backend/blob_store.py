@@ -0,0 +1,110 @@
+import hashlib
+import os
+import re
+import tempfile
+import time
+from typing import BinaryIO, Iterable, Optional, Union
+
+
+CHUNK_SIZE = 1024 * 1024
+DIGEST = re.compile(r"[0-9a-f]{64}")
+
+
+class BlobTooLarge(Exception):
+    pass
+
+
+def _blob_root() -> str:
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    data_dir = os.getenv("DATA_DIR", os.path.join(base_dir, "data"))
+    return os.getenv("BLOB_DIR", os.path.join(data_dir, "blobs"))
+
+
+def is_digest(value) -> bool:
+    """Whether ``value`` is a SHA-256 hex digest as ``put`` returns it (and so a safe file name)."""
+    return isinstance(value, str) and DIGEST.fullmatch(value) is not None
+
+
+def _chunks(source: Union[BinaryIO, Iterable[bytes]]) -> Iterable[bytes]:
+    if hasattr(source, "read"):
+        while True:
+            chunk = source.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+    else:
+        yield from source
+
+
+class BlobStore:
+    """
+    Content-addressed files named by their SHA-256 digest. Data is hashed
+    while it is streamed to a temporary file and then renamed into place, so
+    identical uploads end up as one file and readers never see partial blobs.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or _blob_root()
+
+    def path(self, digest: str) -> str:
+        if not is_digest(digest):
+            raise ValueError(f"Not a blob digest: {digest!r}")
+        return os.path.join(self.root, digest[:2], digest)
+
+    def exists(self, digest: str) -> bool:
+        return is_digest(digest) and os.path.exists(self.path(digest))
+
+    def put(self, source: Union[BinaryIO, Iterable[bytes]], max_bytes: Optional[int] = None) -> tuple[str, int]:
+        os.makedirs(self.root, exist_ok=True)
+        sha256 = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                for chunk in _chunks(source):
+                    size += len(chunk)
+                    if max_bytes is not None and size > max_bytes:
+                        raise BlobTooLarge(f"Blob exceeds {max_bytes} bytes")
+                    sha256.update(chunk)
+                    fh.write(chunk)
+            digest = sha256.hexdigest()
+            target = self.path(digest)
+            if os.path.exists(target):
+                os.unlink(tmp_path)
+                # A fresh mtime keeps a concurrent collect from removing it.
+                os.utime(target)
+            else:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(tmp_path, target)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return digest, size
+
+    def collect(self, live: set, min_age: float = 0) -> int:
+        """
+        Delete blobs (and stale temp files) not in ``live`` that were last
+        written more than ``min_age`` seconds ago; returns how many were removed.
+        """
+        removed = 0
+        if not os.path.isdir(self.root):
+            return removed
+        cutoff = time.time() - min_age
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name in live:
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    if min_age and os.path.getmtime(path) > cutoff:
+                        continue
+                    os.unlink(path)
+                    removed += 1
+                except FileNotFoundError:
+                    # Collected by another process sharing the directory.
+                    pass
+        return removed
+
+
+BLOBS = BlobStore()
@@ -0,0 +1,455 @@
+import base64
+import fcntl
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Iterable, Optional
+
+
+DATETIME_FIELDS = ("issued", "modified")
+# Only records written before semantic models moved to the blob store carry bytes.
+BYTES_FIELDS = ("semantic_model_file",)
+# In shared mode several API processes (uvicorn workers, or nodes on a shared
+# volume) use one catalog database as the authoritative state.
+SHARED = os.getenv("STATE_MODE", "local") == "shared"
+
+
+def _db_path() -> str:
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    data_dir = os.getenv("DATA_DIR", os.path.join(base_dir, "data"))
+    return os.getenv("CATALOG_DB_PATH", os.path.join(data_dir, "catalog.db"))
+
+
+def _encode(record: dict) -> str:
+    payload = dict(record)
+    for field in DATETIME_FIELDS:
+        if isinstance(payload.get(field), datetime):
+            payload[field] = payload[field].isoformat()
+    for field in BYTES_FIELDS:
+        if isinstance(payload.get(field), bytes):
+            payload[field] = base64.b64encode(payload[field]).decode("ascii")
+    return json.dumps(payload, separators=(",", ":"))
+
+
+def _decode(raw: str) -> dict:
+    record = json.loads(raw)
+    for field in DATETIME_FIELDS:
+        if isinstance(record.get(field), str):
+            record[field] = datetime.fromisoformat(record[field])
+    for field in BYTES_FIELDS:
+        if isinstance(record.get(field), str):
+            record[field] = base64.b64decode(record[field])
+    return record
+
+
+class StoreConflict(Exception):
+    pass
+
+
+class LeaderLock:
+    """
+    Exclusive, non-blocking lock on a file next to the database. At most one
+    process holds it, and the OS releases it when that process exits, so
+    another process can take over.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def acquire(self) -> bool:
+        if self._fd is None:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                return False
+            self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class CatalogStore:
+    """
+    SQLite (WAL mode) persistence for datasets and catalogs. Every API write is
+    its own transaction, synced before it is acknowledged, so after a crash or
+    power loss the store holds exactly the writes that were acknowledged; on
+    startup the whole state is read back in one pass. With
+    ``CATALOG_DB_SYNCHRONOUS=NORMAL`` commits skip the sync: a process crash
+    still loses nothing, but a power loss can drop the last acknowledged writes.
+
+    The same transactions maintain a compacted change log: one row per dataset
+    or catalog holding its latest change under a monotonic sequence number.
+    Deletions stay as tombstones for ``CHANGE_LOG_TOMBSTONE_DAYS`` and are then
+    pruned; ``change_floor`` is the highest sequence pruned so far.
+
+    The store also holds the triple store outbox, so a change and its outbox
+    operations commit together. For shared mode it allocates catalog IDs and
+    checks conflicting writes inside the write transaction.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or _db_path()
+        self.synchronous = os.getenv("CATALOG_DB_SYNCHRONOUS", "FULL")
+        self.tombstone_seconds = float(os.getenv("CHANGE_LOG_TOMBSTONE_DAYS", "30")) * 86400
+        self.outbox_retention = float(os.getenv("OUTBOX_RETENTION", "60"))
+        self.created = False
+        self.leader = LeaderLock(f"{self.path}.leader")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._watch: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._watch_lock = threading.Lock()
+
+    def open(self):
+        if self._conn is not None:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.created = not os.path.exists(self.path)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        has_changes = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'changes'"
+        ).fetchone()
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS datasets (identifier TEXT PRIMARY KEY, record TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS catalogs (id INTEGER PRIMARY KEY, record TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                entity TEXT NOT NULL,
+                key TEXT NOT NULL,
+                action TEXT NOT NULL,
+                ts REAL NOT NULL,
+                UNIQUE (entity, key)
+            );
+            CREATE TABLE IF NOT EXISTS outbox (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                ts REAL NOT NULL,
+                entry TEXT NOT NULL
+            );
+            """
+        )
+        self._conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('store_id', ?)", (uuid.uuid4().hex[:8],))
+        # A second connection only polls data_version, which changes whenever
+        # any connection (including this process' own) commits.
+        self._watch = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        if not has_changes:
+            # Databases from before the change log: start it with every live entry.
+            now = time.time()
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute(
+                "INSERT INTO changes (entity, key, action, ts) SELECT 'dataset', identifier, 'create', ? FROM datasets",
+                (now,),
+            )
+            self._conn.execute(
+                "INSERT INTO changes (entity, key, action, ts) SELECT 'catalog', id, 'create', ? FROM catalogs", (now,)
+            )
+            self._conn.execute("COMMIT")
+        self._prune_tombstones()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        if self._watch is not None:
+            self._watch.close()
+            self._watch = None
+        self.leader.release()
+
+    def load(self) -> tuple[dict[str, dict], list[dict], int]:
+        """Read datasets, catalogs and the change sequence they reflect from one snapshot."""
+        self.open()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                datasets = {
+                    identifier: _decode(raw)
+                    for identifier, raw in self._conn.execute("SELECT identifier, record FROM datasets")
+                }
+                catalogs = self._catalogs()
+                version = self._version()
+            finally:
+                self._conn.execute("COMMIT")
+        return datasets, catalogs, version
+
+    def changed_since(self, since: int) -> tuple[dict[str, Optional[dict]], Optional[list[dict]], int, float]:
+        """
+        Return the current record (None once deleted) of every dataset changed
+        after sequence ``since``, all catalogs if any changed (else None), and
+        the sequence and timestamp of the latest change, from one snapshot.
+        """
+        self.open()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                rows = self._conn.execute(
+                    "SELECT entity, key, ts FROM changes WHERE seq > ? ORDER BY seq", (since,)
+                ).fetchall()
+                keys = list({key for entity, key, _ in rows if entity == "dataset"})
+                datasets: dict[str, Optional[dict]] = dict.fromkeys(keys)
+                for start in range(0, len(keys), 500):
+                    chunk = keys[start : start + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    datasets.update(
+                        (identifier, _decode(raw))
+                        for identifier, raw in self._conn.execute(
+                            f"SELECT identifier, record FROM datasets WHERE identifier IN ({placeholders})", chunk
+                        )
+                    )
+                catalogs = self._catalogs() if any(entity == "catalog" for entity, _, _ in rows) else None
+                version = self._version()
+            finally:
+                self._conn.execute("COMMIT")
+        return datasets, catalogs, version, rows[-1][2] if rows else 0.0
+
+    def _catalogs(self) -> list[dict]:
+        return [_decode(raw) for (raw,) in self._conn.execute("SELECT record FROM catalogs ORDER BY id")]
+
+    def _version(self) -> int:
+        row = self._conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'").fetchone()
+        return row[0] if row else 0
+
+    def store_id(self) -> str:
+        self.open()
+        with self._lock:
+            return self._conn.execute("SELECT value FROM meta WHERE key = 'store_id'").fetchone()[0]
+
+    def data_version(self) -> int:
+        """A number that changes after every commit to the database, by any process."""
+        self.open()
+        with self._watch_lock:
+            return self._watch.execute("PRAGMA data_version").fetchone()[0]
+
+    def _record_changes(self, entity: str, changes: list[tuple[str, str]]):
+        # REPLACE drops the entry's previous row, which keeps the log compacted.
+        now = time.time()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO changes (entity, key, action, ts) VALUES (?, ?, ?, ?)",
+            [(entity, str(key), action, now) for key, action in changes],
+        )
+
+    def _exists(self, table: str, column: str, key) -> bool:
+        return self._conn.execute(f"SELECT 1 FROM {table} WHERE {column} = ?", (key,)).fetchone() is not None
+
+    def write_datasets(
+        self,
+        records: Iterable[dict] = (),
+        deletes: Iterable[str] = (),
+        new: Iterable[str] = (),
+        expect: Optional[dict] = None,
+        outbox: Iterable[dict] = (),
+    ):
+        """
+        Write records and delete identifiers in one transaction. Raises
+        StoreConflict if one of the ``new`` identifiers exists, or if the
+        stored record differs from ``expect`` (a record read before the write);
+        ``outbox`` operations are queued in the same transaction.
+        """
+        self.open()
+        records = list(records)
+        deletes = list(deletes)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                taken = [i for i in new if self._exists("datasets", "identifier", i)]
+                if taken:
+                    raise StoreConflict(f"Dataset identifier already exists: {taken[0]}")
+                if expect is not None:
+                    row = self._conn.execute(
+                        "SELECT record FROM datasets WHERE identifier = ?", (expect["identifier"],)
+                    ).fetchone()
+                    if row is None or row[0] != _encode(expect):
+                        raise StoreConflict(f"Dataset {expect['identifier']} was changed by another request")
+                changes = [(i, "delete") for i in deletes if self._exists("datasets", "identifier", i)]
+                changes += [
+                    (r["identifier"], "update" if self._exists("datasets", "identifier", r["identifier"]) else "create")
+                    for r in records
+                ]
+                self._conn.executemany("DELETE FROM datasets WHERE identifier = ?", [(i,) for i in deletes])
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO datasets (identifier, record) VALUES (?, ?)",
+                    [(record["identifier"], _encode(record)) for record in records],
+                )
+                self._record_changes("dataset", changes)
+                self._queue(outbox)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def create_catalog(self, catalog: dict) -> dict:
+        """Store a new catalog under the next free ID and return it with ``id`` set."""
+        self.open()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT value FROM meta WHERE key = 'next_catalog_id'").fetchone()
+                highest = self._conn.execute("SELECT MAX(id) FROM catalogs").fetchone()[0] or 0
+                catalog = {**catalog, "id": max(int(row[0]) if row else 1, highest + 1)}
+                self._conn.execute("INSERT INTO catalogs (id, record) VALUES (?, ?)", (catalog["id"], _encode(catalog)))
+                self._record_changes("catalog", [(catalog["id"], "create")])
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('next_catalog_id', ?)", (str(catalog["id"] + 1),)
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return catalog
+
+    def delete_catalog(self, catalog_id: int) -> bool:
+        self.open()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                deleted = self._conn.execute("DELETE FROM catalogs WHERE id = ?", (catalog_id,)).rowcount > 0
+                if deleted:
+                    self._record_changes("catalog", [(catalog_id, "delete")])
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return deleted
+
+    def _prune_tombstones(self):
+        cutoff = time.time() - self.tombstone_seconds
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT MAX(seq) FROM changes WHERE action = 'delete' AND ts < ?", (cutoff,)
+                ).fetchone()
+                if row[0] is not None:
+                    self._conn.execute("DELETE FROM changes WHERE action = 'delete' AND ts < ?", (cutoff,))
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO meta (key, value) VALUES ('change_floor', ?)",
+                        (str(max(row[0], self.change_floor())),),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def change_floor(self) -> int:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'change_floor'").fetchone()
+        return int(row[0]) if row else 0
+
+    def changes(self, since: int, limit: int) -> tuple[list[dict], int]:
+        """Return up to ``limit`` changes with a sequence number above ``since``, and the change floor."""
+        self.open()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, entity, key, action, ts FROM changes WHERE seq > ? ORDER BY seq LIMIT ?", (since, limit)
+            ).fetchall()
+            floor = self.change_floor()
+        return [
+            {"seq": seq, "entity": entity, "key": key, "action": action, "ts": ts}
+            for seq, entity, key, action, ts in rows
+        ], floor
+
+    def _queue(self, operations: Iterable[dict]):
+        operations = list(operations)
+        now = time.time()
+        rows = []
+        for position, operation in enumerate(operations, 1):
+            entry = {"ts": now, **operation}
+            if position < len(operations):
+                entry["more"] = True
+            rows.append((now, json.dumps(entry)))
+        self._conn.executemany("INSERT INTO outbox (ts, entry) VALUES (?, ?)", rows)
+
+    def append_outbox(self, operations: Iterable[dict]):
+        self.open()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._queue(operations)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def outbox_entries(self, after: int, limit: Optional[int] = None, upto: Optional[int] = None) -> list[dict]:
+        """
+        Outbox entries after sequence ``after``. With ``limit`` the batch is
+        extended so the operations of one append are never split.
+        """
+        self.open()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, entry FROM outbox WHERE seq > ? AND seq <= ? ORDER BY seq LIMIT ?",
+                (after, upto if upto is not None else 2**63 - 1, limit if limit is not None else -1),
+            ).fetchall()
+            entries = [{**json.loads(entry), "seq": seq} for seq, entry in rows]
+            while entries and limit is not None and entries[-1].get("more"):
+                row = self._conn.execute(
+                    "SELECT seq, entry FROM outbox WHERE seq > ? ORDER BY seq LIMIT 1", (entries[-1]["seq"],)
+                ).fetchone()
+                if row is None:
+                    break
+                entries.append({**json.loads(row[1]), "seq": row[0]})
+        return entries
+
+    def outbox_state(self) -> dict:
+        self.open()
+        with self._lock:
+            meta = dict(self._conn.execute("SELECT key, value FROM meta WHERE key LIKE 'outbox_%'"))
+            applied_seq = int(meta.get("outbox_applied_seq", 0))
+            pending, oldest = self._conn.execute(
+                "SELECT COUNT(*), MIN(ts) FROM outbox WHERE seq > ?", (applied_seq,)
+            ).fetchone()
+            row = self._conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'outbox'").fetchone()
+        return {
+            "applied_seq": applied_seq,
+            "applied_at": float(meta["outbox_applied_at"]) if "outbox_applied_at" in meta else None,
+            "last_seq": row[0] if row else 0,
+            "pending": pending,
+            "oldest_ts": oldest,
+            "floor": int(meta.get("outbox_floor", 0)),
+        }
+
+    def outbox_applied(self, seq: int):
+        """
+        Record that entries up to ``seq`` reached the triple store. Applied
+        entries are kept for ``OUTBOX_RETENTION`` seconds so the other
+        processes can still see which graphs they touched.
+        """
+        self.open()
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                    [("outbox_applied_seq", str(seq)), ("outbox_applied_at", repr(now))],
+                )
+                row = self._conn.execute(
+                    "SELECT MAX(seq) FROM outbox WHERE seq <= ? AND ts < ?", (seq, now - self.outbox_retention)
+                ).fetchone()
+                if row[0] is not None:
+                    self._conn.execute("DELETE FROM outbox WHERE seq <= ?", (row[0],))
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO meta (key, value) VALUES ('outbox_floor', ?)", (str(row[0]),)
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+
+STORE = CatalogStore()
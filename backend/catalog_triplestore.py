@@ -0,0 +1,39 @@
+import os
+
+from rdflib import Graph
+
+from quad_store import QuadStore
+from triplestore import EXPORT_FORMATS, EXPORT_QUERY, dataset_records_from_graph
+from triplestore_backend import FusekiBackend, QueryStream, TriplestoreBackend
+from triplestore_client import FUSEKI
+
+
+def open_backend(name: str = "") -> TriplestoreBackend:
+    """Pick the triple store from ``TRIPLESTORE_BACKEND``: "fuseki" (default) or "embedded"."""
+    name = name or os.getenv("TRIPLESTORE_BACKEND", "fuseki")
+    if name == "fuseki":
+        return FusekiBackend(FUSEKI)
+    if name == "embedded":
+        return QuadStore()
+    raise ValueError(f"Unknown triple store backend: {name}")
+
+
+def load_dataset_records() -> list[dict]:
+    """Read every dataset back from the named graphs in the triple store."""
+    body, _ = TRIPLESTORE.query(EXPORT_QUERY, "application/n-triples")
+    graph = Graph()
+    graph.parse(data=body, format="nt")
+    return dataset_records_from_graph(graph)
+
+
+async def aexport_catalog(rdf_format: str = "turtle") -> QueryStream:
+    """
+    Open a streamed export of every named graph; the caller iterates the body
+    and closes the stream. N-Quads keep the graph names, the other formats
+    merge all graphs into one.
+    """
+    media_type, _ = EXPORT_FORMATS[rdf_format]
+    return await TRIPLESTORE.aexport(media_type)
+
+
+TRIPLESTORE = open_backend()
@@ -0,0 +1,226 @@
+import base64
+import json
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Optional
+
+
+SPARSE_RATIO = 64
+
+
+def _title_key(record: dict) -> tuple:
+    return ((record.get("title") or "").lower(),)
+
+
+def _timestamp(value) -> float:
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return 0.0
+    return value.timestamp() if isinstance(value, datetime) else 0.0
+
+
+def _date_key(field: str) -> Callable[[dict], tuple]:
+    def key(record: dict) -> tuple:
+        value = record.get(field)
+        return (value is not None, _timestamp(value))
+
+    return key
+
+
+class SortedIndex:
+    """
+    Identifiers kept in order of ``key_func(record)``, with the identifier as
+    tie-breaker so every entry has a unique position. Not synchronized: a
+    page bisects and walks the live list, so read it under the lock its
+    writers hold.
+    """
+
+    def __init__(self, key_func: Callable[[dict], tuple]):
+        self.key_func = key_func
+        self._entries: list[tuple] = []
+        self._keys: dict[str, tuple] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, identifier: str, record: dict):
+        self.remove(identifier)
+        entry = (*self.key_func(record), identifier)
+        insort(self._entries, entry)
+        self._keys[identifier] = entry
+
+    def remove(self, identifier: str):
+        entry = self._keys.pop(identifier, None)
+        if entry is not None:
+            del self._entries[bisect_left(self._entries, entry)]
+
+    def clear(self):
+        self._entries.clear()
+        self._keys.clear()
+
+    def load(self, records: Iterable[dict]):
+        """Replace the contents with a single sort instead of one insort per record."""
+        self._keys = {record["identifier"]: (*self.key_func(record), record["identifier"]) for record in records}
+        self._entries = sorted(self._keys.values())
+
+    def key(self, identifier: str) -> Optional[tuple]:
+        return self._keys.get(identifier)
+
+    def slice(self, skip: int, limit: int, descending: bool = False, within: Optional[set] = None) -> list[str]:
+        if within is not None and not self._sparse(within):
+            start = len(self._entries) if descending else 0
+            return [entry[-1] for entry in islice(self._walk(start, descending, within), skip, skip + limit)]
+        entries = self._entries if within is None else self._restricted(within)
+        if descending:
+            end = len(entries) - skip
+            entries = entries[max(end - limit, 0) : max(end, 0)][::-1]
+        else:
+            entries = entries[skip : skip + limit]
+        return [entry[-1] for entry in entries]
+
+    def after(self, entry: tuple, limit: int, descending: bool = False, within: Optional[set] = None) -> list[str]:
+        if within is not None and not self._sparse(within):
+            start = bisect_left(self._entries, entry) if descending else bisect_right(self._entries, entry)
+            return [entry[-1] for entry in islice(self._walk(start, descending, within), limit)]
+        entries = self._entries if within is None else self._restricted(within)
+        if descending:
+            end = bisect_left(entries, entry)
+            entries = entries[max(end - limit, 0) : end][::-1]
+        else:
+            start = bisect_right(entries, entry)
+            entries = entries[start : start + limit]
+        return [entry[-1] for entry in entries]
+
+    def _sparse(self, identifiers: set) -> bool:
+        # A handful of matches among many entries is cheaper to sort than to find by walking the index.
+        return len(identifiers) * SPARSE_RATIO < len(self._entries)
+
+    def _walk(self, start: int, descending: bool, identifiers: set) -> Iterator[tuple]:
+        """Entries from position ``start`` on (backwards when descending) whose identifier is in ``identifiers``."""
+        entries = self._entries
+        positions = range(start - 1, -1, -1) if descending else range(start, len(entries))
+        return (entries[i] for i in positions if entries[i][-1] in identifiers)
+
+    def _restricted(self, identifiers: set) -> list[tuple]:
+        keys = self._keys
+        return sorted(key for key in map(keys.get, identifiers) if key is not None)
+
+
+class FacetIndex:
+    """
+    Posting sets of dataset identifiers per field value, so facet counts are
+    set sizes and filters are set intersections rather than catalog scans.
+    The postings are live sets: read them under the lock their writers hold.
+    ``match`` always returns a new set, never one of the postings.
+    """
+
+    def __init__(self, fields: tuple[str, ...]):
+        self.fields = fields
+        self._postings: dict[str, dict[str, set]] = {field: {} for field in fields}
+
+    @staticmethod
+    def value_of(value) -> Optional[str]:
+        if value is None or value == "":
+            return None
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        return str(value)
+
+    def add(self, identifier: str, record: dict):
+        for field in self.fields:
+            value = self.value_of(record.get(field))
+            if value is not None:
+                self._postings[field].setdefault(value, set()).add(identifier)
+
+    def remove(self, identifier: str, record: dict):
+        for field in self.fields:
+            value = self.value_of(record.get(field))
+            postings = self._postings[field].get(value)
+            if postings is not None:
+                postings.discard(identifier)
+                if not postings:
+                    del self._postings[field][value]
+
+    def clear(self):
+        for postings in self._postings.values():
+            postings.clear()
+
+    def match(self, filters: dict[str, list]) -> Optional[set]:
+        """
+        Identifiers matching any of the given values for every filtered field,
+        or None when no filter is set.
+        """
+        selected = []
+        for field, values in filters.items():
+            if not values:
+                continue
+            postings = self._postings[field]
+            sets = [postings.get(self.value_of(value), set()) for value in values]
+            selected.append(sets[0] if len(sets) == 1 else set().union(*sets))
+        if not selected:
+            return None
+        selected.sort(key=len)
+        matched = set(selected[0])
+        matched.intersection_update(*selected[1:])
+        return matched
+
+    def counts(self, within: Optional[set] = None) -> dict[str, dict[str, int]]:
+        result = {}
+        for field, postings in self._postings.items():
+            if within is None:
+                counts = {value: len(ids) for value, ids in postings.items()}
+            else:
+                counts = {value: len(ids & within) for value, ids in postings.items()}
+                counts = {value: count for value, count in counts.items() if count}
+            result[field] = dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+        return result
+
+
+SORT_INDEXES = {
+    "title": SortedIndex(_title_key),
+    "modified": SortedIndex(_date_key("modified")),
+    "issued": SortedIndex(_date_key("issued")),
+}
+
+
+FACETS = FacetIndex(("theme", "file_format", "publisher", "distribution_access_type", "is_public", "webid"))
+
+
+def index_dataset(record: dict):
+    for index in SORT_INDEXES.values():
+        index.add(record["identifier"], record)
+    FACETS.add(record["identifier"], record)
+
+
+def unindex_dataset(record: dict):
+    for index in SORT_INDEXES.values():
+        index.remove(record["identifier"])
+    FACETS.remove(record["identifier"], record)
+
+
+def rebuild_indexes(records: list[dict]):
+    for index in SORT_INDEXES.values():
+        index.load(records)
+    FACETS.clear()
+    for record in records:
+        FACETS.add(record["identifier"], record)
+
+
+def encode_cursor(sort: str, order: str, entry: tuple) -> str:
+    raw = json.dumps([sort, order, list(entry)], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, str, tuple]:
+    """Raise ValueError for anything that is not a cursor issued by encode_cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort, order, entry = json.loads(raw)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+    if sort not in SORT_INDEXES or order not in {"asc", "desc"} or not isinstance(entry, list):
+        raise ValueError("Invalid cursor")
+    return sort, order, tuple(entry)
@@ -1,31 +1,95 @@
+import hashlib
+import json
+import mimetypes
 import os
-import requests
+import threading
+import time
 import uuid
-from datetime import datetime
-from typing import Optional
-from requests.auth import HTTPBasicAuth
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Request
-from fastapi.responses import Response
+import zlib
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Iterable, Literal, Optional
+from urllib.parse import urlparse
+from fastapi import Depends, FastAPI, File, UploadFile, Form, HTTPException, Query, Request
+from fastapi.responses import FileResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, TypeAdapter, ValidationError
 
 from schemas import (
     Dataset as DatasetSchema,
     DatasetCreate,
+    DatasetImport,
     DatasetUpdate,
     Catalog as CatalogSchema,
     CatalogCreate,
+    SERVER_MANAGED_FIELDS,
 )
 from triplestore import (
-    generate_dcat_dataset_ttl,
-    insert_dataset_rdf,
-    append_to_catalog_graph,
-    delete_named_graph,
-    remove_from_catalog_graph,
+    build_dataset_graph,
+    change_feed_graph,
+    dataset_iri,
+    dataset_ntriples,
+    EXPORT_FORMATS,
 )
-from shacl_validation import validate_turtle
+from blob_store import BLOBS, is_digest
+from model_fetcher import FETCHER, FetchError
+from catalog_store import SHARED, STORE, StoreConflict
+from dataset_index import (
+    FACETS,
+    SORT_INDEXES,
+    decode_cursor,
+    encode_cursor,
+    index_dataset,
+    rebuild_indexes,
+    unindex_dataset,
+)
+from search_index import SEARCH_INDEX
+from catalog_triplestore import TRIPLESTORE, aexport_catalog, load_dataset_records
+from triplestore_client import CircuitOpenError, TriplestoreError
+from metrics import ENABLED as METRICS_ENABLED, METRICS, MetricsMiddleware, handler_started, record_stage, stage
+from outbox import OUTBOX
+from pod_harvester import HARVESTER
+from response_cache import RESPONSES, CachedBody, accepts_gzip
+from shacl_validation import SHAPES
+from sparql_cache import SPARQL_CACHE, CachedResult, ParsedQuery, QueryRejected
+from worker_pool import POOL, PoolBusy, parse_dataset_records, prepare_datasets
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    SHAPES.load()
+    _load_state()
+    POOL.start()
+    TRIPLESTORE.open()
+    OUTBOX.on_applied(SPARQL_CACHE.invalidate)
+    OUTBOX.start()
+    # In shared mode only the process that drains the outbox harvests pods.
+    HARVESTER.start(_harvest_and_apply, when=(lambda: STORE.leader.held) if SHARED else None)
+    if SHARED:
+        STATE_SYNC_STOP.clear()
+        threading.Thread(target=_follow_store, name="state-sync", daemon=True).start()
+    yield
+    STATE_SYNC_STOP.set()
+    await HARVESTER.stop()
+    OUTBOX.stop()
+    POOL.stop()
+    STORE.close()
+    FETCHER.close()
+    await TRIPLESTORE.aclose()
+
+
+async def _catch_up():
+    """Shared mode: apply writes committed by other processes before handling a request."""
+    if STORE.data_version() != SYNCED_DATA_VERSION:
+        await run_in_threadpool(_sync_state)
+
 
-app = FastAPI()
+app = FastAPI(
+    lifespan=lifespan,
+    dependencies=([Depends(handler_started)] if METRICS_ENABLED else []) + ([Depends(_catch_up)] if SHARED else []),
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -34,6 +98,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
 
 class AccessRequest(BaseModel):
@@ -45,7 +111,200 @@ class AccessRequest(BaseModel):
 
 DATASETS: dict[str, dict] = {}
 CATALOGS: list[dict] = []
-NEXT_CATALOG_ID = 1
+# Held while DATASETS, CATALOGS and the indexes are changed.
+STATE_LOCK = threading.RLock()
+
+# Bumped on every catalog mutation; BOOT_ID keeps validators from a previous
+# process from matching a counter that restarted at zero. In shared mode the
+# version is the store's change sequence and BOOT_ID identifies the store, so
+# all processes hand out the same validators.
+BOOT_ID = uuid.uuid4().hex[:8]
+CATALOG_VERSION = 0
+CATALOG_MODIFIED = datetime.now(timezone.utc)
+SYNCED_DATA_VERSION: Optional[int] = None
+STATE_SYNC_INTERVAL = float(os.getenv("STATE_SYNC_INTERVAL", "1"))
+STATE_SYNC_STOP = threading.Event()
+
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "500"))
+NDJSON_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+RDF_TYPES = {
+    "application/trig": "trig",
+    "application/n-quads": "nquads",
+    "text/turtle": "turtle",
+}
+DATASET_FIELDS = {
+    name: None if field.is_required() else field.get_default() for name, field in DatasetSchema.model_fields.items()
+}
+DATASET_ROWS = TypeAdapter(list[dict[str, Any]])
+CATALOG_LIST = TypeAdapter(list[CatalogSchema])
+
+
+def _bump_catalog_version():
+    global CATALOG_VERSION, CATALOG_MODIFIED
+    CATALOG_VERSION += 1
+    CATALOG_MODIFIED = datetime.now(timezone.utc)
+
+
+def _unindex(identifier: str) -> Optional[dict]:
+    removed = DATASETS.pop(identifier, None)
+    if removed is not None:
+        unindex_dataset(removed)
+        SEARCH_INDEX.remove(identifier, removed)
+    return removed
+
+
+def _index(record: dict):
+    _unindex(record["identifier"])
+    DATASETS[record["identifier"]] = record
+    index_dataset(record)
+    SEARCH_INDEX.add(record["identifier"], record)
+
+
+def _store_datasets(
+    records: list[dict],
+    replaces: Optional[str] = None,
+    operations: Optional[list[dict]] = None,
+    new: Optional[list[str]] = None,
+    expect: Optional[dict] = None,
+):
+    """
+    Persist records (optionally in place of a renamed one) along with their
+    triple store operations, then update memory and indexes. Raises
+    StoreConflict if one of the ``new`` identifiers is taken or the stored
+    record is no longer ``expect``, the record the change was based on.
+    """
+    for record in records:
+        # The digest names a file under the blob root; anything else could point outside it.
+        if record.get("semantic_model_digest") is not None and not is_digest(record["semantic_model_digest"]):
+            raise ValueError(f"Invalid semantic model digest for dataset {record['identifier']}")
+    deletes = [replaces] if replaces and replaces != records[0]["identifier"] else []
+    if SHARED:
+        with stage("store"):
+            STORE.write_datasets(records, deletes, new or (), expect, outbox=operations or ())
+        if operations:
+            OUTBOX.notify()
+        _sync_state()
+        return
+
+    with STATE_LOCK:
+        _check_conflicts(new or (), expect)
+        with stage("store"):
+            STORE.write_datasets(records, deletes, outbox=operations or ())
+            _bump_catalog_version()
+            for identifier in deletes:
+                _unindex(identifier)
+            for record in records:
+                _index(record)
+    if operations:
+        OUTBOX.notify()
+
+
+def _check_conflicts(new: Iterable[str], expect: Optional[dict]):
+    # Local mode: memory is the store, so the checks need not wait for SQLite.
+    taken = [identifier for identifier in new if identifier in DATASETS]
+    if taken:
+        raise StoreConflict(f"Dataset identifier already exists: {taken[0]}")
+    if expect is not None and DATASETS.get(expect["identifier"]) is not expect:
+        raise StoreConflict(f"Dataset {expect['identifier']} was changed by another request")
+
+
+def _drop_dataset(identifier: str, operations: Optional[list[dict]] = None) -> Optional[dict]:
+    if SHARED:
+        existing = DATASETS.get(identifier)
+        if existing is None:
+            return None
+        with stage("store"):
+            STORE.write_datasets(deletes=[identifier], expect=existing, outbox=operations or ())
+        if operations:
+            OUTBOX.notify()
+        _sync_state()
+        return existing
+
+    with STATE_LOCK:
+        if identifier not in DATASETS:
+            return None
+        with stage("store"):
+            STORE.write_datasets(deletes=[identifier], outbox=operations or ())
+            _bump_catalog_version()
+            removed = _unindex(identifier)
+    if operations:
+        OUTBOX.notify()
+    return removed
+
+
+def _sync_state():
+    """
+    Shared mode: apply the changes committed to the store (by any process)
+    since the last sync, which keeps memory, indexes and the catalog version
+    of every process in line with the store.
+    """
+    global CATALOG_VERSION, CATALOG_MODIFIED, SYNCED_DATA_VERSION
+    if not SHARED:
+        return
+    data_version = STORE.data_version()
+    if data_version == SYNCED_DATA_VERSION:
+        return
+    with STATE_LOCK, stage("sync"):
+        datasets, catalogs, version, changed_at = STORE.changed_since(CATALOG_VERSION)
+        for identifier, record in datasets.items():
+            if record is None:
+                _unindex(identifier)
+            else:
+                _index(record)
+        if catalogs is not None:
+            CATALOGS[:] = catalogs
+        if version != CATALOG_VERSION:
+            CATALOG_VERSION = version
+            CATALOG_MODIFIED = datetime.fromtimestamp(changed_at, timezone.utc)
+        SYNCED_DATA_VERSION = data_version
+
+
+def _follow_store():
+    while not STATE_SYNC_STOP.wait(STATE_SYNC_INTERVAL):
+        try:
+            _sync_state()
+        except Exception as e:
+            print(f"Warning: Failed to sync catalog state from the shared store: {e}")
+
+
+def _load_state():
+    global BOOT_ID, CATALOG_VERSION
+    datasets, catalogs, version = STORE.load()
+    if SHARED:
+        BOOT_ID, CATALOG_VERSION = STORE.store_id(), version
+    if STORE.created and os.getenv("CATALOG_REBUILD_FROM_TRIPLESTORE", "0") == "1":
+        try:
+            records = load_dataset_records()
+            STORE.write_datasets(records)
+            datasets = {record["identifier"]: record for record in records}
+            print(f"Rebuilt {len(records)} datasets from the triple store")
+        except Exception as e:
+            print(f"Warning: Failed to rebuild catalog state from the triple store: {e}")
+
+    migrated = []
+    for record in datasets.values():
+        # Records written before the blob store kept the model bytes inline.
+        content = record.pop("semantic_model_file", None)
+        if content:
+            record["semantic_model_digest"], _ = BLOBS.put([content])
+            migrated.append(record)
+    if migrated:
+        STORE.write_datasets(migrated)
+    # Other processes sharing the store may be storing an upload right now.
+    BLOBS.collect(
+        {record.get("semantic_model_digest") for record in datasets.values()}, min_age=3600 if SHARED else 0
+    )
+
+    with STATE_LOCK:
+        DATASETS.clear()
+        DATASETS.update(datasets)
+        CATALOGS[:] = catalogs
+        rebuild_indexes(list(datasets.values()))
+    # Full-text indexing is the slow part of a warm start, so it catches up in
+    # the background while the API already serves requests.
+    threading.Thread(
+        target=SEARCH_INDEX.backfill, args=(list(datasets.items()), DATASETS.get), daemon=True
+    ).start()
 
 
 def _dataset_response(dataset: dict) -> DatasetSchema:
@@ -54,21 +313,213 @@ def _dataset_response(dataset: dict) -> DatasetSchema:
     return DatasetSchema(**payload)
 
 
+def _projection(fields: Optional[str]) -> tuple[str, ...]:
+    if not fields:
+        return tuple(DATASET_FIELDS)
+    selected = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in selected if f not in DATASET_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return selected
+
+
+def _current_records(identifiers: Iterable[str]) -> list[dict]:
+    """Records of index or search hits, without those removed by a concurrent write since the lookup."""
+    return [record for record in map(DATASETS.get, identifiers) if record is not None]
+
+
+def _datasets_json(records: list[dict], fields: tuple[str, ...]) -> bytes:
+    """
+    Encode stored records for listings without building a model per item.
+    Records were validated when they were written, so this only projects the
+    schema fields and fills defaults; pydantic-core encodes the plain dicts
+    with the same value formats as the response models.
+    """
+    rows = []
+    for record in records:
+        row = {field: record.get(field, DATASET_FIELDS[field]) for field in fields}
+        if "semantic_model_file" in row:
+            row["semantic_model_file"] = None
+        rows.append(row)
+    return DATASET_ROWS.dump_json(rows)
+
+
 def _catalog_response(catalog: dict) -> CatalogSchema:
     return CatalogSchema(**catalog)
 
 
+def _pool_busy(e: Exception) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(POOL.retry_after)})
+
+
+def _admit():
+    """
+    Reject a write up front while the validation queue is full. Bulk imports call this before reading their
+    streamed body; form endpoints get here after FastAPI has spooled the form, so for them it only skips
+    storing or fetching the model and queueing the validation.
+    """
+    if POOL.busy():
+        raise _pool_busy(PoolBusy("Validation queue is full"))
+
+
+def _prepare(
+    records: list[dict],
+    shape_profile: Optional[str],
+    block: bool = False,
+    previous: Optional[list[Optional[dict]]] = None,
+) -> tuple[list[dict], str]:
+    started = time.perf_counter()
+    try:
+        results, shape_version, timings = POOL.run(prepare_datasets, records, shape_profile, previous, block=block)
+    except PoolBusy as e:
+        raise _pool_busy(e) from e
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Unknown shape profile: {shape_profile}") from e
+    for name, seconds in timings.items():
+        record_stage(name, seconds)
+    # Whatever the worker did not spend building and validating went to queueing and IPC.
+    record_stage("pool", max(time.perf_counter() - started - sum(timings.values()), 0.0))
+    return results, shape_version
+
+
+def _prepared_single(
+    record: dict, shape_profile: Optional[str], previous: Optional[dict] = None
+) -> tuple[dict, str]:
+    (result,), shape_version = _prepare([record], shape_profile, previous=[previous] if previous else None)
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    if not result["conforms"]:
+        raise HTTPException(status_code=422, detail=result["detail"])
+    return result, shape_version
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in tags or "*" in tags
+
+
+def _cached_json(request: Request, render: Callable[[], tuple[bytes, dict]]) -> Response:
+    """
+    Serve a read endpoint from the response cache. The strong ETag is derived
+    from the catalog version and the query, so polling clients get a 304
+    without the response being rendered or even looked up.
+    """
+    version = f"{BOOT_ID}-{CATALOG_VERSION}"
+    key = (request.url.path, tuple(sorted(request.query_params.multi_items())))
+    tag = f"{version}-{hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:16]}"
+    headers = {"Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+    for etag in (f'"{tag}"', f'"{tag}-gz"'):
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers={**headers, "ETag": etag})
+
+    entry = RESPONSES.get(version, key)
+    if entry is None:
+        with stage("render"):
+            body, extra_headers = render()
+        if version == f"{BOOT_ID}-{CATALOG_VERSION}":
+            entry = RESPONSES.put(version, key, body, extra_headers)
+        else:
+            # The catalog changed while rendering; do not cache under the old version.
+            entry = CachedBody(body, extra_headers, RESPONSES.gzip_min_bytes)
+
+    headers.update(entry.headers)
+    if entry.gzipped is not None and accepts_gzip(request.headers.get("accept-encoding", "")):
+        headers.update({"ETag": f'"{tag}-gz"', "Content-Encoding": "gzip"})
+        return Response(entry.gzipped, media_type="application/json", headers=headers)
+    headers["ETag"] = f'"{tag}"'
+    return Response(entry.body, media_type="application/json", headers=headers)
+
+
 @app.get("/api")
 def read_root():
     return {"message": "Hello, you are using the Semantic Data Catalog."}
 
 
+@app.get("/api/shapes")
+def read_shape_profiles():
+    return SHAPES.profiles()
+
+
+def _dataset_filters(
+    theme: Optional[list[str]] = Query(None),
+    file_format: Optional[list[str]] = Query(None),
+    publisher: Optional[list[str]] = Query(None),
+    distribution_access_type: Optional[list[str]] = Query(None),
+    is_public: Optional[bool] = None,
+    webid: Optional[list[str]] = Query(None),
+) -> dict[str, list]:
+    return {
+        "theme": theme,
+        "file_format": file_format,
+        "publisher": publisher,
+        "distribution_access_type": distribution_access_type,
+        "is_public": None if is_public is None else [is_public],
+        "webid": webid,
+    }
+
+
 @app.get("/api/datasets", response_model=list[DatasetSchema])
-def read_datasets(skip: int = 0, limit: int = 10):
-    skip = max(skip, 0)
-    ordered = sorted(DATASETS.values(), key=lambda d: (d.get("title") or "").lower())
-    sliced = ordered[skip : skip + limit]
-    return [_dataset_response(item) for item in sliced]
+def read_datasets(
+    request: Request,
+    skip: int = 0,
+    limit: int = 10,
+    sort: Literal["title", "modified", "issued"] = "title",
+    order: Literal["asc", "desc"] = "asc",
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    filters: dict = Depends(_dataset_filters),
+):
+    projection = _projection(fields)
+
+    def render():
+        page_size = max(limit, 0)
+        sort_by, direction = sort, order
+        if cursor:
+            try:
+                sort_by, direction, entry = decode_cursor(cursor)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail="Invalid cursor") from e
+        index = SORT_INDEXES[sort_by]
+        # Writers change the indexes under STATE_LOCK; reading them under it too gives a consistent page.
+        with STATE_LOCK:
+            within = FACETS.match(filters)
+            if cursor:
+                try:
+                    identifiers = index.after(entry, page_size, descending=direction == "desc", within=within)
+                except TypeError as e:
+                    raise HTTPException(status_code=400, detail="Invalid cursor") from e
+            else:
+                identifiers = index.slice(max(skip, 0), page_size, descending=direction == "desc", within=within)
+            last = index.key(identifiers[-1]) if len(identifiers) == page_size and identifiers else None
+            records = [DATASETS[identifier] for identifier in identifiers]
+
+        headers = {}
+        if last is not None:
+            headers["X-Next-Cursor"] = encode_cursor(sort_by, direction, last)
+        return _datasets_json(records, projection), headers
+
+    return _cached_json(request, render)
+
+
+@app.get("/api/datasets/facets")
+def read_dataset_facets(filters: dict = Depends(_dataset_filters)):
+    with STATE_LOCK:
+        within = FACETS.match(filters)
+        return {
+            "total": len(DATASETS) if within is None else len(within),
+            "facets": FACETS.counts(within),
+        }
+
+
+@app.get("/api/datasets/search", response_model=list[DatasetSchema])
+def search_datasets(q: str, limit: int = 10, offset: int = 0, fields: Optional[str] = None):
+    projection = _projection(fields)
+    hits = SEARCH_INDEX.search(q, limit=max(min(limit, 100), 0), offset=max(offset, 0))
+    body = _datasets_json(_current_records(identifier for identifier, _ in hits), projection)
+    return Response(body, media_type="application/json")
 
 
 @app.post("/api/datasets", response_model=DatasetSchema)
@@ -89,47 +540,28 @@ def create_dataset_entry(
     theme: str = Form(...),
     catalog_id: Optional[int] = Form(None),
     webid: str = Form(...),
+    shape_profile: Optional[str] = Form(None),
     semantic_model_file: Optional[UploadFile] = File(None),
 ):
     if identifier in DATASETS:
         raise HTTPException(status_code=409, detail="Dataset identifier already exists.")
+    _admit()
 
-    file_content = None
+    file_digest = None
     file_name = None
 
     if semantic_model_file is not None:
-        file_content = semantic_model_file.file.read()
+        with stage("model_upload"):
+            file_digest, _ = BLOBS.put(semantic_model_file.file)
         file_name = semantic_model_file.filename
     elif access_url_semantic_model:
-        from urllib.parse import urlparse
-
-        parsed_url = urlparse(access_url_semantic_model)
-        if parsed_url.scheme not in {"http", "https"}:
-            raise HTTPException(status_code=400, detail="Invalid URL scheme for semantic model")
-
-        allowed_hosts_env = os.getenv("SEMANTIC_MODEL_HOST_ALLOWLIST", "")
-        allowed_hosts = [h.strip() for h in allowed_hosts_env.split(",") if h.strip()]
-        if allowed_hosts and parsed_url.hostname not in allowed_hosts:
-            raise HTTPException(status_code=400, detail="Host not allowed for semantic model")
-
-        headers = {h: request.headers[h] for h in ["Authorization", "DPoP"] if h in request.headers}
-
         try:
-            response = requests.get(access_url_semantic_model, headers=headers)
-            response.raise_for_status()
-        except (requests.exceptions.MissingSchema, requests.exceptions.InvalidURL) as e:
-            raise HTTPException(status_code=400, detail=f"Invalid URL for semantic model: {e}") from e
-        except requests.exceptions.HTTPError as e:
-            status = e.response.status_code if e.response else 502
-            detail = e.response.text if e.response else str(e)
-            if 400 <= status < 500:
-                raise HTTPException(status_code=status, detail=f"Client error fetching semantic model: {detail}") from e
-            raise HTTPException(status_code=502, detail=f"Server error fetching semantic model: {detail}") from e
-        except requests.exceptions.RequestException as e:
-            raise HTTPException(status_code=502, detail=f"Error fetching semantic model: {e}") from e
-
-        file_content = response.content
-        file_name = os.path.basename(parsed_url.path)
+            with stage("model_fetch"):
+                model = FETCHER.fetch(access_url_semantic_model, request.headers)
+        except FetchError as e:
+            raise HTTPException(status_code=e.status_code, detail=e.detail) from e
+        file_digest = model.digest
+        file_name = os.path.basename(urlparse(access_url_semantic_model).path)
 
     dataset_data = DatasetCreate(
         identifier=identifier,
@@ -146,31 +578,152 @@ def create_dataset_entry(
         file_format=file_format,
         theme=theme,
         catalog_id=catalog_id,
-        semantic_model_file=file_content,
+        semantic_model_digest=file_digest,
         semantic_model_file_name=file_name,
         webid=webid,
     )
 
+    record = dataset_data.model_dump()
+    prepared, shape_version = _prepared_single(record, shape_profile)
+
+    BASE_URI = os.getenv("BASE_URI", "https://semantic-data-catalog.com")
+    dataset_uri = f"{BASE_URI}/id/{identifier}"
+    operations = [
+        {"op": "replace", "graph": dataset_uri, "data": prepared["data"], "format": "nt"},
+        {"op": "catalog_add", "graph": dataset_uri},
+    ]
+
+    record["shape_version"] = shape_version
     try:
-        ttl_data = generate_dcat_dataset_ttl(dataset_data.model_dump())
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e)) from e
+        _store_datasets([record], operations=operations, new=[identifier])
+    except StoreConflict as e:
+        raise HTTPException(status_code=409, detail="Dataset identifier already exists.") from e
 
-    conforms, results_text = validate_turtle(ttl_data)
-    if not conforms:
-        raise HTTPException(status_code=422, detail=results_text)
+    return _dataset_response(record)
 
-    DATASETS[identifier] = dataset_data.model_dump()
 
-    try:
-        BASE_URI = os.getenv("BASE_URI", "https://semantic-data-catalog.com")
+def _import_batch(batch: list, shape_profile: Optional[str], seen: set, results: list):
+    BASE_URI = os.getenv("BASE_URI", "https://semantic-data-catalog.com")
+    prepared = []
+
+    for index, payload in batch:
+        identifier = None
+        try:
+            if isinstance(payload, bytes):
+                payload = json.loads(payload)
+            identifier = payload.get("identifier")
+            record = DatasetImport(**payload).model_dump()
+            identifier = record["identifier"]
+            if identifier in DATASETS or identifier in seen:
+                raise ValueError("Dataset identifier already exists.")
+        except (ValueError, AttributeError, ValidationError) as e:
+            results.append({"index": index, "identifier": identifier, "status": "error", "detail": str(e)})
+            continue
+        seen.add(identifier)
+        prepared.append((index, record))
+
+    if not prepared:
+        return
+
+    outcomes, shape_version = _prepare([record for _, record in prepared], shape_profile, block=True)
+    created = []
+    for (index, record), outcome in zip(prepared, outcomes):
+        identifier = record["identifier"]
+        if not outcome.get("conforms"):
+            seen.discard(identifier)
+            detail = outcome.get("error") or outcome["detail"]
+            results.append({"index": index, "identifier": identifier, "status": "error", "detail": detail})
+            continue
         dataset_uri = f"{BASE_URI}/id/{identifier}"
-        insert_dataset_rdf(ttl_data.encode("utf-8"), graph_uri=dataset_uri)
-        append_to_catalog_graph(dataset_uri)
+        operations = [
+            {"op": "replace", "graph": dataset_uri, "data": outcome["data"], "format": "nt"},
+            {"op": "catalog_add", "graph": dataset_uri},
+        ]
+        record["shape_version"] = shape_version
+        created.append((index, record, operations))
+
+    if created:
+        try:
+            _store_datasets(
+                [record for _, record, _ in created],
+                operations=[operation for _, _, operations in created for operation in operations],
+                new=[record["identifier"] for _, record, _ in created],
+            )
+        except StoreConflict:
+            # A concurrent request took some of the identifiers; store the others one by one.
+            stored = []
+            for index, record, operations in created:
+                try:
+                    _store_datasets([record], operations=operations, new=[record["identifier"]])
+                    stored.append((index, record, operations))
+                except StoreConflict as e:
+                    results.append(
+                        {"index": index, "identifier": record["identifier"], "status": "error", "detail": str(e)}
+                    )
+            created = stored
+    for index, record, _ in created:
+        results.append({"index": index, "identifier": record["identifier"], "status": "created"})
+
+
+async def _ndjson_batches(request: Request):
+    batch = []
+    index = 0
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                batch.append((index, line))
+                index += 1
+            if len(batch) >= BULK_BATCH_SIZE:
+                yield batch
+                batch = []
+    if buffer.strip():
+        batch.append((index, buffer))
+    if batch:
+        yield batch
+
+
+async def _rdf_batches(request: Request, rdf_format: str, webid: Optional[str]):
+    body = await request.body()
+    try:
+        records = await run_in_threadpool(POOL.run, parse_dataset_records, body, rdf_format, block=True)
+    except PoolBusy as e:
+        raise _pool_busy(e) from e
     except Exception as e:
-        print(f"Warning: Failed to insert RDF to Fuseki: {e}")
+        raise HTTPException(status_code=400, detail=f"Could not parse {rdf_format} body: {e}") from e
+
+    for record in records:
+        record.setdefault("webid", webid)
+    for start in range(0, len(records), BULK_BATCH_SIZE):
+        yield list(enumerate(records[start : start + BULK_BATCH_SIZE], start))
+
+
+@app.post("/api/datasets/bulk")
+async def bulk_import_datasets(request: Request, shape_profile: Optional[str] = None, webid: Optional[str] = None):
+    try:
+        SHAPES.get(shape_profile)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Unknown shape profile: {shape_profile}") from e
+    _admit()
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in NDJSON_TYPES:
+        batches = _ndjson_batches(request)
+    elif content_type in RDF_TYPES:
+        batches = _rdf_batches(request, RDF_TYPES[content_type], webid)
+    else:
+        raise HTTPException(status_code=415, detail=f"Unsupported bulk content type: {content_type or 'none'}")
 
-    return _dataset_response(DATASETS[identifier])
+    seen: set = set()
+    results: list[dict] = []
+    async for batch in batches:
+        await run_in_threadpool(_import_batch, batch, shape_profile, seen, results)
+
+    results.sort(key=lambda item: item["index"])
+    created = sum(1 for item in results if item["status"] == "created")
+    return {"created": created, "failed": len(results) - created, "results": results}
 
 
 @app.put("/api/datasets/{identifier}", response_model=DatasetSchema)
@@ -187,17 +740,23 @@ def update_dataset_entry(
     file_format: Optional[str] = Form(None),
     theme: Optional[str] = Form(None),
     new_identifier: Optional[str] = Form(None),
+    shape_profile: Optional[str] = Form(None),
     semantic_model_file: Optional[UploadFile] = File(None),
 ):
     existing = DATASETS.get(identifier)
     if not existing:
         raise HTTPException(status_code=404, detail="Dataset not found")
+    _check_editable(existing)
 
     if new_identifier and new_identifier != identifier and new_identifier in DATASETS:
         raise HTTPException(status_code=409, detail="New dataset identifier already exists.")
+    _admit()
 
-    file_content = semantic_model_file.file.read() if semantic_model_file else None
-    file_name = semantic_model_file.filename if semantic_model_file else None
+    file_digest = file_name = None
+    if semantic_model_file is not None:
+        with stage("model_upload"):
+            file_digest, _ = BLOBS.put(semantic_model_file.file)
+        file_name = semantic_model_file.filename
 
     candidate = dict(existing)
     if title is not None:
@@ -222,56 +781,146 @@ def update_dataset_entry(
         candidate["file_format"] = file_format
     if theme is not None:
         candidate["theme"] = theme
-    if file_content is not None:
-        candidate["semantic_model_file"] = file_content
+    if file_digest is not None:
+        candidate["semantic_model_digest"] = file_digest
     if file_name is not None:
         candidate["semantic_model_file_name"] = file_name
 
-    try:
-        ttl_data = generate_dcat_dataset_ttl(candidate)
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e)) from e
+    return _update_dataset(existing, candidate, shape_profile)
 
-    conforms, results_text = validate_turtle(ttl_data)
-    if not conforms:
-        raise HTTPException(status_code=422, detail=results_text)
 
-    DATASETS.pop(identifier, None)
-    DATASETS[candidate["identifier"]] = candidate
+def _check_editable(existing: dict):
+    # The next harvest would overwrite or drop the change again.
+    if existing.get("harvest_source"):
+        raise HTTPException(
+            status_code=409, detail=f"Dataset is harvested from {existing['harvest_source']}; change it in its pod"
+        )
+
+
+def _update_dataset(existing: dict, candidate: dict, shape_profile: Optional[str]) -> DatasetSchema:
+    """
+    Validate and store a changed dataset. The triple store gets the triples
+    that changed as one patch; a rename moves the graph and the catalog
+    membership in one batch instead.
+    """
+    identifier = existing["identifier"]
+    renamed = candidate["identifier"] != identifier
+    previous = None if renamed else existing
+    prepared, shape_version = _prepared_single(candidate, shape_profile, previous)
 
     BASE_URI = os.getenv("BASE_URI", "https://semantic-data-catalog.com")
     old_dataset_uri = f"{BASE_URI}/id/{identifier}"
     new_dataset_uri = f"{BASE_URI}/id/{candidate['identifier']}"
+    if renamed:
+        operations = [
+            {"op": "drop", "graph": old_dataset_uri},
+            {"op": "catalog_remove", "graph": old_dataset_uri},
+            {"op": "replace", "graph": new_dataset_uri, "data": prepared["data"], "format": "nt"},
+            {"op": "catalog_add", "graph": new_dataset_uri},
+        ]
+    elif "delete" not in prepared:
+        operations = [{"op": "replace", "graph": new_dataset_uri, "data": prepared["data"], "format": "nt"}]
+    elif prepared["delete"] or prepared["insert"]:
+        operations = [
+            {
+                "op": "patch",
+                "graph": new_dataset_uri,
+                "delete": prepared["delete"],
+                "insert": prepared["insert"],
+                "format": "nt",
+            }
+        ]
+    else:
+        operations = []
+
+    candidate["shape_version"] = shape_version
     try:
-        delete_named_graph(old_dataset_uri)
-        insert_dataset_rdf(ttl_data.encode("utf-8"), graph_uri=new_dataset_uri)
-    except Exception as e:
-        print(f"Error while updating in the triple store: {e}")
+        _store_datasets(
+            [candidate],
+            replaces=identifier,
+            operations=operations,
+            new=[candidate["identifier"]] if renamed else [],
+            expect=existing,
+        )
+    except StoreConflict as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+
+    return _dataset_response(candidate)
+
+
+PATCH_REQUIRED = {"title", "identifier", "issued", "modified", "is_public", "access_url_dataset"}
+
+
+@app.patch("/api/datasets/{identifier}", response_model=DatasetSchema)
+def patch_dataset_entry(identifier: str, changes: DatasetUpdate, shape_profile: Optional[str] = None):
+    """
+    Change only the fields present in the JSON body (merge patch semantics:
+    ``null`` clears an optional field). ``identifier`` renames the dataset.
+    """
+    existing = DATASETS.get(identifier)
+    if not existing:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    _check_editable(existing)
+
+    fields = changes.model_dump(exclude_unset=True)
+    for name in SERVER_MANAGED_FIELDS:
+        if name in fields:
+            raise HTTPException(status_code=400, detail=f"{name} is set by uploading the model with PUT")
+    cleared = sorted(name for name in PATCH_REQUIRED if name in fields and fields[name] is None)
+    if cleared:
+        raise HTTPException(status_code=400, detail=f"Fields cannot be cleared: {', '.join(cleared)}")
+    new_identifier = fields.get("identifier", identifier)
+    if new_identifier != identifier and new_identifier in DATASETS:
+        raise HTTPException(status_code=409, detail="New dataset identifier already exists.")
+    _admit()
 
-    return _dataset_response(DATASETS[candidate["identifier"]])
+    return _update_dataset(existing, {**existing, **fields}, shape_profile)
 
 
 @app.delete("/api/datasets/{identifier}")
 def delete_dataset_entry(identifier: str):
-    deleted = DATASETS.pop(identifier, None)
-    if not deleted:
+    existing = DATASETS.get(identifier)
+    if not existing:
         raise HTTPException(status_code=404, detail="Dataset not found")
+    _check_editable(existing)
 
     BASE_URI = os.getenv("BASE_URI", "https://semantic-data-catalog.com")
     dataset_uri = f"{BASE_URI}/id/{identifier}"
+    operations = [
+        {"op": "drop", "graph": dataset_uri},
+        {"op": "catalog_remove", "graph": dataset_uri},
+    ]
 
     try:
-        delete_named_graph(dataset_uri)
-        remove_from_catalog_graph(dataset_uri)
-    except Exception as e:
-        print(f"Error while removing from the triple store: {e}")
-
+        deleted = _drop_dataset(identifier, operations)
+    except StoreConflict as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    if deleted is None:
+        raise HTTPException(status_code=404, detail="Dataset not found")
     return _dataset_response(deleted)
 
 
+@app.get("/api/datasets/{identifier}/semantic-model")
+def download_semantic_model(identifier: str):
+    dataset = DATASETS.get(identifier)
+    if not dataset:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    digest = dataset.get("semantic_model_digest")
+    if not digest or not BLOBS.exists(digest):
+        raise HTTPException(status_code=404, detail="Dataset has no stored semantic model")
+
+    filename = dataset.get("semantic_model_file_name") or f"{identifier}.ttl"
+    return FileResponse(
+        BLOBS.path(digest),
+        media_type=mimetypes.guess_type(filename)[0] or "text/turtle",
+        filename=filename,
+        headers={"ETag": f'"{digest}"', "Cache-Control": "public, max-age=31536000, immutable"},
+    )
+
+
 @app.get("/api/datasets/count")
-def get_dataset_count_endpoint():
-    return {"count": len(DATASETS)}
+def get_dataset_count_endpoint(request: Request):
+    return _cached_json(request, lambda: (json.dumps({"count": len(DATASETS)}).encode("utf-8"), {}))
 
 
 @app.post("/api/datasets/{identifier}/request-access")
@@ -285,49 +934,355 @@ def request_dataset_access(identifier: str, payload: AccessRequest):
 
 
 @app.get("/api/catalogs", response_model=list[CatalogSchema])
-def read_catalogs(skip: int = 0, limit: int = 10):
-    skip = max(skip, 0)
-    sliced = CATALOGS[skip : skip + limit]
-    return [_catalog_response(item) for item in sliced]
+def read_catalogs(request: Request, skip: int = 0, limit: int = 10):
+    def render():
+        sliced = CATALOGS[max(skip, 0) : max(skip, 0) + limit]
+        return CATALOG_LIST.dump_json([_catalog_response(item) for item in sliced]), {}
+
+    return _cached_json(request, render)
 
 
 @app.post("/api/catalogs", response_model=CatalogSchema)
 def create_catalog_entry(catalog: CatalogCreate):
-    global NEXT_CATALOG_ID
     payload = catalog.model_dump()
-    payload["id"] = NEXT_CATALOG_ID
     payload["datasets"] = []
-    NEXT_CATALOG_ID += 1
-    CATALOGS.append(payload)
+    # The store allocates the ID, so it is unique across processes.
+    with STATE_LOCK:
+        payload = STORE.create_catalog(payload)
+        if not SHARED:
+            CATALOGS.append(payload)
+            _bump_catalog_version()
+    _sync_state()
     return _catalog_response(payload)
 
 
 @app.delete("/api/catalogs/{catalog_id}")
 def delete_catalog_entry(catalog_id: int):
-    for idx, item in enumerate(CATALOGS):
-        if item["id"] == catalog_id:
-            removed = CATALOGS.pop(idx)
-            return _catalog_response(removed)
-    raise HTTPException(status_code=404, detail="Catalog not found")
+    with STATE_LOCK:
+        removed = next((item for item in CATALOGS if item["id"] == catalog_id), None)
+        # In shared mode another process may have deleted it already.
+        if removed is None or not STORE.delete_catalog(catalog_id):
+            raise HTTPException(status_code=404, detail="Catalog not found")
+        if not SHARED:
+            CATALOGS.remove(removed)
+            _bump_catalog_version()
+    _sync_state()
+    return _catalog_response(removed)
 
 
-@app.get("/api/export/catalog")
-def export_catalog():
+@app.get("/api/changes")
+def read_changes(
+    request: Request,
+    response: Response,
+    since: Optional[str] = None,
+    limit: int = 100,
+    include_rdf: bool = False,
+    format: Optional[str] = None,
+):
+    """
+    Changes after the ``since`` cursor in sequence order. The log is compacted
+    to the latest change per dataset or catalog, so create and update are
+    upserts; a cursor older than the pruned deletions gets 410 and must resync
+    from the full export.
+    """
     try:
-        sparql_url = "http://fuseki:3030/semantic_data_catalog/sparql"
-        query = "CONSTRUCT { ?s ?p ?o } WHERE { GRAPH ?g { ?s ?p ?o } }"
-        headers = {"Accept": "text/turtle"}
-        auth = HTTPBasicAuth("admin", "admin")
-
-        res = requests.post(sparql_url, data={"query": query}, headers=headers, auth=auth)
-
-        if res.status_code in [200, 204]:
-            return Response(
-                content=res.text,
-                media_type="text/turtle",
-                headers={"Content-Disposition": "attachment; filename=semantic_data_catalog.ttl"}
-            )
+        after = int(since) if since else 0
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail="Invalid change cursor") from e
+    limit = max(min(limit, 1000), 1)
+    changes, floor = STORE.changes(after, limit + 1)
+    if 0 < after < floor:
+        raise HTTPException(
+            status_code=410, detail="Change log was compacted past this cursor; resync from /api/export/catalog"
+        )
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    next_cursor = str(changes[-1]["seq"]) if changes else str(after)
+    response.headers["X-Next-Cursor"] = next_cursor
+
+    accept = request.headers.get("accept", "")
+    if format or any(EXPORT_FORMATS[name][0] in accept for name in ("turtle", "ntriples", "jsonld")):
+        rdf_format = _export_format(format, accept)
+        if rdf_format == "nquads":
+            raise HTTPException(status_code=400, detail="The change feed is not available as N-Quads")
+        graph = change_feed_graph(changes, DATASETS if include_rdf else None)
+        media_type = EXPORT_FORMATS[rdf_format][0]
+        serializer = {"ntriples": "nt", "jsonld": "json-ld"}.get(rdf_format, rdf_format)
+        return Response(
+            content=graph.serialize(format=serializer), media_type=media_type, headers={"X-Next-Cursor": next_cursor}
+        )
+
+    items = []
+    for change in changes:
+        item = {
+            "seq": change["seq"],
+            "type": change["entity"],
+            "identifier": change["key"],
+            "action": change["action"],
+            "timestamp": datetime.fromtimestamp(change["ts"], timezone.utc).isoformat(),
+        }
+        if change["action"] != "delete":
+            record = DATASETS.get(change["key"]) if change["entity"] == "dataset" else None
+            if record is not None:
+                item["data"] = _dataset_response(record)
+                if include_rdf:
+                    try:
+                        item["rdf"] = dataset_ntriples(build_dataset_graph(record))
+                    except ValueError as e:
+                        print(f"Warning: Leaving the RDF of dataset {change['key']!r} out of the change feed: {e}")
+            elif change["entity"] == "catalog":
+                catalog = next((c for c in CATALOGS if str(c["id"]) == change["key"]), None)
+                if catalog is not None:
+                    item["data"] = _catalog_response(catalog)
+        items.append(item)
+    return {"changes": items, "next": next_cursor, "has_more": has_more}
+
+
+def _apply_harvest(results: dict[str, Optional[list[dict]]]) -> dict:
+    """
+    Merge harvested pod catalogs into the local state. Catalogs that could not
+    be read keep their previous records; unchanged records are not rewritten.
+    Harvested records are read-only through the API, so the pod always wins.
+    Records the catalog could not describe in RDF (an identifier that makes no
+    IRI, a missing or invalid access URL) are skipped.
+    """
+    stored = dropped = 0
+    for source, records in results.items():
+        if records is None:
+            continue
+        fresh = {}
+        seen = set()
+        for record in records:
+            record = {**record, "harvest_source": source}
+            try:
+                build_dataset_graph(record)
+            except ValueError as e:
+                print(f"Warning: Skipping harvested dataset {record['identifier']!r} from {source}: {e}")
+                continue
+            seen.add(record["identifier"])
+            existing = DATASETS.get(record["identifier"])
+            if existing is not None and existing.get("harvest_source") != source:
+                print(f"Warning: Skipping harvested dataset {record['identifier']} from {source}, identifier is taken")
+            elif existing != record:
+                fresh[record["identifier"]] = record
+        if fresh:
+            new = [identifier for identifier in fresh if identifier not in DATASETS]
+            try:
+                _store_datasets(list(fresh.values()), new=new)
+                stored += len(fresh)
+            except StoreConflict:
+                # A dataset was created under one of the identifiers meanwhile; store the others one by one.
+                for identifier, record in fresh.items():
+                    try:
+                        _store_datasets([record], new=[identifier] if identifier in new else None)
+                        stored += 1
+                    except StoreConflict as e:
+                        print(f"Warning: Skipping harvested dataset {identifier} from {source}: {e}")
+        for identifier in [i for i, r in list(DATASETS.items()) if r.get("harvest_source") == source and i not in seen]:
+            # Records harvested before they became read-only may have been edited into the triple store;
+            # those stored unchecked before cannot have a graph there and must not reach a SPARQL update.
+            try:
+                dataset_uri = dataset_iri(identifier)
+                operations = [{"op": "drop", "graph": dataset_uri}, {"op": "catalog_remove", "graph": dataset_uri}]
+            except ValueError:
+                operations = None
+            if _drop_dataset(identifier, operations) is not None:
+                dropped += 1
+    return {"stored": stored, "dropped": dropped}
+
+
+async def _harvest_and_apply(results: Optional[dict] = None) -> dict:
+    if results is None:
+        results = await HARVESTER.harvest()
+    return await run_in_threadpool(_apply_harvest, results)
+
+
+@app.get("/api/harvest")
+def read_harvest_status():
+    return HARVESTER.status()
+
+
+@app.post("/api/harvest")
+async def run_harvest():
+    if not HARVESTER.enabled:
+        raise HTTPException(status_code=409, detail="No pods configured (HARVEST_REGISTRIES / HARVEST_WEBIDS)")
+    applied = await _harvest_and_apply()
+    return {**HARVESTER.status(), **applied}
+
+
+@app.get("/api/replication")
+def read_replication_status():
+    return OUTBOX.lag()
+
+
+@app.get("/api/workers")
+def read_worker_status():
+    return POOL.stats()
+
+
+METRICS.gauge("sdc_datasets", "Datasets in the catalog.", lambda: {(): len(DATASETS)})
+METRICS.gauge("sdc_catalog_version", "Catalog version counter.", lambda: {(): CATALOG_VERSION})
+METRICS.gauge(
+    "sdc_outbox_pending", "Operations waiting to be synced to the triple store.", lambda: {(): OUTBOX.lag()["pending"]}
+)
+METRICS.gauge(
+    "sdc_outbox_lag_seconds", "Age of the oldest unsynced operation.", lambda: {(): OUTBOX.lag()["lag_seconds"]}
+)
+METRICS.gauge(
+    "sdc_validation_pool",
+    "Validation pool counters.",
+    lambda: {(key,): value for key, value in POOL.stats().items() if key != "workers"},
+    ("metric",),
+)
+METRICS.gauge(
+    "sdc_sparql_cache",
+    "SPARQL result cache counters.",
+    lambda: {(key,): value for key, value in SPARQL_CACHE.stats().items()},
+    ("metric",),
+)
+METRICS.gauge(
+    "sdc_response_cache",
+    "Response cache counters.",
+    lambda: {(key,): value for key, value in RESPONSES.stats().items()},
+    ("metric",),
+)
+
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+
+def _export_format(rdf_format: Optional[str], accept: str) -> str:
+    if rdf_format:
+        if rdf_format not in EXPORT_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Unsupported export format: {rdf_format}")
+        return rdf_format
+    for name, (media_type, _) in EXPORT_FORMATS.items():
+        if media_type in accept:
+            return name
+    return "turtle"
+
+
+def _not_modified(request: Request, etag: str, last_modified: datetime) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return last_modified.replace(microsecond=0) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+async def _stream_export(upstream, compress: bool):
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    try:
+        async for chunk in upstream.aiter_bytes():
+            if compressor is None:
+                yield chunk
+            else:
+                compressed = compressor.compress(chunk)
+                if compressed:
+                    yield compressed
+        if compressor is not None:
+            yield compressor.flush()
+    finally:
+        await upstream.aclose()
+
+
+SPARQL_RESULT_TYPES = {"SELECT": "application/sparql-results+json", "ASK": "application/sparql-results+json"}
+
+
+async def _sparql_text(request: Request, query: Optional[str]) -> str:
+    if query is None and request.method == "POST":
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        if content_type == "application/sparql-query":
+            query = (await request.body()).decode("utf-8")
         else:
-            raise HTTPException(status_code=500, detail="Error while reading from Fuseki")
+            query = (await request.form()).get("query")
+    if not query:
+        raise HTTPException(status_code=400, detail="Missing query")
+    return query
+
+
+@app.api_route("/api/sparql", methods=["GET", "POST"])
+async def sparql_query(request: Request, query: Optional[str] = None):
+    """
+    Read-only SPARQL over the triple store. Results are served from memory
+    until the outbox syncs a change to a graph the query reads; the data seen
+    here therefore trails the API by the replication lag.
+    """
+    try:
+        parsed = ParsedQuery(await _sparql_text(request, query))
+    except QueryRejected as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    accept = request.headers.get("accept", "")
+    if not accept or accept.startswith("*/*"):
+        accept = SPARQL_RESULT_TYPES.get(parsed.form, "text/turtle")
+    key = (parsed.normalized, accept)
+    cached = SPARQL_CACHE.get(key)
+    if cached is not None:
+        return Response(cached.body, media_type=cached.media_type, headers={"X-Cache": "hit"})
+
+    since = SPARQL_CACHE.generation
+    try:
+        with stage("triplestore"):
+            upstream = await TRIPLESTORE.aquery(parsed.normalized, accept, timeout=SPARQL_CACHE.timeout)
+            try:
+                chunks, size = [], 0
+                async for chunk in upstream.aiter_bytes():
+                    size += len(chunk)
+                    if size > SPARQL_CACHE.max_result_bytes:
+                        raise HTTPException(
+                            status_code=413, detail=f"Query result exceeds {SPARQL_CACHE.max_result_bytes} bytes"
+                        )
+                    chunks.append(chunk)
+            finally:
+                await upstream.aclose()
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
+    except TriplestoreError as e:
+        if e.status_code is not None and 400 <= e.status_code < 500:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        if e.status_code == 503:
+            raise HTTPException(status_code=504, detail="Query timed out or the triple store is unavailable") from e
+        raise HTTPException(status_code=502, detail=str(e)) from e
+
+    result = CachedResult(b"".join(chunks), upstream.media_type, parsed.graphs)
+    SPARQL_CACHE.put(key, result, since)
+    return Response(result.body, media_type=result.media_type, headers={"X-Cache": "miss"})
+
+
+@app.get("/api/export/catalog")
+async def export_catalog(request: Request, format: Optional[str] = None, gzip: Optional[bool] = None):
+    rdf_format = _export_format(format, request.headers.get("accept", ""))
+    media_type, extension = EXPORT_FORMATS[rdf_format]
+    if gzip is None:
+        gzip = accepts_gzip(request.headers.get("accept-encoding", ""))
+
+    # The export reflects what has been replicated to the triple store, so the validator
+    # covers both the catalog version and the outbox position.
+    last_modified = max(CATALOG_MODIFIED, datetime.fromtimestamp(OUTBOX.applied_at or 0, timezone.utc))
+    etag = f'"{BOOT_ID}-{CATALOG_VERSION}-{OUTBOX.applied_seq}-{rdf_format}{"-gz" if gzip else ""}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(last_modified, usegmt=True),
+        "Vary": "Accept, Accept-Encoding",
+    }
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        with stage("triplestore"):
+            upstream = await aexport_catalog(rdf_format)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail=f"Error while reading from the triple store: {e}")
+
+    headers["Content-Disposition"] = f"attachment; filename=semantic_data_catalog.{extension}"
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(_stream_export(upstream, gzip), media_type=media_type, headers=headers)
@@ -0,0 +1,235 @@
+import bisect
+import os
+import threading
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+
+ENABLED = os.getenv("METRICS_ENABLED", "1") not in {"0", "false", "False"}
+SLOW_REQUEST_SECONDS = float(os.getenv("SLOW_REQUEST_SECONDS", "1.0"))
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_STAGES: ContextVar[Optional[dict]] = ContextVar("stages", default=None)
+_DISABLED_STAGE = nullcontext()
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *values, amount: float = 1.0):
+        with self._lock:
+            self._values[values] = self._values.get(values, 0.0) + amount
+
+    def value(self, *values) -> float:
+        return self._values.get(values, 0.0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for values, total in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, values)} {total:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, *values):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(values)
+            if series is None:
+                series = self._series[values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {values: (list(counts), total, count) for values, (counts, total, count) in self._series.items()}
+        for values, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                le = 'le="%g"' % bound
+                lines.append(f"{self.name}_bucket{_labels(self.labels, values, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.labels, values, le)} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, values)} {total:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.labels, values)} {count}")
+        return lines
+
+
+class Gauge:
+    """Read at scrape time from a callback returning ``{label values: value}``."""
+
+    def __init__(self, name: str, help_text: str, collect: Callable[[], dict], labels: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.collect = collect
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        try:
+            samples = self.collect()
+        except Exception:
+            return lines
+        for values, value in sorted(samples.items()):
+            lines.append(f"{self.name}{_labels(self.labels, values)} {float(value):g}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, object] = {}
+
+    def counter(self, name: str, help_text: str, labels: tuple = ()) -> Counter:
+        return self._metrics.setdefault(name, Counter(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: tuple = ()) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, collect: Callable[[], dict], labels: tuple = ()) -> Gauge:
+        self._metrics[name] = Gauge(name, help_text, collect, labels)
+        return self._metrics[name]
+
+    def render(self) -> str:
+        lines = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Registry()
+REQUESTS = METRICS.counter(
+    "sdc_requests_total", "HTTP requests by endpoint and status.", ("method", "endpoint", "status")
+)
+REQUEST_SECONDS = METRICS.histogram(
+    "sdc_request_duration_seconds", "Time until the response started, by endpoint.", ("method", "endpoint")
+)
+STAGE_SECONDS = METRICS.histogram(
+    "sdc_stage_duration_seconds", "Time spent in each request stage, by endpoint.", ("method", "endpoint", "stage")
+)
+FUSEKI_SECONDS = METRICS.histogram(
+    "sdc_fuseki_request_duration_seconds", "Fuseki calls, including retries, by operation.", ("operation",)
+)
+FUSEKI_FAILURES = METRICS.counter(
+    "sdc_fuseki_failures_total", "Failed Fuseki calls by operation and reason.", ("operation", "reason")
+)
+
+
+def stage(name: str):
+    """Time a block as one stage of the current request; a no-op when metrics are off."""
+    if not ENABLED:
+        return _DISABLED_STAGE
+    return _Stage(name)
+
+
+def record_stage(name: str, seconds: float):
+    stages = _STAGES.get()
+    if stages is not None:
+        stages[name] = stages.get(name, 0.0) + seconds
+
+
+class _Stage:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        record_stage(self.name, time.perf_counter() - self.started)
+
+
+async def handler_started():
+    """App-wide dependency: everything before it is receiving and parsing the request."""
+    stages = _STAGES.get()
+    if stages is not None:
+        stages["parse"] = time.perf_counter() - stages["_started"]
+
+
+def _server_timing(stages: dict, elapsed: float) -> bytes:
+    parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in stages.items() if not name.startswith("_")]
+    parts.append(f"app;dur={elapsed * 1000:.2f}")
+    return ", ".join(parts).encode("latin-1")
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware that opens a stage record per request, adds it as a
+    ``Server-Timing`` header when the response starts, and feeds the request
+    and stage histograms. Requests slower than ``SLOW_REQUEST_SECONDS`` are
+    logged with their stage breakdown.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        stages = {"_started": started}
+        token = _STAGES.set(stages)
+        status = [500]
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                elapsed = time.perf_counter() - started
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", _server_timing(stages, elapsed)))
+                message = {**message, "headers": headers}
+                stages["_elapsed"] = elapsed
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _STAGES.reset(token)
+            self._observe(scope, stages, status[0], time.perf_counter() - started)
+
+    @staticmethod
+    def _observe(scope, stages: dict, status: int, total: float):
+        route = scope.get("route")
+        endpoint = getattr(route, "path", None) or "unmatched"
+        method = scope["method"]
+        REQUESTS.inc(method, endpoint, str(status))
+        REQUEST_SECONDS.observe(stages.pop("_elapsed", total), method, endpoint)
+        stages.pop("_started", None)
+        for name, seconds in stages.items():
+            STAGE_SECONDS.observe(seconds, method, endpoint, name)
+        if SLOW_REQUEST_SECONDS > 0 and total >= SLOW_REQUEST_SECONDS:
+            breakdown = ", ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in stages.items())
+            print(f"Warning: Slow request {method} {scope['path']} took {total:.3f}s ({breakdown or 'no stages'})")
@@ -0,0 +1,195 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from blob_store import BLOBS, BlobTooLarge
+
+
+FORWARDED_HEADERS = ("Authorization", "DPoP")
+
+
+def _origin(url: str) -> tuple:
+    parsed = urlparse(url)
+    return parsed.scheme, parsed.hostname, parsed.port
+
+
+class FetchError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class CachedModel:
+    def __init__(self, digest: str, size: int, etag: Optional[str], last_modified: Optional[str]):
+        self.digest = digest
+        self.size = size
+        self.etag = etag
+        self.last_modified = last_modified
+        self.checked_at = time.monotonic()
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[CachedModel] = None
+        self.error: Optional[BaseException] = None
+
+
+class ModelFetcher:
+    """
+    Fetches remote semantic models into the blob store.
+
+    Results are kept in an LRU index bounded by the total size of the models
+    it refers to and revalidated with conditional GETs once they are older
+    than ``fresh_seconds``. Concurrent fetches of the same URL share one
+    download, every host gets a bounded number of parallel connections, and
+    bodies are streamed with a size limit. Responses fetched with credentials
+    are cached per credential, never shared across callers. Redirects are
+    followed up to ``max_redirects`` hops, each target is checked against the
+    allowlist again, and credentials are not sent on once a hop leaves the
+    origin of the requested URL.
+    """
+
+    def __init__(self):
+        self.max_bytes = int(os.getenv("SEMANTIC_MODEL_MAX_BYTES", str(50 * 1024 * 1024)))
+        self.cache_bytes = int(os.getenv("SEMANTIC_MODEL_CACHE_BYTES", str(512 * 1024 * 1024)))
+        self.fresh_seconds = float(os.getenv("SEMANTIC_MODEL_FRESH_SECONDS", "60"))
+        self.per_host = int(os.getenv("SEMANTIC_MODEL_PER_HOST_LIMIT", "4"))
+        self.timeout = httpx.Timeout(float(os.getenv("SEMANTIC_MODEL_TIMEOUT", "30")))
+        self.max_redirects = int(os.getenv("SEMANTIC_MODEL_MAX_REDIRECTS", "5"))
+        self._cache: OrderedDict[tuple, CachedModel] = OrderedDict()
+        self._cached_bytes = 0
+        self._inflight: dict[tuple, _Flight] = {}
+        self._hosts: dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self._client: Optional[httpx.Client] = None
+
+    def _http(self) -> httpx.Client:
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(timeout=self.timeout)
+            return self._client
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    @staticmethod
+    def check_url(url: str):
+        parsed_url = urlparse(url)
+        if parsed_url.scheme not in {"http", "https"}:
+            raise FetchError(400, "Invalid URL scheme for semantic model")
+
+        allowed_hosts_env = os.getenv("SEMANTIC_MODEL_HOST_ALLOWLIST", "")
+        allowed_hosts = [h.strip() for h in allowed_hosts_env.split(",") if h.strip()]
+        if allowed_hosts and parsed_url.hostname not in allowed_hosts:
+            raise FetchError(400, "Host not allowed for semantic model")
+
+    def fetch(self, url: str, request_headers: dict) -> CachedModel:
+        self.check_url(url)
+        headers = {h: request_headers[h] for h in FORWARDED_HEADERS if h in request_headers}
+        credential = hashlib.sha256(repr(sorted(headers.items())).encode("utf-8")).hexdigest() if headers else None
+        key = (url, credential)
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                if time.monotonic() - cached.checked_at < self.fresh_seconds and BLOBS.exists(cached.digest):
+                    return cached
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._download(url, headers, cached)
+            self._remember(key, flight.result)
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            flight.done.set()
+
+    def _download(self, url: str, headers: dict, cached: Optional[CachedModel]) -> CachedModel:
+        headers = dict(headers)
+        if cached is not None and BLOBS.exists(cached.digest):
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        origin = _origin(url)
+        try:
+            for _ in range(self.max_redirects + 1):
+                with self._host_slot(url), self._http().stream("GET", url, headers=headers) as response:
+                    if not response.has_redirect_location:
+                        return self._receive(response, cached)
+                    url = str(response.url.join(response.headers["Location"]))
+                self.check_url(url)
+                if _origin(url) != origin:
+                    headers = {name: value for name, value in headers.items() if name not in FORWARDED_HEADERS}
+            raise FetchError(502, f"Too many redirects fetching semantic model (more than {self.max_redirects})")
+        except BlobTooLarge as e:
+            raise FetchError(413, f"Semantic model exceeds {self.max_bytes} bytes") from e
+        except httpx.InvalidURL as e:
+            raise FetchError(400, f"Invalid URL for semantic model: {e}") from e
+        except httpx.HTTPError as e:
+            raise FetchError(502, f"Error fetching semantic model: {e}") from e
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).hostname or ""
+        with self._lock:
+            return self._hosts.setdefault(host, threading.BoundedSemaphore(self.per_host))
+
+    def _receive(self, response: httpx.Response, cached: Optional[CachedModel]) -> CachedModel:
+        if response.status_code == 304 and cached is not None:
+            cached.checked_at = time.monotonic()
+            return cached
+        if response.status_code >= 400:
+            detail = response.read().decode("utf-8", "replace")
+            if response.status_code < 500:
+                raise FetchError(response.status_code, f"Client error fetching semantic model: {detail}")
+            raise FetchError(502, f"Server error fetching semantic model: {detail}")
+        declared = int(response.headers.get("Content-Length") or 0)
+        if declared > self.max_bytes:
+            raise FetchError(413, f"Semantic model exceeds {self.max_bytes} bytes")
+        digest, size = BLOBS.put(response.iter_bytes(), max_bytes=self.max_bytes)
+        return CachedModel(digest, size, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+
+    def _remember(self, key: tuple, model: CachedModel):
+        with self._lock:
+            previous = self._cache.pop(key, None)
+            if previous is not None:
+                self._cached_bytes -= previous.size
+            if model.size > self.cache_bytes:
+                return
+            self._cache[key] = model
+            self._cached_bytes += model.size
+            while self._cached_bytes > self.cache_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cached_bytes -= evicted.size
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._cache), "bytes": self._cached_bytes, "inflight": len(self._inflight)}
+
+
+FETCHER = ModelFetcher()
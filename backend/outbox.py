@@ -0,0 +1,214 @@
+import json
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from catalog_store import STORE
+from catalog_triplestore import TRIPLESTORE
+from metrics import stage
+from triplestore import touched_graphs
+
+
+def _data_dir() -> str:
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.getenv("DATA_DIR", os.path.join(base_dir, "data"))
+
+
+class Outbox:
+    """
+    Write-behind queue for triple store changes.
+
+    Operations are rows in the catalog database, committed in the same
+    transaction as the catalog change they belong to, so the catalog and the
+    queue can never disagree after a crash or a failed write. A background
+    thread drains them into the triple store: consecutive operations on the
+    same graph are coalesced and each drained batch is applied atomically
+    (one SPARQL update for Fuseki). The applied position is stored alongside,
+    so anything not yet applied is replayed after a restart.
+
+    With ``STATE_MODE=shared`` several processes append to the same queue;
+    only the process holding the store's leader lock drains it, and another
+    takes over when that process exits. Every process follows the applied
+    position to notify its own listeners, which keeps per-process caches in
+    line with the triple store.
+    """
+
+    def __init__(self):
+        self.legacy_path = os.getenv("OUTBOX_PATH", os.path.join(_data_dir(), "outbox.log"))
+        self.batch_size = int(os.getenv("OUTBOX_BATCH_SIZE", "1000"))
+        self.max_backoff = float(os.getenv("OUTBOX_MAX_BACKOFF", "30"))
+        self.poll_interval = float(os.getenv("OUTBOX_POLL_INTERVAL", "0.2"))
+        self._wakeup = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._started = False
+        self._notified = False
+        self.next_seq = 1
+        self.applied_seq = 0
+        self.applied_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._listeners: list[Callable[[Optional[set[str]]], None]] = []
+
+    def on_applied(self, listener: Callable[[Optional[set[str]]], None]):
+        """
+        Call ``listener`` with the touched graph URIs after each batch reaches
+        the triple store (None if they are no longer known: any graph may have changed).
+        """
+        self._listeners.append(listener)
+
+    def open(self):
+        self._import_legacy_log()
+        state = STORE.outbox_state()
+        self.applied_seq, self.applied_at = state["applied_seq"], state["applied_at"]
+        self.next_seq = state["last_seq"] + 1
+        self._started = True
+
+    def _import_legacy_log(self):
+        # Earlier versions kept the queue in a log file with the applied
+        # sequence number next to it; move what was not applied yet.
+        offset_path = f"{self.legacy_path}.offset"
+        if not os.path.exists(self.legacy_path) or not STORE.leader.acquire():
+            return
+        applied = 0
+        if os.path.exists(offset_path):
+            with open(offset_path) as fh:
+                applied = int(fh.read().strip() or 0)
+        pending = []
+        with open(self.legacy_path, "rb") as fh:
+            for line in fh:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-append was never acknowledged.
+                    break
+                if entry.pop("seq") > applied:
+                    entry.pop("ts", None)
+                    entry.pop("more", None)
+                    pending.append(entry)
+        if pending:
+            STORE.append_outbox(pending)
+            print(f"Moved {len(pending)} pending operations from {self.legacy_path} to the catalog database")
+        for path in (self.legacy_path, offset_path):
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def start(self):
+        if not self._started:
+            self.open()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="outbox-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        with self._wakeup:
+            self._stopping.set()
+            self._wakeup.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        STORE.leader.release()
+        self._started = False
+
+    def append(self, *operations: dict):
+        """
+        Durably queue operations of the form ``{"op": ..., "graph": ..., "data": ..., "format": ...}``
+        where ``op`` is one of replace, drop, catalog_add or catalog_remove and
+        ``format`` names the serialization of ``data`` ("nt"; Turtle if absent).
+        A patch carries N-Triples ``delete`` and ``insert`` instead of ``data``.
+        Operations queued together reach the triple store in the same batch.
+        Operations that belong to a catalog change are passed to
+        ``STORE.write_datasets`` instead, followed by ``notify``.
+        """
+        with stage("outbox"):
+            STORE.append_outbox(operations)
+        self.notify()
+
+    def notify(self):
+        """Wake the worker after operations were committed."""
+        with self._wakeup:
+            self._notified = True
+            self._wakeup.notify_all()
+
+    def lag(self) -> dict:
+        state = STORE.outbox_state()
+        return {
+            "pending": state["pending"],
+            "applied_seq": state["applied_seq"],
+            "last_seq": state["last_seq"],
+            "lag_seconds": round(time.time() - state["oldest_ts"], 3) if state["oldest_ts"] is not None else 0.0,
+            "last_applied_at": state["applied_at"],
+            "last_error": self.last_error,
+            "leader": STORE.leader.held,
+        }
+
+    def drain(self) -> int:
+        """Apply one batch of pending operations and return how many were applied."""
+        batch = STORE.outbox_entries(STORE.outbox_state()["applied_seq"], limit=self.batch_size)
+        if not batch:
+            return 0
+        TRIPLESTORE.apply(coalesce(batch))
+        STORE.outbox_applied(batch[-1]["seq"])
+        self.last_error = None
+        return len(batch)
+
+    def _follow(self):
+        """Notify listeners about batches applied since the last call, by any process."""
+        state = STORE.outbox_state()
+        if state["applied_seq"] <= self.applied_seq:
+            return
+        if self._listeners:
+            if self.applied_seq < state["floor"]:
+                # Entries were pruned before this process saw them.
+                graphs = None
+            else:
+                graphs = touched_graphs(STORE.outbox_entries(self.applied_seq, upto=state["applied_seq"]))
+            for listener in self._listeners:
+                listener(graphs)
+        self.applied_seq, self.applied_at = state["applied_seq"], state["applied_at"]
+
+    def _run(self):
+        backoff = 0.5
+        while not self._stopping.is_set():
+            delay = self.poll_interval
+            with self._wakeup:
+                self._notified = False
+            try:
+                if STORE.leader.acquire() and self.drain():
+                    delay = 0
+                backoff = 0.5
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Warning: Failed to sync outbox to the triple store, retrying in {backoff}s: {e}")
+                delay = backoff
+                backoff = min(backoff * 2, self.max_backoff)
+            try:
+                self._follow()
+            except Exception as e:
+                print(f"Warning: Failed to read the outbox position: {e}")
+            if delay:
+                with self._wakeup:
+                    if not self._stopping.is_set() and not self._notified:
+                        self._wakeup.wait(delay)
+
+
+def coalesce(batch: list[dict]) -> list[dict]:
+    """
+    Keep only the last replace or drop per graph (and the last operation per
+    catalog membership), since those fully determine the resulting state.
+    Patches depend on the state before them, so they are kept in order after
+    the operation they build on.
+    """
+    merged: dict = {}
+    for entry in batch:
+        kind = "catalog" if entry["op"].startswith("catalog_") else "graph"
+        key = (kind, entry["graph"])
+        if entry["op"] == "patch" and key in merged:
+            merged[key].append(entry)
+            continue
+        merged.pop(key, None)
+        merged[key] = [entry]
+    return [entry for entries in merged.values() for entry in entries]
+
+
+OUTBOX = Outbox()
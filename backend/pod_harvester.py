@@ -0,0 +1,346 @@
+import asyncio
+import hashlib
+import os
+import time
+import uuid
+from datetime import datetime
+from functools import partial
+from typing import Awaitable, Callable, Optional
+from urllib.parse import urlparse
+
+import httpx
+from rdflib import Graph, Literal, URIRef
+from rdflib.namespace import DCAT, DCTERMS, FOAF, RDF, Namespace
+
+from triplestore import VCARD
+from worker_pool import POOL
+
+
+LDP = Namespace("http://www.w3.org/ns/ldp#")
+SDP = Namespace("https://w3id.org/solid-dcat-profile#")
+CATALOG_DOC = "catalog/cat.ttl"
+LEGACY_DCAT_CONFORMS_TO = URIRef("http://www.w3.org/ns/dcat#conformsTo")
+ACCEPT = "text/turtle, application/ld+json;q=0.9, application/n-triples;q=0.8"
+RDF_FORMATS = {
+    "text/turtle": "turtle",
+    "application/ld+json": "json-ld",
+    "application/n-triples": "nt",
+    "application/rdf+xml": "xml",
+}
+
+
+def _split(value: str) -> list[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def pod_root(webid: str) -> str:
+    """The pod root of a WebID, e.g. https://pod.example/alice/ for .../alice/profile/card#me."""
+    url = urlparse(webid)
+    segments = [s for s in url.path.split("/") if s]
+    if "profile" in segments:
+        segments = segments[: segments.index("profile")]
+    base_path = f"/{'/'.join(segments)}/" if segments else "/"
+    return f"{url.scheme}://{url.netloc}{base_path}"
+
+
+def _text(graph: Graph, subject, predicate) -> str:
+    value = graph.value(subject, predicate)
+    return str(value) if isinstance(value, Literal) else ""
+
+
+def _iri(graph: Graph, subject, predicate) -> str:
+    value = graph.value(subject, predicate)
+    return str(value) if isinstance(value, URIRef) else ""
+
+
+def _strip_mailto(value: str) -> str:
+    return value.removeprefix("mailto:")
+
+
+def _datetime(graph: Graph, subject, predicate):
+    value = graph.value(subject, predicate)
+    value = value.toPython() if isinstance(value, Literal) else None
+    return value if isinstance(value, datetime) else None
+
+
+def pod_dataset_record(graph: Graph, dataset_url: str) -> Optional[dict]:
+    """
+    Map a dataset document from a pod to a catalog record, following the
+    lookups of parseDatasetFromDoc in the frontend's solidCatalog.js.
+    """
+    subject = URIRef(dataset_url)
+    if (subject, None, None) not in graph:
+        fallback = URIRef(f"{dataset_url.split('#')[0]}#it")
+        if (fallback, None, None) in graph:
+            subject = fallback
+        else:
+            subject = next(iter(sorted(graph.subjects(RDF.type, DCAT.Dataset))), None) or next(
+                iter(sorted(graph.subjects(RDF.type, DCAT.DatasetSeries))), None
+            )
+    if subject is None:
+        return None
+
+    publisher = _text(graph, subject, DCTERMS.publisher)
+    publisher_ref = graph.value(subject, DCTERMS.publisher)
+    if not publisher and publisher_ref is not None:
+        publisher = (
+            _text(graph, publisher_ref, FOAF.name)
+            or _text(graph, publisher_ref, VCARD.fn)
+            or _text(graph, publisher_ref, DCTERMS.title)
+        )
+
+    contact = _strip_mailto(_text(graph, subject, DCAT.contactPoint))
+    contact_ref = graph.value(subject, DCAT.contactPoint)
+    if not contact and isinstance(contact_ref, URIRef):
+        for predicate in (VCARD.hasEmail, VCARD.value, FOAF.mbox):
+            mailto = graph.value(contact_ref, predicate)
+            if mailto is not None:
+                contact = _strip_mailto(str(mailto))
+                break
+        else:
+            contact = _text(graph, contact_ref, VCARD.fn)
+
+    access_url = ""
+    file_format = ""
+    access_type = "download"
+    for distribution in sorted(graph.objects(subject, DCAT.distribution)):
+        download_url = _iri(graph, distribution, DCAT.downloadURL)
+        link = download_url or _iri(graph, distribution, DCAT.accessURL)
+        if not link:
+            continue
+        access_url = link
+        file_format = _text(graph, distribution, DCAT.mediaType) or _text(graph, distribution, DCTERMS.format)
+        access_type = "download" if download_url else "access"
+        break
+
+    theme = graph.value(subject, DCAT.theme)
+    return {
+        "identifier": _text(graph, subject, DCTERMS.identifier) or str(uuid.uuid5(uuid.NAMESPACE_URL, dataset_url)),
+        "title": _text(graph, subject, DCTERMS.title) or "Untitled dataset",
+        "description": _text(graph, subject, DCTERMS.description),
+        "issued": _datetime(graph, subject, DCTERMS.issued),
+        "modified": _datetime(graph, subject, DCTERMS.modified),
+        "publisher": publisher,
+        "contact_point": contact,
+        "is_public": _text(graph, subject, DCTERMS.accessRights).lower() == "public",
+        "access_url_dataset": access_url or None,
+        "distribution_access_type": access_type,
+        "access_url_semantic_model": _iri(graph, subject, DCTERMS.conformsTo)
+        or _iri(graph, subject, LEGACY_DCAT_CONFORMS_TO)
+        or None,
+        "file_format": file_format or None,
+        "theme": str(theme) if theme is not None else None,
+        "webid": _iri(graph, subject, DCTERMS.creator) or None,
+        "dataset_url": dataset_url,
+    }
+
+
+def _contained(graph: Graph, url: str) -> list[str]:
+    return sorted(str(o) for o in graph.objects(URIRef(url), LDP.contains))
+
+
+def _members(graph: Graph, url: str) -> list[str]:
+    return sorted(str(o) for o in graph.objects(None, FOAF.member) if isinstance(o, URIRef))
+
+
+def _catalog_link(graph: Graph, webid: str) -> Optional[str]:
+    return _iri(graph, URIRef(webid), SDP.catalog) or _iri(graph, URIRef(webid), DCAT.catalog) or None
+
+
+def _dataset_links(graph: Graph, catalog_url: str) -> list[str]:
+    return sorted({str(o) for o in graph.objects(URIRef(catalog_url), DCAT.dataset) if isinstance(o, URIRef)})
+
+
+PARSERS = {
+    "container": _contained,
+    "members": _members,
+    "profile": _catalog_link,
+    "catalog": _dataset_links,
+    "dataset": pod_dataset_record,
+}
+
+
+def parse_document(kind: str, body: bytes, url: str, content_type: str):
+    graph = Graph()
+    graph.parse(data=body, format=RDF_FORMATS.get(content_type, "turtle"), publicID=url.split("#")[0])
+    return PARSERS[kind](graph, url)
+
+
+class CachedDocument:
+    def __init__(self, etag: Optional[str], last_modified: Optional[str], digest: str, parsed):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.digest = digest
+        self.parsed = parsed
+
+
+class PodHarvester:
+    """
+    Crawls Solid pods the way the frontend's loadAggregatedDatasets does:
+    registry containers -> member WebIDs -> catalog (sdp:catalog, or
+    catalog/cat.ttl) -> dcat:dataset documents. Requests are limited per host,
+    documents are revalidated with conditional GETs and only re-parsed (in the
+    worker pool) when their content changed. A harvest returns the records of
+    every catalog, or None for catalogs that could not be read.
+    """
+
+    def __init__(self):
+        self.registries = _split(os.getenv("HARVEST_REGISTRIES", ""))
+        self.webids = _split(os.getenv("HARVEST_WEBIDS", ""))
+        self.interval = float(os.getenv("HARVEST_INTERVAL", "300"))
+        self.per_host = int(os.getenv("HARVEST_PER_HOST_LIMIT", "4"))
+        self.timeout = httpx.Timeout(float(os.getenv("HARVEST_TIMEOUT", "10")))
+        self._documents: dict[tuple[str, str], CachedDocument] = {}
+        self._hosts: dict[str, asyncio.Semaphore] = {}
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self.counters = {"fetched": 0, "not_modified": 0, "unchanged": 0, "parsed": 0, "failed": 0}
+        self.last_started: Optional[float] = None
+        self.last_finished: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.catalogs = 0
+        self.datasets = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.registries or self.webids)
+
+    async def _get(self, client: httpx.AsyncClient, kind: str, url: str):
+        key = (kind, url)
+        cached = self._documents.get(key)
+        headers = {"Accept": ACCEPT}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        host = urlparse(url).netloc
+        slots = self._hosts.setdefault(host, asyncio.Semaphore(self.per_host))
+        try:
+            async with slots:
+                response = await client.get(url.split("#")[0], headers=headers)
+            if response.status_code == 304 and cached is not None:
+                self.counters["not_modified"] += 1
+                return cached.parsed
+            response.raise_for_status()
+        except httpx.HTTPError:
+            self.counters["failed"] += 1
+            raise
+        self.counters["fetched"] += 1
+
+        digest = hashlib.sha256(response.content).hexdigest()
+        if cached is not None and cached.digest == digest:
+            self.counters["unchanged"] += 1
+            parsed = cached.parsed
+        else:
+            content_type = response.headers.get("content-type", "text/turtle").split(";")[0].strip()
+            try:
+                parsed = await asyncio.get_running_loop().run_in_executor(
+                    None, partial(POOL.run, parse_document, kind, response.content, url, content_type, block=True)
+                )
+            except Exception:
+                self.counters["failed"] += 1
+                raise
+            self.counters["parsed"] += 1
+        self._documents[key] = CachedDocument(
+            response.headers.get("ETag"), response.headers.get("Last-Modified"), digest, parsed
+        )
+        return parsed
+
+    async def _catalog_url(self, client: httpx.AsyncClient, webid: str) -> str:
+        try:
+            linked = await self._get(client, "profile", webid)
+        except Exception as e:
+            print(f"Warning: Could not read profile {webid}: {e}")
+            linked = None
+        return linked or f"{pod_root(webid)}{CATALOG_DOC}#it"
+
+    async def _harvest_catalog(self, client: httpx.AsyncClient, catalog_url: str) -> Optional[list[dict]]:
+        try:
+            dataset_urls = await self._get(client, "catalog", catalog_url)
+        except Exception as e:
+            print(f"Warning: Could not read catalog {catalog_url}: {e}")
+            return None
+        documents = await asyncio.gather(
+            *(self._get(client, "dataset", url) for url in dataset_urls), return_exceptions=True
+        )
+        records = []
+        for url, record in zip(dataset_urls, documents):
+            if isinstance(record, Exception):
+                print(f"Warning: Could not read dataset {url}: {record}")
+            elif record is not None:
+                records.append(record)
+        return records
+
+    async def harvest(self) -> dict[str, Optional[list[dict]]]:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            self.last_started = time.time()
+            async with httpx.AsyncClient(timeout=self.timeout, follow_redirects=True) as client:
+                members = set(self.webids)
+                containers = await asyncio.gather(
+                    *(self._get(client, "container", url) for url in self.registries), return_exceptions=True
+                )
+                entries = [url for result in containers if not isinstance(result, Exception) for url in result]
+                listed = await asyncio.gather(
+                    *(self._get(client, "members", url) for url in entries), return_exceptions=True
+                )
+                for result in listed:
+                    if not isinstance(result, Exception):
+                        members.update(result)
+
+                catalog_urls = sorted(
+                    set(await asyncio.gather(*(self._catalog_url(client, webid) for webid in sorted(members))))
+                )
+                harvested = await asyncio.gather(*(self._harvest_catalog(client, url) for url in catalog_urls))
+
+            results = dict(zip(catalog_urls, harvested))
+            self.catalogs = len(results)
+            self.datasets = sum(len(records) for records in results.values() if records)
+            self.last_finished = time.time()
+            return results
+
+    async def _run(self, apply: Callable[[dict], Awaitable], when: Optional[Callable[[], bool]]):
+        while True:
+            try:
+                if when is None or when():
+                    await apply(await self.harvest())
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Warning: Pod harvest failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self, apply: Callable[[dict], Awaitable], when: Optional[Callable[[], bool]] = None):
+        """Harvest every ``interval`` seconds, skipping rounds in which ``when`` returns False."""
+        if self.enabled and self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run(apply, when))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "registries": self.registries,
+            "webids": self.webids,
+            "interval": self.interval,
+            "last_started": self.last_started,
+            "last_finished": self.last_finished,
+            "last_error": self.last_error,
+            "catalogs": self.catalogs,
+            "datasets": self.datasets,
+            "documents": dict(self.counters),
+            "cached_documents": len(self._documents),
+        }
+
+
+HARVESTER = PodHarvester()
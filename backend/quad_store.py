@@ -0,0 +1,295 @@
+import asyncio
+import os
+import sqlite3
+import threading
+from typing import AsyncIterator, Optional
+from urllib.parse import quote
+
+from rdflib import Dataset, Graph, URIRef, Variable
+from rdflib.graph import DATASET_DEFAULT_GRAPH_ID
+from rdflib.namespace import DCAT
+from rdflib.plugins.sparql.algebra import translateQuery
+from rdflib.plugins.sparql.evaluate import evalPart
+from rdflib.plugins.sparql.parser import parseQuery
+from rdflib.plugins.sparql.processor import SPARQLProcessor
+from rdflib.plugins.sparql.sparql import QueryContext
+
+from triplestore import _catalog_uri, _ntriples
+from triplestore_backend import QueryStream, TriplestoreBackend
+from triplestore_client import TriplestoreError
+
+
+RESULT_FORMATS = {
+    "application/sparql-results+json": "json",
+    "application/json": "json",
+    "application/sparql-results+xml": "xml",
+    "text/csv": "csv",
+}
+RDF_FORMATS = {
+    "text/turtle": "turtle",
+    "application/n-triples": "nt",
+    "application/ld+json": "json-ld",
+    "application/rdf+xml": "xml",
+    "application/n-quads": "nquads",
+    "application/trig": "trig",
+}
+CONTENT_FORMATS = {**RDF_FORMATS, "text/plain": "nt"}
+DEFAULT_GRAPH = str(DATASET_DEFAULT_GRAPH_ID)
+LINE_FORMATS = {"application/n-quads", "application/n-triples"}
+EXPORT_BATCH_ROWS = 2000
+
+
+def _db_path() -> str:
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    data_dir = os.getenv("DATA_DIR", os.path.join(base_dir, "data"))
+    return os.getenv("QUADSTORE_PATH", os.path.join(data_dir, "quads.db"))
+
+
+def _negotiate(accept: str, formats: dict, default: str) -> str:
+    for part in accept.split(","):
+        media_type = part.split(";")[0].strip().lower()
+        if media_type in formats:
+            return media_type
+    return default
+
+
+def _triple_lines(ntriples: str) -> list[str]:
+    # Lines are stored as given, so only canonical N-Triples (as serialized by rdflib) belong here.
+    return [line for line in (line.strip() for line in ntriples.splitlines()) if line and not line.startswith("#")]
+
+
+def _graph(lines: list[str]) -> Graph:
+    graph = Graph()
+    if lines:
+        graph.parse(data="\n".join(lines), format="nt")
+    return graph
+
+
+class _StoreQueryContext(QueryContext):
+    """
+    Evaluates like Fuseki instead of following rdflib's process-wide SPARQL_LOAD_GRAPHS
+    and SPARQL_DEFAULT_GRAPH_UNION defaults: FROM <iri> selects a stored graph
+    instead of fetching the IRI, and the default graph is not the union of the
+    named graphs.
+    """
+
+    def __init__(self, graph: Dataset, initBindings=None, datasetClause=None):
+        super().__init__(graph, initBindings=initBindings, datasetClause=datasetClause)
+        if not datasetClause:
+            self.graph = graph.default_context
+
+    def load(self, source, default: bool = False, into=None, **kwargs):
+        if default:
+            self.graph += self.dataset.get_context(source)
+
+
+class _StoreProcessor(SPARQLProcessor):
+    def query(self, strOrQuery, initBindings=None, initNs=None, base=None, DEBUG=False):
+        if isinstance(strOrQuery, str):
+            strOrQuery = translateQuery(parseQuery(strOrQuery), base, initNs)
+        bindings = {Variable(key): value for key, value in (initBindings or {}).items()}
+        context = _StoreQueryContext(self.graph, bindings, strOrQuery.algebra.datasetClause)
+        context.prologue = strOrQuery.prologue
+        return evalPart(context, strOrQuery.algebra)
+
+
+class QuadStore(TriplestoreBackend):
+    """
+    Embedded quad store for single-node deployments. Named graphs are persisted
+    in SQLite (WAL mode) with one row per graph and N-Triples line, and an
+    applied batch is one SQLite transaction. SPARQL queries run on an rdflib
+    Dataset that is built on first use; writes only queue their changes, which
+    the next read replays, so a write never pays for parsing into rdflib.
+
+    Queries and writes take turns on one lock. A query that runs into its
+    timeout is answered with an error but keeps the lock until rdflib is done.
+    When several processes share the file, a commit by another process makes
+    the next read rebuild the Dataset.
+    """
+
+    name = "embedded"
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or _db_path()
+        self.synchronous = os.getenv("QUADSTORE_SYNCHRONOUS", "NORMAL")
+        self.max_pending = int(os.getenv("QUADSTORE_MAX_PENDING", "10000"))
+        self._conn: Optional[sqlite3.Connection] = None
+        self._dataset: Optional[Dataset] = None
+        self._pending: list[tuple[str, bool, list[str], list[str]]] = []
+        self._data_version: Optional[int] = None
+        self._lock = threading.RLock()
+
+    def open(self):
+        with self._lock:
+            if self._conn is not None:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(f"PRAGMA synchronous={self.synchronous}")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS quads "
+                "(graph TEXT NOT NULL, triple TEXT NOT NULL, PRIMARY KEY (graph, triple)) WITHOUT ROWID"
+            )
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._dataset = None
+            self._pending = []
+
+    def _current(self) -> Dataset:
+        """The rdflib view of the store, brought up to date; call with the lock held."""
+        # data_version only changes with commits from other connections.
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self._data_version:
+            self._dataset, self._data_version = None, data_version
+        if self._dataset is None:
+            dataset = Dataset()
+            current, lines = None, []
+            for graph_uri, line in self._conn.execute("SELECT graph, triple FROM quads ORDER BY graph"):
+                if graph_uri != current:
+                    if lines:
+                        dataset.graph(URIRef(current)).parse(data="\n".join(lines), format="nt")
+                    current, lines = graph_uri, []
+                lines.append(line)
+            if lines:
+                dataset.graph(URIRef(current)).parse(data="\n".join(lines), format="nt")
+            self._dataset, self._pending = dataset, []
+
+        for graph_uri, clear, added, removed in self._pending:
+            if clear:
+                self._dataset.remove_graph(URIRef(graph_uri))
+            context = self._dataset.graph(URIRef(graph_uri))
+            for triple in _graph(removed):
+                context.remove(triple)
+            context += _graph(added)
+        self._pending = []
+        return self._dataset
+
+    def apply(self, operations: list[dict]):
+        catalog_uri = _catalog_uri()
+        changes = []
+        for operation in operations:
+            kind, graph_uri = operation["op"], operation["graph"]
+            if kind == "replace":
+                changes.append((graph_uri, True, _triple_lines(_ntriples(operation)), []))
+            elif kind == "drop":
+                changes.append((graph_uri, True, [], []))
+            elif kind == "patch":
+                inserted, deleted = _triple_lines(operation["insert"]), _triple_lines(operation["delete"])
+                changes.append((graph_uri, False, inserted, deleted))
+            elif kind in {"catalog_add", "catalog_remove"}:
+                line = f"<{catalog_uri}> <{DCAT.dataset}> <{graph_uri}> ."
+                added, removed = ([line], []) if kind == "catalog_add" else ([], [line])
+                changes.append((catalog_uri, False, added, removed))
+            else:
+                raise ValueError(f"Unknown outbox operation: {kind}")
+        self._write(changes)
+
+    def store_graph(self, graph_uri: Optional[str], data: bytes, content_type: str = "text/turtle"):
+        media_type = content_type.split(";")[0].strip().lower()
+        graph = Graph()
+        try:
+            graph.parse(data=data, format=CONTENT_FORMATS.get(media_type, media_type))
+        except Exception as e:
+            raise TriplestoreError(f"Insert failed: {e}", 400) from e
+        self._write([(graph_uri or DEFAULT_GRAPH, False, _triple_lines(graph.serialize(format="nt")), [])])
+
+    def _write(self, changes: list[tuple[str, bool, list[str], list[str]]]):
+        """Apply (graph, clear first, lines to add, lines to remove) changes in one transaction."""
+        self.open()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for graph_uri, clear, added, removed in changes:
+                    if clear:
+                        self._conn.execute("DELETE FROM quads WHERE graph = ?", (graph_uri,))
+                    self._conn.executemany(
+                        "DELETE FROM quads WHERE graph = ? AND triple = ?", [(graph_uri, line) for line in removed]
+                    )
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO quads (graph, triple) VALUES (?, ?)",
+                        [(graph_uri, line) for line in added],
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+            if self._dataset is not None:
+                self._pending.extend(changes)
+                # Past this point rebuilding from SQLite is cheaper than replaying.
+                if len(self._pending) > self.max_pending:
+                    self._dataset, self._pending = None, []
+
+    def query(self, query: str, accept: str) -> tuple[bytes, str]:
+        self.open()
+        with self._lock:
+            try:
+                dataset = self._current()
+                result = dataset.query(query, processor=_StoreProcessor(dataset))
+                if result.type in {"CONSTRUCT", "DESCRIBE"}:
+                    media_type = _negotiate(accept, RDF_FORMATS, "text/turtle")
+                    return result.serialize(format=RDF_FORMATS[media_type]), media_type
+                media_type = _negotiate(accept, RESULT_FORMATS, "application/sparql-results+json")
+                return result.serialize(format=RESULT_FORMATS[media_type]), media_type
+            except Exception as e:
+                raise TriplestoreError(f"SPARQL query failed: {e}", 400) from e
+
+    def export(self, media_type: str) -> tuple[bytes, str]:
+        self.open()
+        if media_type in LINE_FORMATS:
+            conn, rows = self._export_rows(media_type == "application/n-quads")
+            try:
+                return b"".join(iter(lambda: self._export_batch(rows), b"")), media_type
+            finally:
+                conn.close()
+
+        merged = Graph()
+        with self._lock:
+            for context in self._current().graphs():
+                if str(context.identifier) != DEFAULT_GRAPH:
+                    merged += context
+        return merged.serialize(format=RDF_FORMATS.get(media_type, "turtle"), encoding="utf-8"), media_type
+
+    async def aexport(self, media_type: str) -> QueryStream:
+        """N-Quads and N-Triples are read from SQLite batch by batch as the body is sent."""
+        if media_type not in LINE_FORMATS:
+            return await super().aexport(media_type)
+        self.open()
+        conn, rows = await asyncio.to_thread(self._export_rows, media_type == "application/n-quads")
+
+        async def chunks() -> AsyncIterator[bytes]:
+            while True:
+                chunk = await asyncio.to_thread(self._export_batch, rows)
+                if not chunk:
+                    return
+                yield chunk
+
+        async def close():
+            await asyncio.to_thread(conn.close)
+
+        return QueryStream(media_type, chunks(), close)
+
+    def _export_rows(self, quads: bool) -> tuple[sqlite3.Connection, sqlite3.Cursor]:
+        # Stored lines are N-Triples already; a separate read-only connection
+        # reads a WAL snapshot without holding up writers.
+        conn = sqlite3.connect(
+            f"file:{quote(os.path.abspath(self.path))}?mode=ro", uri=True, check_same_thread=False
+        )
+        if quads:
+            return conn, conn.execute("SELECT graph, triple FROM quads")
+        return conn, conn.execute("SELECT DISTINCT triple FROM quads WHERE graph != ?", (DEFAULT_GRAPH,))
+
+    @staticmethod
+    def _export_batch(rows: sqlite3.Cursor) -> bytes:
+        """The next lines of an export cursor, or b"" once it is exhausted."""
+        batch = rows.fetchmany(EXPORT_BATCH_ROWS)
+        if batch and len(batch[0]) == 1:
+            return "".join(f"{line}\n" for (line,) in batch).encode("utf-8")
+        return "".join(
+            f"{line}\n" if graph == DEFAULT_GRAPH else f"{line[:-1].rstrip()} <{graph}> .\n" for graph, line in batch
+        ).encode("utf-8")
@@ -0,0 +1,94 @@
+import gzip
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """
+    Whether an Accept-Encoding header prefers gzip over an uncompressed body:
+    gzip (or ``*``) needs a non-zero q-value at least as high as identity's.
+    """
+    qualities = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+    wildcard = qualities.get("*")
+    gzip_quality = qualities.get("gzip", qualities.get("x-gzip", wildcard or 0.0))
+    identity_quality = qualities.get("identity", 1.0 if wildcard is None else max(wildcard, 0.001))
+    return gzip_quality > 0 and gzip_quality >= identity_quality
+
+
+class CachedBody:
+    def __init__(self, body: bytes, headers: dict, gzip_min_bytes: int):
+        self.body = body
+        self.headers = headers
+        self.gzipped: Optional[bytes] = None
+        if len(body) >= gzip_min_bytes:
+            self.gzipped = gzip.compress(body, compresslevel=6, mtime=0)
+
+
+class ResponseCache:
+    """
+    LRU of serialized JSON response bodies for the polled read endpoints.
+    Entries are keyed by the request (path and normalized query) together with
+    the catalog version they were rendered at, so a mutation makes every
+    older entry unreachable; the first write at a newer version drops them.
+    Bodies above ``gzip_min_bytes`` are compressed once, when they are stored.
+    """
+
+    def __init__(self):
+        self.max_entries = int(os.getenv("RESPONSE_CACHE_ENTRIES", "256"))
+        self.gzip_min_bytes = int(os.getenv("RESPONSE_GZIP_MIN_BYTES", "1024"))
+        self.version: Optional[str] = None
+        self._entries: OrderedDict[tuple, CachedBody] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, version: str, key: tuple) -> Optional[CachedBody]:
+        with self._lock:
+            entry = self._entries.get((version, key))
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((version, key))
+            self.hits += 1
+            return entry
+
+    def put(self, version: str, key: tuple, body: bytes, headers: dict) -> CachedBody:
+        entry = CachedBody(body, headers, self.gzip_min_bytes)
+        if self.max_entries <= 0:
+            return entry
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+            self._entries[(version, key)] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": sum(len(e.body) + len(e.gzipped or b"") for e in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+RESPONSES = ResponseCache()
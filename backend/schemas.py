@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+import uuid
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional, List
 from datetime import datetime
 
@@ -15,16 +16,34 @@ class DatasetBase(BaseModel):
     file_format: Optional[str] = None 
     theme: Optional[str] = None 
     semantic_model_file_name: Optional[str] = None 
+    semantic_model_digest: Optional[str] = None
     webid: Optional[str] = None
+    shape_version: Optional[str] = None
 
 class DatasetCreate(DatasetBase):
     publisher: str
     contact_point: str
-    semantic_model_file: Optional[bytes] = None 
     catalog_id: Optional[int] = None
     class Config:
         from_attributes = True
 
+# Set by the server when a semantic model file is uploaded, never by clients.
+SERVER_MANAGED_FIELDS = ("semantic_model_file_name", "semantic_model_digest")
+
+class DatasetImport(DatasetCreate):
+    identifier: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    issued: datetime
+    modified: datetime
+
+    @model_validator(mode="before")
+    @classmethod
+    def reject_server_managed_fields(cls, data):
+        if isinstance(data, dict):
+            for name in SERVER_MANAGED_FIELDS:
+                if name in data:
+                    raise ValueError(f"{name} is set by uploading the model with PUT")
+        return data
+
 class DatasetUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
@@ -38,7 +57,7 @@ class DatasetUpdate(BaseModel):
     file_format: Optional[str] = None
     theme: Optional[str] = None
     semantic_model_file_name: Optional[str] = None
-    semantic_model_file: Optional[bytes] = None
+    semantic_model_digest: Optional[str] = None
     class Config:
         from_attributes = True
 
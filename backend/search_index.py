@@ -0,0 +1,187 @@
+import heapq
+import math
+import re
+import threading
+from array import array
+from collections import Counter
+from functools import lru_cache
+from typing import Callable, Iterable, Optional
+
+
+SEARCH_FIELDS = {
+    "title": 3,
+    "description": 1,
+    "theme": 1,
+    "publisher": 2,
+    "file_format": 1,
+}
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "de", "for", "from", "http", "https", "in", "is", "it",
+    "of", "on", "or", "org", "the", "to", "with", "www",
+}
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_SUFFIXES = ("ational", "ization", "fulness", "ousness", "iveness", "ations", "ation", "ments", "ment",
+             "ness", "ings", "ing", "ies", "ied", "ers", "er", "ed", "ly", "es", "s")
+
+
+@lru_cache(maxsize=65536)
+def stem(token: str) -> str:
+    """Light suffix-stripping stemmer; good enough to conflate plurals and verb forms."""
+    if len(token) <= 3 or token.isdigit():
+        return token
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            token = token[: -len(suffix)]
+            if suffix in {"ies", "ied"}:
+                token += "y"
+            break
+    return token
+
+
+def tokenize(text: str) -> list[str]:
+    return [stem(token) for token in _TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+class SearchIndex:
+    """
+    Incrementally maintained inverted index with BM25 ranking.
+
+    Postings are parallel ``array`` objects of document numbers and term
+    frequencies. Removing a document only drops its number from the document
+    table; its postings go stale and are skipped at query time. Each term's
+    postings are purged on their own once stale entries make up
+    ``compact_ratio`` of them, so no write ever rebuilds the whole index.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, compact_ratio: float = 0.25):
+        self.k1 = k1
+        self.b = b
+        self.compact_ratio = compact_ratio
+        self._docs: dict[str, int] = {}
+        self._identifiers: dict[int, str] = {}
+        self._lengths: dict[int, int] = {}
+        self._next_doc = 0
+        self._postings: dict[str, tuple[array, array]] = {}
+        self._df: Counter = Counter()
+        self._stale: Counter = Counter()
+        self._total_length = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, identifier: str) -> bool:
+        return identifier in self._docs
+
+    def _terms(self, record: dict) -> Counter:
+        counts: Counter = Counter()
+        for field, weight in SEARCH_FIELDS.items():
+            value = record.get(field)
+            if value:
+                for token in tokenize(str(value)):
+                    counts[token] += weight
+        return counts
+
+    def add(self, identifier: str, record: dict):
+        with self._lock:
+            self.remove(identifier)
+            counts = self._terms(record)
+            doc = self._next_doc
+            self._next_doc += 1
+            self._identifiers[doc] = identifier
+            length = sum(counts.values())
+            self._lengths[doc] = length
+            self._total_length += length
+            self._docs[identifier] = doc
+            for term, tf in counts.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = (array("I"), array("I"))
+                postings[0].append(doc)
+                postings[1].append(tf)
+                self._df[term] += 1
+
+    def backfill(self, items: Iterable[tuple[str, dict]], current: Callable[[str], Optional[dict]]):
+        """
+        Index records loaded at startup while writes keep arriving: a record is
+        only added if it is not indexed yet and ``current`` still returns it.
+        """
+        for identifier, record in items:
+            with self._lock:
+                if identifier not in self._docs and current(identifier) is record:
+                    self.add(identifier, record)
+
+    def remove(self, identifier: str, record: Optional[dict] = None):
+        """
+        Drop a document. Passing the record it was indexed with keeps document
+        frequencies exact and purges its terms' postings as they go stale;
+        otherwise both happen when a search next reads those postings.
+        """
+        with self._lock:
+            doc = self._docs.pop(identifier, None)
+            if doc is None:
+                return
+            del self._identifiers[doc]
+            self._total_length -= self._lengths.pop(doc)
+            if record is not None:
+                for term in self._terms(record):
+                    postings = self._postings.get(term)
+                    if postings is None:
+                        continue
+                    self._df[term] -= 1
+                    self._stale[term] += 1
+                    if self._stale[term] > self.compact_ratio * len(postings[0]):
+                        self._purge(term)
+
+    def _purge(self, term: str):
+        """Rewrite one term's postings without the documents that were removed."""
+        docs, tfs = self._postings[term]
+        identifiers = self._identifiers
+        new_docs, new_tfs = array("I"), array("I")
+        for doc, tf in zip(docs, tfs):
+            if doc in identifiers:
+                new_docs.append(doc)
+                new_tfs.append(tf)
+        self._stale.pop(term, None)
+        if new_docs:
+            self._postings[term] = (new_docs, new_tfs)
+            self._df[term] = len(new_docs)
+        else:
+            del self._postings[term]
+            self._df.pop(term, None)
+
+    def search(self, query: str, limit: int = 10, offset: int = 0) -> list[tuple[str, float]]:
+        terms = set(tokenize(query))
+        with self._lock:
+            n_docs = len(self._docs)
+            if not terms or not n_docs:
+                return []
+            avg_length = self._total_length / n_docs or 1.0
+            k1, b = self.k1, self.b
+            lengths = self._lengths.get
+            base, slope = k1 * (1 - b), k1 * b / avg_length
+            scores: dict[int, float] = {}
+            get = scores.get
+            for term in terms:
+                postings = self._postings.get(term)
+                if postings is None:
+                    continue
+                df = self._df[term]
+                weight = math.log(1 + (n_docs - df + 0.5) / (df + 0.5)) * (k1 + 1)
+                stale = 0
+                for doc, tf in zip(*postings):
+                    length = lengths(doc)
+                    if length is None:
+                        stale += 1
+                    else:
+                        scores[doc] = get(doc, 0.0) + weight * tf / (tf + base + slope * length)
+                if stale > self.compact_ratio * len(postings[0]):
+                    self._purge(term)
+
+            best = heapq.nlargest(offset + limit, scores.items(), key=lambda item: item[1])
+            return [(self._identifiers[doc], round(score, 4)) for doc, score in best[offset:]]
+
+
+SEARCH_INDEX = SearchIndex()
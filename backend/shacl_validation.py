@@ -1,25 +1,207 @@
+import hashlib
 import os
+import threading
+import time
+from typing import Optional
+
 from rdflib import Graph
+from rdflib.namespace import SH
 from pyshacl import validate
 
+from shape_compiler import CompiledShapes, UnsupportedShape
+
+
+SHAPE_SUFFIX = "-shape.ttl"
+DEFAULT_PROFILE = os.getenv("SHACL_DEFAULT_PROFILE", "sdcat")
+RELOAD_INTERVAL = float(os.getenv("SHACL_RELOAD_INTERVAL", "2"))
+# "on" uses the compiled checks where possible, "off" always runs pyshacl and
+# "differential" runs both, logs disagreements and answers with pyshacl.
+FAST_PATH = os.getenv("SHACL_FAST_PATH", "on")
 
-def _shape_path() -> str:
+
+def _shapes_dir() -> str:
     base_dir = os.path.dirname(os.path.abspath(__file__))
-    return os.path.join(base_dir, "shapes", "sdcat-shape.ttl")
+    return os.getenv("SHACL_SHAPES_DIR", os.path.join(base_dir, "shapes"))
 
 
-def validate_turtle(ttl_data: str) -> tuple[bool, str]:
-    data_graph = Graph()
-    data_graph.parse(data=ttl_data, format="turtle")
+class ShapeProfile:
+    def __init__(self, name: str, path: str):
+        self.name = name
+        self.path = path
+        with open(path, "rb") as fh:
+            raw = fh.read()
+        self.mtime = os.stat(path).st_mtime_ns
+        self.version = hashlib.sha256(raw).hexdigest()[:12]
+        self.graph = Graph()
+        self.graph.parse(data=raw, format="turtle")
+        try:
+            self.compiled: Optional[CompiledShapes] = CompiledShapes(self.graph)
+        except UnsupportedShape as e:
+            print(f"Warning: Shape profile {name} uses {e}, validating it with pyshacl only")
+            self.compiled = None
+        # pyshacl adds a couple of system triples to the shapes graph on first
+        # use; do that once up front so concurrent validations only read it.
+        validate(data_graph=Graph(), shacl_graph=self.graph, inference="none", debug=False)
+
+
+class ShapeRegistry:
+    """
+    Keeps every ``<name>-shape.ttl`` file from the shapes directory parsed in
+    memory and re-reads a profile once its file changes on disk.
+    """
+
+    def __init__(self, shapes_dir: Optional[str] = None):
+        self.shapes_dir = shapes_dir or _shapes_dir()
+        self._profiles: dict[str, ShapeProfile] = {}
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+
+    def load(self):
+        with self._lock:
+            self._scan()
+            self._last_check = time.monotonic()
+
+    def _scan(self):
+        profiles = {}
+        for entry in sorted(os.listdir(self.shapes_dir)):
+            if not entry.endswith(SHAPE_SUFFIX):
+                continue
+            name = entry[: -len(SHAPE_SUFFIX)]
+            path = os.path.join(self.shapes_dir, entry)
+            current = self._profiles.get(name)
+            try:
+                if current is None or os.stat(path).st_mtime_ns != current.mtime:
+                    current = ShapeProfile(name, path)
+            except Exception as e:
+                if current is None:
+                    raise
+                print(f"Warning: Keeping shape profile {name}@{current.version}, reload failed: {e}")
+            profiles[name] = current
+        self._profiles = profiles
+
+    def _maybe_reload(self):
+        if time.monotonic() - self._last_check < RELOAD_INTERVAL:
+            return
+        with self._lock:
+            if time.monotonic() - self._last_check < RELOAD_INTERVAL:
+                return
+            self._scan()
+            self._last_check = time.monotonic()
+
+    def get(self, name: Optional[str] = None) -> ShapeProfile:
+        self._maybe_reload()
+        if not self._profiles:
+            self.load()
+        profile = self._profiles.get(name or DEFAULT_PROFILE)
+        if profile is None:
+            raise KeyError(f"Unknown shape profile: {name}")
+        return profile
+
+    def profiles(self) -> list[dict]:
+        self._maybe_reload()
+        return [
+            {"name": p.name, "version": p.version, "default": p.name == DEFAULT_PROFILE}
+            for p in self._profiles.values()
+        ]
+
+
+SHAPES = ShapeRegistry()
+
+
+def _report(lines: list[str]) -> str:
+    return "Validation Report\nConforms: False\n" + "\n".join(lines) if lines else ""
+
+
+def _format(focus, path, message) -> str:
+    return f"Focus Node: <{focus}>\n\tResult Path: {path}\n\tMessage: {message}"
 
-    shape_graph = Graph()
-    shape_graph.parse(_shape_path(), format="turtle")
 
+def _fast_verdicts(shapes: ShapeProfile, graphs: list[Graph]) -> Optional[list[tuple[bool, str]]]:
+    if shapes.compiled is None or FAST_PATH == "off":
+        return None
+    verdicts = []
+    for graph in graphs:
+        violations = shapes.compiled.violations(graph)
+        if violations is None:
+            return None
+        verdicts.append((not violations, _report([_format(*v) for v in violations])))
+    return verdicts
+
+
+def _pyshacl_verdict(shapes: ShapeProfile, data_graph: Graph) -> tuple[bool, str]:
     conforms, _, results_text = validate(
         data_graph=data_graph,
-        shacl_graph=shape_graph,
+        shacl_graph=shapes.graph,
         inference="rdfs",
         debug=False,
     )
-
     return conforms, results_text
+
+
+def _pyshacl_verdicts(shapes: ShapeProfile, graphs: list[Graph]) -> list[tuple[bool, str]]:
+    if len(graphs) == 1:
+        return [_pyshacl_verdict(shapes, graphs[0])]
+    data_graph = Graph()
+    owners = {}
+    for idx, part in enumerate(graphs):
+        for subject in set(part.subjects()):
+            owners[subject] = idx
+        data_graph += part
+
+    conforms, report_graph, _ = validate(
+        data_graph=data_graph,
+        shacl_graph=shapes.graph,
+        inference="rdfs",
+        debug=False,
+    )
+    if conforms:
+        return [(True, "")] * len(graphs)
+
+    messages: list[list[str]] = [[] for _ in graphs]
+    for result in report_graph.objects(None, SH.result):
+        focus = report_graph.value(result, SH.focusNode)
+        if focus not in owners:
+            # A violation we cannot attribute; fall back to one run per graph.
+            return [_pyshacl_verdict(shapes, part) for part in graphs]
+        messages[owners[focus]].append(
+            _format(focus, report_graph.value(result, SH.resultPath), report_graph.value(result, SH.resultMessage))
+        )
+    return [(not lines, _report(lines)) for lines in messages]
+
+
+def differential_check(graphs: list[Graph], profile: Optional[str] = None) -> list[int]:
+    """Return the indexes of graphs on which the compiled checks and pyshacl disagree."""
+    shapes = SHAPES.get(profile)
+    fast = _fast_verdicts(shapes, graphs)
+    if fast is None:
+        return []
+    reference = [_pyshacl_verdict(shapes, graph) for graph in graphs]
+    return [idx for idx, (a, b) in enumerate(zip(fast, reference)) if a[0] != b[0]]
+
+
+def validate_graph_batch(graphs: list[Graph], profile: Optional[str] = None) -> tuple[list[tuple[bool, str]], str]:
+    """
+    Validate several dataset graphs, using the compiled checks when the profile
+    allows it and otherwise a single pyshacl run whose violations are mapped
+    back to the graph their focus node came from.
+    """
+    shapes = SHAPES.get(profile)
+    shape_version = f"{shapes.name}@{shapes.version}"
+
+    verdicts = _fast_verdicts(shapes, graphs)
+    if verdicts is None:
+        return _pyshacl_verdicts(shapes, graphs), shape_version
+    if FAST_PATH != "differential":
+        return verdicts, shape_version
+
+    # Differential mode compares against one pyshacl run per graph, the exact
+    # reference; merged batch runs can differ when graphs share nodes.
+    reference = [_pyshacl_verdict(shapes, graph) for graph in graphs]
+    for fast, slow in zip(verdicts, reference):
+        if fast[0] != slow[0]:
+            print(
+                f"Warning: Compiled validator disagrees with pyshacl for {shape_version}: "
+                f"compiled={fast[0]} pyshacl={slow[0]}\n{fast[1] or slow[1]}"
+            )
+    return reference, shape_version
+
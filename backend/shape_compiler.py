@@ -0,0 +1,198 @@
+from typing import Callable, NamedTuple, Optional
+
+from rdflib import BNode, Graph, Literal, URIRef
+from rdflib.collection import Collection
+from rdflib.namespace import RDF, RDFS, SH, XSD
+
+
+NODE_KINDS = {
+    SH.IRI: (URIRef,),
+    SH.Literal: (Literal,),
+    SH.BlankNode: (BNode,),
+    SH.BlankNodeOrIRI: (BNode, URIRef),
+    SH.BlankNodeOrLiteral: (BNode, Literal),
+    SH.IRIOrLiteral: (URIRef, Literal),
+}
+TARGETS = (SH.targetClass, SH.targetNode, SH.targetSubjectsOf, SH.targetObjectsOf)
+# Shape predicates that do not change whether a node conforms.
+IGNORED = {
+    RDF.type, RDFS.label, RDFS.comment, SH.path, SH.name, SH.description,
+    SH.message, SH.order, SH.group, SH.severity, SH.defaultValue, *TARGETS,
+}
+# With inference="rdfs" pyshacl would entail new triples from these.
+RDFS_SCHEMA = (RDFS.subClassOf, RDFS.subPropertyOf, RDFS.domain, RDFS.range)
+
+
+class UnsupportedShape(Exception):
+    pass
+
+
+class Violation(NamedTuple):
+    focus: object
+    path: object
+    message: str
+
+
+class CompiledShapes:
+    """
+    Plain Python checks for the SHACL core subset used by the catalog shapes:
+    class, node and subject/object targets, simple predicate paths, minCount,
+    maxCount, nodeKind, datatype, node, property and the and/or/xone/not
+    combinators. Compiling a shapes graph that uses anything else raises
+    ``UnsupportedShape``, and ``violations`` returns None for data graphs that
+    carry RDFS schema triples; callers fall back to pyshacl in both cases.
+    """
+
+    def __init__(self, shapes_graph: Graph):
+        self.shapes_graph = shapes_graph
+        self._shapes: dict = {}
+        self.roots = []
+        for shape in sorted({s for target in TARGETS for s in shapes_graph.subjects(target, None)}):
+            if (shape, RDF.type, RDFS.Class) in shapes_graph:
+                raise UnsupportedShape("implicit class targets")
+            self._compile(shape)
+            targets = {target: list(shapes_graph.objects(shape, target)) for target in TARGETS}
+            self.roots.append((shape, targets))
+
+    def _compile(self, shape):
+        if shape in self._shapes:
+            return
+        self._shapes[shape] = None  # placeholder for recursive sh:node references
+        graph = self.shapes_graph
+        if (shape, SH.deactivated, Literal(True)) in graph:
+            self._shapes[shape] = (None, None, None, [], True)
+            return
+
+        path = graph.value(shape, SH.path)
+        if path is not None and not isinstance(path, URIRef):
+            raise UnsupportedShape("complex property paths")
+
+        min_count = max_count = None
+        checks: list[Callable] = []
+        for predicate, value in graph.predicate_objects(shape):
+            if predicate in IGNORED or predicate == SH.deactivated:
+                continue
+            if predicate == SH.minCount:
+                min_count = int(value)
+            elif predicate == SH.maxCount:
+                max_count = int(value)
+            elif predicate == SH.nodeKind:
+                checks.append(self._node_kind(value))
+            elif predicate == SH.datatype:
+                checks.append(self._datatype(value))
+            elif predicate == SH.node:
+                self._compile(value)
+                checks.append(self._node(value))
+            elif predicate == SH.property:
+                self._compile(value)
+                checks.append(self._property(value))
+            elif predicate in (SH["and"], SH["or"], SH.xone):
+                members = list(Collection(graph, value))
+                for member in members:
+                    self._compile(member)
+                checks.append(self._combine(predicate, members))
+            elif predicate == SH["not"]:
+                self._compile(value)
+                checks.append(self._negate(value))
+            else:
+                raise UnsupportedShape(predicate.n3(graph.namespace_manager))
+        if path is None and (min_count is not None or max_count is not None):
+            raise UnsupportedShape("sh:minCount/sh:maxCount on a node shape")
+        self._shapes[shape] = (path, min_count, max_count, checks, False)
+
+    @staticmethod
+    def _node_kind(kind) -> Callable:
+        if kind not in NODE_KINDS:
+            raise UnsupportedShape(f"sh:nodeKind {kind}")
+        types = NODE_KINDS[kind]
+
+        def check(graph, focus, path, value):
+            if not isinstance(value, types):
+                return [Violation(focus, path, f"Value {value.n3()} is not of Node Kind {kind.n3()}")]
+            return []
+
+        return check
+
+    @staticmethod
+    def _datatype(datatype) -> Callable:
+        def check(graph, focus, path, value):
+            if isinstance(value, Literal):
+                actual = value.datatype or (RDF.langString if value.language else XSD.string)
+                if actual == datatype and not getattr(value, "ill_typed", False):
+                    return []
+            return [Violation(focus, path, f"Value {value.n3()} is not Literal with datatype {datatype.n3()}")]
+
+        return check
+
+    def _node(self, shape) -> Callable:
+        def check(graph, focus, path, value):
+            if self.run(shape, graph, value):
+                return [Violation(focus, path, f"Value does not conform to Shape {shape.n3()}")]
+            return []
+
+        return check
+
+    def _property(self, shape) -> Callable:
+        def check(graph, focus, path, value):
+            return self.run(shape, graph, value)
+
+        return check
+
+    def _combine(self, kind, members: list) -> Callable:
+        name = kind.n3(self.shapes_graph.namespace_manager)
+
+        def check(graph, focus, path, value):
+            passed = sum(1 for member in members if not self.run(member, graph, value))
+            if kind == SH["and"]:
+                ok = passed == len(members)
+            elif kind == SH["or"]:
+                ok = passed > 0
+            else:
+                ok = passed == 1
+            if ok:
+                return []
+            return [Violation(focus, path, f"Node {value.n3()} does not conform to the {name} constraint")]
+
+        return check
+
+    def _negate(self, shape) -> Callable:
+        def check(graph, focus, path, value):
+            if not self.run(shape, graph, value):
+                return [Violation(focus, path, f"Node {value.n3()} conforms to shape {shape.n3()}")]
+            return []
+
+        return check
+
+    def run(self, shape, graph: Graph, focus) -> list[Violation]:
+        path, min_count, max_count, checks, deactivated = self._shapes[shape]
+        if deactivated:
+            return []
+        values = [focus] if path is None else list(graph.objects(focus, path))
+        results = []
+        if min_count is not None and len(values) < min_count:
+            results.append(Violation(focus, path, f"Less than {min_count} values on {focus.n3()}->{path.n3()}"))
+        if max_count is not None and len(values) > max_count:
+            results.append(Violation(focus, path, f"More than {max_count} values on {focus.n3()}->{path.n3()}"))
+        for value in values:
+            for check in checks:
+                results.extend(check(graph, focus, path, value))
+        return results
+
+    def _focus_nodes(self, targets: dict, graph: Graph) -> set:
+        nodes = set(targets[SH.targetNode])
+        for cls in targets[SH.targetClass]:
+            nodes.update(graph.subjects(RDF.type, cls))
+        for predicate in targets[SH.targetSubjectsOf]:
+            nodes.update(graph.subjects(predicate, None))
+        for predicate in targets[SH.targetObjectsOf]:
+            nodes.update(graph.objects(None, predicate))
+        return nodes
+
+    def violations(self, graph: Graph) -> Optional[list[Violation]]:
+        if any((None, predicate, None) in graph for predicate in RDFS_SCHEMA):
+            return None
+        results = []
+        for shape, targets in self.roots:
+            for focus in self._focus_nodes(targets, graph):
+                results.extend(self.run(shape, graph, focus))
+        return results
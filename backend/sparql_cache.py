@@ -0,0 +1,175 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+
+# Strings, IRIs and comments first, so keywords inside them are never matched.
+TOKEN = re.compile(
+    r'''(?P<string>"""(?:[^"\\]|\\.|"(?!""))*"""'''
+    r"""|'''(?:[^'\\]|\\.|'(?!''))*'''"""
+    r'''|"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')'''
+    r"|(?P<iri><[^<>\"{}|^`\\\s]*>)"
+    r"|(?P<comment>#[^\n]*)"
+    r"|(?P<space>\s+)"
+    r"|(?P<var>[?$]\w+)"
+    r"|(?P<word>[A-Za-z_][\w.-]*(?::[\w.%-]*)?|:[\w.%-]*)"
+    r"|(?P<other>.)",
+    re.S,
+)
+QUERY_FORMS = {"SELECT", "CONSTRUCT", "ASK"}
+PROLOGUE = {"PREFIX", "BASE"}
+FORBIDDEN = {"SERVICE", "LOAD", "INSERT", "DELETE", "CLEAR", "DROP", "CREATE", "COPY", "MOVE", "ADD"}
+ALL_GRAPHS = None
+
+
+class QueryRejected(Exception):
+    pass
+
+
+class ParsedQuery:
+    """
+    A read-only query reduced to what the cache needs: its text with comments
+    dropped and whitespace collapsed, its form, and the graphs it reads. A dataset clause
+    (FROM / FROM NAMED) defines exactly which graphs a query can see; without
+    one the query depends on every graph.
+    """
+
+    def __init__(self, text: str):
+        tokens = []
+        parts = []
+        for match in TOKEN.finditer(text):
+            kind, value = match.lastgroup, match.group()
+            if kind in {"space", "comment"}:
+                # Comments separate tokens like whitespace does.
+                if parts and parts[-1] != " ":
+                    parts.append(" ")
+                continue
+            parts.append(value)
+            # Keywords are case-insensitive; prefixed names contain a colon.
+            tokens.append((kind, value.upper() if kind == "word" and ":" not in value else value))
+        self.normalized = "".join(parts).strip()
+
+        words = [value for kind, value in tokens if kind == "word" and ":" not in value]
+        forbidden = FORBIDDEN.intersection(words)
+        if forbidden:
+            raise QueryRejected(f"Only read-only queries are allowed, found {', '.join(sorted(forbidden))}")
+        self.form = next((word for word in words if word not in PROLOGUE), None)
+        if self.form not in QUERY_FORMS:
+            raise QueryRejected("Only SELECT, CONSTRUCT and ASK queries are allowed")
+        self.graphs: Optional[frozenset] = self._dataset(tokens)
+
+    @staticmethod
+    def _dataset(tokens: list) -> Optional[frozenset]:
+        graphs = set()
+        for index, (kind, value) in enumerate(tokens):
+            if kind != "word" or value != "FROM":
+                continue
+            following = tokens[index + 1 : index + 3]
+            if following and following[0] == ("word", "NAMED"):
+                following = following[1:]
+            if not following or following[0][0] != "iri":
+                return ALL_GRAPHS
+            graphs.add(following[0][1][1:-1])
+        return frozenset(graphs) if graphs else ALL_GRAPHS
+
+
+class CachedResult:
+    def __init__(self, body: bytes, media_type: str, graphs: Optional[frozenset]):
+        self.body = body
+        self.media_type = media_type
+        self.graphs = graphs
+
+
+class SparqlCache:
+    """
+    LRU of SPARQL results keyed by normalized query text and Accept header,
+    bounded by total body size. Entries are dropped when the outbox applies a
+    change to one of the graphs they read (any change, for queries without a
+    dataset clause or when the outbox cannot tell which graphs changed).
+    Results fetched while an invalidation that concerns them happened are not
+    stored; the per-graph change marks behind that check are collapsed into
+    a single everything-changed mark once more than SPARQL_CACHE_TRACKED_GRAPHS
+    graphs are tracked.
+    """
+
+    def __init__(self):
+        self.max_bytes = int(os.getenv("SPARQL_CACHE_BYTES", str(64 * 1024 * 1024)))
+        self.max_result_bytes = int(os.getenv("SPARQL_MAX_RESULT_BYTES", str(16 * 1024 * 1024)))
+        self.timeout = float(os.getenv("SPARQL_TIMEOUT", "10"))
+        self.max_tracked_graphs = int(os.getenv("SPARQL_CACHE_TRACKED_GRAPHS", "10000"))
+        self._entries: OrderedDict[tuple, CachedResult] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.generation = 0
+        self._any_change = 0
+        self._everything = 0
+        self._changed: dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+
+    def get(self, key: tuple) -> Optional[CachedResult]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: tuple, entry: CachedResult, since: int):
+        """Store a result fetched at generation ``since`` unless its graphs changed meanwhile."""
+        size = len(entry.body)
+        with self._lock:
+            if entry.graphs is ALL_GRAPHS:
+                stale = self._any_change > since
+            else:
+                stale = self._everything > since or any(self._changed.get(graph, 0) > since for graph in entry.graphs)
+            if stale or size > self.max_bytes:
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous.body)
+            self._entries[key] = entry
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+
+    def invalidate(self, graphs: Optional[set[str]]):
+        """Drop entries that read any of ``graphs``; ALL_GRAPHS (None) drops every entry."""
+        if graphs is not ALL_GRAPHS and not graphs:
+            return
+        with self._lock:
+            self.generation += 1
+            self._any_change = self.generation
+            if graphs is ALL_GRAPHS:
+                self._everything = self.generation
+                graphs = set()
+            for graph in graphs:
+                self._changed[graph] = self.generation
+            if len(self._changed) > self.max_tracked_graphs:
+                # Fetches still in flight then count as stale, which only costs a cache store.
+                self._everything = self.generation
+                self._changed.clear()
+            for key in [
+                k for k, e in self._entries.items() if not graphs or e.graphs is ALL_GRAPHS or e.graphs & graphs
+            ]:
+                self._bytes -= len(self._entries.pop(key).body)
+                self.invalidated += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidated": self.invalidated,
+            }
+
+
+SPARQL_CACHE = SparqlCache()
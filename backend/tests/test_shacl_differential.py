@@ -0,0 +1,172 @@
+from datetime import datetime
+
+import pytest
+from rdflib import BNode, Literal, URIRef
+from rdflib.namespace import DCAT, DCTERMS, XSD
+
+import shacl_validation
+from shacl_validation import SHAPES, _pyshacl_verdict, differential_check
+from triplestore import build_dataset_graph
+
+
+def _record(**changes) -> dict:
+    record = {
+        "identifier": "ds1",
+        "title": "Air quality",
+        "description": "Hourly readings",
+        "issued": datetime(2024, 1, 1),
+        "modified": datetime(2024, 6, 1),
+        "publisher": "City",
+        "contact_point": "data@city.example.org",
+        "is_public": True,
+        "access_url_dataset": "https://data.example.org/air.csv",
+        "distribution_access_type": "download",
+        "file_format": "text/csv",
+        "theme": "https://themes.example.org/environment",
+        "access_url_semantic_model": "https://models.example.org/air.ttl",
+    }
+    record.update(changes)
+    return record
+
+
+def _dataset(graph):
+    return next(graph.subjects(DCTERMS.title, None))
+
+
+def _distribution(graph):
+    return graph.value(_dataset(graph), DCAT.distribution)
+
+
+def _without_distribution(graph):
+    graph.remove((_dataset(graph), DCAT.distribution, None))
+
+
+def _second_distribution(graph):
+    graph.add((_dataset(graph), DCAT.distribution, URIRef("https://data.example.org/other")))
+
+
+def _download_and_access_url(graph):
+    graph.add((_distribution(graph), DCAT.accessURL, URIRef("https://data.example.org/portal")))
+
+
+def _two_download_urls(graph):
+    graph.add((_distribution(graph), DCAT.downloadURL, URIRef("https://data.example.org/air2.csv")))
+
+
+def _no_download_url(graph):
+    graph.remove((_distribution(graph), DCAT.downloadURL, None))
+
+
+def _literal_download_url(graph):
+    distribution = _distribution(graph)
+    url = graph.value(distribution, DCAT.downloadURL)
+    graph.remove((distribution, DCAT.downloadURL, url))
+    graph.add((distribution, DCAT.downloadURL, Literal(str(url))))
+
+
+def _blank_download_url(graph):
+    distribution = _distribution(graph)
+    graph.remove((distribution, DCAT.downloadURL, None))
+    graph.add((distribution, DCAT.downloadURL, BNode()))
+
+
+def _media_type_iri(graph):
+    distribution = _distribution(graph)
+    graph.remove((distribution, DCAT.mediaType, None))
+    graph.add((distribution, DCAT.mediaType, URIRef("https://www.iana.org/assignments/media-types/text/csv")))
+
+
+def _media_type_integer(graph):
+    distribution = _distribution(graph)
+    graph.remove((distribution, DCAT.mediaType, None))
+    graph.add((distribution, DCAT.mediaType, Literal("7", datatype=XSD.integer)))
+
+
+def _media_type_language(graph):
+    distribution = _distribution(graph)
+    graph.remove((distribution, DCAT.mediaType, None))
+    graph.add((distribution, DCAT.mediaType, Literal("CSV", lang="en")))
+
+
+def _literal_theme(graph):
+    graph.remove((_dataset(graph), DCAT.theme, None))
+    graph.add((_dataset(graph), DCAT.theme, Literal("environment")))
+
+
+def _literal_conforms_to(graph):
+    graph.remove((_dataset(graph), DCTERMS.conformsTo, None))
+    graph.add((_dataset(graph), DCTERMS.conformsTo, Literal("air model")))
+
+
+def _literal_contact_point(graph):
+    graph.remove((_dataset(graph), DCAT.contactPoint, None))
+    graph.add((_dataset(graph), DCAT.contactPoint, Literal("data@city.example.org")))
+
+
+# (mutation, whether pyshacl accepts the mutated graph)
+MUTATIONS = [
+    (None, True),
+    (_media_type_iri, True),
+    (_without_distribution, False),
+    (_second_distribution, False),
+    (_download_and_access_url, False),
+    (_two_download_urls, False),
+    (_no_download_url, False),
+    (_literal_download_url, False),
+    (_blank_download_url, False),
+    (_media_type_integer, False),
+    (_media_type_language, False),
+    (_literal_theme, False),
+    (_literal_conforms_to, False),
+    (_literal_contact_point, False),
+]
+
+
+@pytest.fixture(autouse=True)
+def fast_path(monkeypatch):
+    monkeypatch.setattr(shacl_validation, "FAST_PATH", "differential")
+    assert SHAPES.get().compiled is not None, "the default profile must compile for the comparison to mean anything"
+
+
+def _graphs(records: list[dict]) -> list:
+    graphs = []
+    for record in records:
+        for mutate, _ in MUTATIONS:
+            graph = build_dataset_graph(record)
+            if mutate is not None:
+                mutate(graph)
+            graphs.append(graph)
+    return graphs
+
+
+# Records with a download URL; the mutations above are written against those.
+RECORDS = [
+    _record(),
+    _record(theme=None, access_url_semantic_model=None, file_format="", contact_point="", publisher=""),
+    _record(issued=None, modified=None, description=""),
+]
+ACCESS_RECORD = _record(distribution_access_type="access", access_url_dataset="https://data.example.org/portal")
+
+
+@pytest.mark.parametrize("record", RECORDS, ids=["full", "minimal", "undated"])
+def test_compiled_checks_agree_with_pyshacl(record):
+    graphs = _graphs([record])
+    assert differential_check(graphs) == []
+
+    shapes = SHAPES.get()
+    verdicts = [_pyshacl_verdict(shapes, graph)[0] for graph in graphs]
+    assert verdicts == [conforms for _, conforms in MUTATIONS]
+
+
+def test_compiled_checks_agree_with_pyshacl_for_access_urls():
+    graphs = _graphs([ACCESS_RECORD])
+    assert differential_check(graphs) == []
+    verdicts = {_pyshacl_verdict(SHAPES.get(), graph)[0] for graph in graphs}
+    assert verdicts == {True, False}
+
+
+def test_batch_validation_answers_like_pyshacl():
+    graphs = _graphs(RECORDS)
+    verdicts, shape_version = shacl_validation.validate_graph_batch(graphs)
+    assert shape_version.startswith("sdcat@")
+    assert [conforms for conforms, _ in verdicts] == [conforms for _, conforms in MUTATIONS] * len(RECORDS)
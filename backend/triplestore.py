@@ -1,31 +1,55 @@
-import requests
 import os
-from requests.auth import HTTPBasicAuth
-from datetime import datetime
-from urllib.parse import urlparse
+from datetime import datetime, timezone
+from typing import Optional
+from urllib.parse import quote, unquote, urlparse
+from rdflib import Graph, Literal, URIRef
+from rdflib.namespace import DCAT, DCTERMS, FOAF, RDF, XSD, Namespace
+
+VCARD = Namespace("http://www.w3.org/2006/vcard/ns#")
+SDM = Namespace("https://w3id.org/solid-dataspace-manager#")
+# Characters that may not appear in an IRI written to N-Triples or SPARQL.
+IRI_FORBIDDEN = set('<>"{}|\\^`') | {chr(c) for c in range(0x21)}
+MAILTO_SAFE = "@!$&'()*+,;=.-_~"
 
-FUSEKI_URL = "http://fuseki:3030/semantic_data_catalog/data"
-AUTH = HTTPBasicAuth("admin", "admin")
 
 def _is_http_url(value: str) -> bool:
     try:
         parsed = urlparse(value)
-        return parsed.scheme in {"http", "https"} and bool(parsed.netloc)
+        return (
+            parsed.scheme in {"http", "https"}
+            and bool(parsed.netloc)
+            and not IRI_FORBIDDEN.intersection(value)
+        )
     except (TypeError, ValueError):
         return False
 
+def dataset_iri(identifier: str) -> str:
+    """The IRI (and named graph) of a dataset; raises ValueError for identifiers that do not make one."""
+    BASE_URI = os.getenv("BASE_URI", "https://semantic-data-catalog.com")
+    iri = f"{BASE_URI}/id/{identifier}"
+    if not _is_http_url(iri):
+        raise ValueError("Dataset identifier must not contain whitespace or IRI delimiters.")
+    return iri
+
 def _normalize_distribution_access_type(value: str) -> str:
     return "access" if value == "access" else "download"
 
-def generate_dcat_dataset_ttl(dataset: dict) -> str:
-    issued = dataset["issued"].isoformat() if isinstance(dataset["issued"], datetime) else dataset["issued"]
-    modified = dataset["modified"].isoformat() if isinstance(dataset["modified"], datetime) else dataset["modified"]
-    identifier = dataset["identifier"]
-    BASE_URI = os.getenv("BASE_URI", "https://semantic-data-catalog.com")
-    dataset_uri = f"{BASE_URI}/id/{identifier}"
-    distribution_uri = f"{dataset_uri}/distribution"
-    publisher_uri = f"{dataset_uri}/publisher"
-    contact_uri = f"{dataset_uri}/contact"
+def _mailto(address: str) -> URIRef:
+    return URIRef("mailto:" + quote(address, safe=MAILTO_SAFE))
+
+def _datetime_literal(value) -> Literal:
+    return Literal(value.isoformat() if isinstance(value, datetime) else value, datatype=XSD.dateTime)
+
+def build_dataset_graph(dataset: dict) -> Graph:
+    """
+    Build the DCAT description of a dataset (dataset, distribution, publisher
+    and contact point) directly as an rdflib graph. Dates, publisher and
+    contact point that a record lacks (as harvested ones may) are left out.
+    """
+    dataset_uri = URIRef(dataset_iri(dataset["identifier"]))
+    distribution_uri = URIRef(f"{dataset_uri}/distribution")
+    publisher_uri = URIRef(f"{dataset_uri}/publisher")
+    contact_uri = URIRef(f"{dataset_uri}/contact")
     theme = dataset.get("theme")
     semantic_model_url = dataset.get("access_url_semantic_model")
     access_url_dataset = dataset.get("access_url_dataset")
@@ -37,141 +61,207 @@ def generate_dcat_dataset_ttl(dataset: dict) -> str:
         raise ValueError("Dataset access URL must be a valid http(s) IRI.")
     if distribution_access_type == "access" and not dataset.get("is_public", True):
         raise ValueError("Public external links are currently supported only for public datasets.")
+    if theme and not _is_http_url(theme):
+        raise ValueError("Theme must be a valid http(s) IRI.")
+    if semantic_model_url and not _is_http_url(semantic_model_url):
+        raise ValueError("Semantic model URL must be a valid http(s) IRI.")
 
-    dataset_lines = [
-        f"<{dataset_uri}> a dcat:Dataset ;",
-        f'    dct:title "{dataset["title"]}" ;',
-    ]
+    graph = Graph()
+    graph.bind("dcat", DCAT)
+    graph.bind("dct", DCTERMS)
+    graph.bind("foaf", FOAF)
+    graph.bind("vcard", VCARD)
 
+    graph.add((dataset_uri, RDF.type, DCAT.Dataset))
+    graph.add((dataset_uri, DCTERMS.title, Literal(dataset["title"])))
     description = dataset.get("description")
     if description:
-        dataset_lines.append(f'    dct:description "{description}" ;')
-
-    dataset_lines.extend(
-        [
-            f'    dct:issued "{issued}"^^xsd:dateTime ;',
-            f'    dct:modified "{modified}"^^xsd:dateTime ;',
-            f"    dct:publisher <{publisher_uri}> ;",
-            f'    dct:accessRights "{"public" if dataset.get("is_public", True) else "restricted"}" ;',
-            f"    dcat:contactPoint <{contact_uri}> ;",
-            f"    dcat:distribution <{distribution_uri}> ;",
-        ]
+        graph.add((dataset_uri, DCTERMS.description, Literal(description)))
+    for predicate, field in ((DCTERMS.issued, "issued"), (DCTERMS.modified, "modified")):
+        if dataset.get(field) not in (None, ""):
+            graph.add((dataset_uri, predicate, _datetime_literal(dataset[field])))
+    graph.add(
+        (dataset_uri, DCTERMS.accessRights, Literal("public" if dataset.get("is_public", True) else "restricted"))
     )
-
+    graph.add((dataset_uri, DCAT.distribution, distribution_uri))
     if theme:
-        if _is_http_url(theme):
-            dataset_lines.append(f"    dcat:theme <{theme}> ;")
-        else:
-            raise ValueError("Theme must be a valid http(s) IRI.")
-
+        graph.add((dataset_uri, DCAT.theme, URIRef(theme)))
     if semantic_model_url:
-        if _is_http_url(semantic_model_url):
-            dataset_lines.append(f"    dct:conformsTo <{semantic_model_url}> ;")
-        else:
-            raise ValueError("Semantic model URL must be a valid http(s) IRI.")
+        graph.add((dataset_uri, DCTERMS.conformsTo, URIRef(semantic_model_url)))
 
-    dataset_lines[-1] = dataset_lines[-1].rstrip(" ;") + " ."
-
-    distribution_lines = [
-        f"<{distribution_uri}> a dcat:Distribution ;",
-        f"    dcat:{'accessURL' if distribution_access_type == 'access' else 'downloadURL'} <{access_url_dataset}> ;",
-    ]
+    graph.add((distribution_uri, RDF.type, DCAT.Distribution))
+    access_property = DCAT.accessURL if distribution_access_type == "access" else DCAT.downloadURL
+    graph.add((distribution_uri, access_property, URIRef(access_url_dataset)))
     file_format = (dataset.get("file_format") or "").strip()
     if file_format:
-        distribution_lines.append(f'    dcat:mediaType "{file_format}" ;')
-    distribution_lines[-1] = distribution_lines[-1].rstrip(" ;") + " ."
-
-    return "\n".join(
-        [
-            "@prefix dcat: <http://www.w3.org/ns/dcat#> .",
-            "@prefix dct: <http://purl.org/dc/terms/> .",
-            "@prefix foaf: <http://xmlns.com/foaf/0.1/> .",
-            "@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .",
-            "@prefix vcard: <http://www.w3.org/2006/vcard/ns#> .",
-            "",
-            *dataset_lines,
-            "",
-            *distribution_lines,
-            "",
-            f"<{publisher_uri}> a foaf:Agent ;",
-            f'    foaf:name "{dataset["publisher"]}" ;',
-            f"    vcard:hasEmail <mailto:{dataset['contact_point']}> .",
-            "",
-            f"<{contact_uri}> a vcard:Kind ;",
-            f"    vcard:hasEmail <mailto:{dataset['contact_point']}> .",
-        ]
-    )
+        graph.add((distribution_uri, DCAT.mediaType, Literal(file_format)))
 
-def delete_named_graph(graph_uri: str):
-    res = requests.delete(
-        "http://fuseki:3030/semantic_data_catalog/data",
-        params={"graph": graph_uri},
-        auth=HTTPBasicAuth("admin", "admin")
-    )
-    if res.status_code not in [200, 204]:
-        raise Exception(f"Failed to delete named graph {graph_uri}: {res.status_code} – {res.text}")
+    email = _mailto(dataset["contact_point"]) if dataset.get("contact_point") else None
+    if dataset.get("publisher"):
+        graph.add((dataset_uri, DCTERMS.publisher, publisher_uri))
+        graph.add((publisher_uri, RDF.type, FOAF.Agent))
+        graph.add((publisher_uri, FOAF.name, Literal(dataset["publisher"])))
+        if email is not None:
+            graph.add((publisher_uri, VCARD.hasEmail, email))
+    if email is not None:
+        graph.add((dataset_uri, DCAT.contactPoint, contact_uri))
+        graph.add((contact_uri, RDF.type, VCARD.Kind))
+        graph.add((contact_uri, VCARD.hasEmail, email))
+    return graph
 
-def insert_dataset_rdf(ttl_data: bytes, graph_uri: str):
+def change_feed_graph(changes: list[dict], datasets: Optional[dict] = None) -> Graph:
     """
-    Insert RDF data into the Fuseki triple store under the given graph URI.
+    Describe changes as sdm:ChangeEvent resources in the sdm:changeLog of the
+    catalog, as the Solid Dataspace Manager does for its catalog records. With
+    ``datasets`` the current description of every changed dataset is added.
     """
-    headers = {"Content-Type": "text/turtle"}
-    params = {"graph": graph_uri}
-
-    response = requests.post(
-        FUSEKI_URL,
-        headers=headers,
-        params=params,
-        data=ttl_data,
-        auth=AUTH
-    )
+    BASE_URI = os.getenv("BASE_URI", "https://semantic-data-catalog.com")
+    catalog_uri = URIRef(_catalog_uri())
+    graph = Graph()
+    graph.bind("sdm", SDM)
+    graph.bind("dct", DCTERMS)
+    graph.bind("foaf", FOAF)
+    for change in changes:
+        event = URIRef(f"{BASE_URI}/changes/{change['seq']}")
+        graph.add((catalog_uri, SDM.changeLog, event))
+        graph.add((event, RDF.type, SDM.ChangeEvent))
+        graph.add((event, SDM.sequence, Literal(change["seq"])))
+        graph.add((event, DCTERMS.modified, Literal(datetime.fromtimestamp(change["ts"], timezone.utc))))
+        graph.add((event, DCTERMS.description, Literal(f"{change['entity'].capitalize()} {change['action']}d.")))
+        graph.add((event, DCTERMS.identifier, Literal(change["key"])))
+        if change["entity"] == "dataset":
+            record = datasets.get(change["key"]) if datasets is not None else None
+            try:
+                graph.add((event, FOAF.primaryTopic, URIRef(dataset_iri(change["key"]))))
+                if record is not None and change["action"] != "delete":
+                    graph += build_dataset_graph(record)
+            except ValueError as e:
+                print(f"Warning: Leaving the description of dataset {change['key']!r} out of the change feed: {e}")
+    return graph
 
-    if response.status_code not in (200, 201, 204):
-        raise Exception(f"Insert failed: {response.status_code} – {response.text}")
-    
-def append_to_catalog_graph(dataset_uri: str):
+def _catalog_uri() -> str:
     BASE_URI = os.getenv("BASE_URI", "https://semantic-data-catalog.com")
-    catalog_uri = f"{BASE_URI}/catalog"
-    graph_uri = catalog_uri
+    return f"{BASE_URI}/catalog"
+
+EXPORT_FORMATS = {
+    "turtle": ("text/turtle", "ttl"),
+    "ntriples": ("application/n-triples", "nt"),
+    "nquads": ("application/n-quads", "nq"),
+    "jsonld": ("application/ld+json", "jsonld"),
+}
 
-    update_query = f"""
-    PREFIX dcat: <http://www.w3.org/ns/dcat#>
+EXPORT_QUERY = "CONSTRUCT { ?s ?p ?o } WHERE { GRAPH ?g { ?s ?p ?o } }"
 
-    INSERT DATA {{
-      GRAPH <{graph_uri}> {{
-        <{catalog_uri}> dcat:dataset <{dataset_uri}> .
-      }}
-    }}
+def dataset_records_from_graph(graph: Graph) -> list[dict]:
     """
+    Read every dcat:Dataset in the graph back into the flat record shape used
+    by the API (the inverse of build_dataset_graph).
+    """
+    BASE_URI = os.getenv("BASE_URI", "https://semantic-data-catalog.com")
+    prefix = f"{BASE_URI}/id/"
+    records = []
 
-    res = requests.post(
-        "http://fuseki:3030/semantic_data_catalog/update",
-        headers={"Content-Type": "application/sparql-update"},
-        data=update_query,
-        auth=HTTPBasicAuth("admin", "admin")
-    )
+    for dataset_uri in graph.subjects(RDF.type, DCAT.Dataset):
+        identifier = graph.value(dataset_uri, DCTERMS.identifier)
+        if identifier is None:
+            uri = str(dataset_uri)
+            identifier = uri[len(prefix):] if uri.startswith(prefix) else uri.rstrip("/").rsplit("/", 1)[-1]
 
-    if res.status_code not in [200, 204]:
-        raise Exception(f"Failed to update catalog graph: {res.status_code} – {res.text}")
-    
-def remove_from_catalog_graph(dataset_uri: str):
-    BASE_URI = os.getenv("BASE_URI", "https://semantic-data-catalog.com")
-    catalog_uri = f"{BASE_URI}/catalog"
-
-    delete_query = f"""
-    PREFIX dcat: <http://www.w3.org/ns/dcat#>
-    DELETE WHERE {{
-      GRAPH <{catalog_uri}> {{
-        <{catalog_uri}> dcat:dataset <{dataset_uri}> .
-      }}
-    }}
+        distribution = graph.value(dataset_uri, DCAT.distribution)
+        access_url = graph.value(distribution, DCAT.accessURL) if distribution is not None else None
+        download_url = graph.value(distribution, DCAT.downloadURL) if distribution is not None else None
+        media_type = graph.value(distribution, DCAT.mediaType) if distribution is not None else None
+
+        publisher = graph.value(dataset_uri, DCTERMS.publisher)
+        contact = graph.value(dataset_uri, DCAT.contactPoint)
+        email = graph.value(contact, VCARD.hasEmail) if contact is not None else None
+        if email is None and publisher is not None:
+            email = graph.value(publisher, VCARD.hasEmail)
+
+        issued = graph.value(dataset_uri, DCTERMS.issued)
+        modified = graph.value(dataset_uri, DCTERMS.modified)
+        theme = graph.value(dataset_uri, DCAT.theme)
+        conforms_to = graph.value(dataset_uri, DCTERMS.conformsTo)
+        description = graph.value(dataset_uri, DCTERMS.description)
+        access_rights = graph.value(dataset_uri, DCTERMS.accessRights)
+
+        records.append(
+            {
+                "identifier": str(identifier),
+                "title": str(graph.value(dataset_uri, DCTERMS.title) or ""),
+                "description": str(description) if description is not None else None,
+                "issued": issued.toPython() if issued is not None else None,
+                "modified": modified.toPython() if modified is not None else None,
+                "publisher": str(graph.value(publisher, FOAF.name) or "") if publisher is not None else "",
+                "contact_point": unquote(str(email).removeprefix("mailto:")) if email is not None else "",
+                "is_public": str(access_rights or "public") != "restricted",
+                "access_url_dataset": str(access_url or download_url) if (access_url or download_url) else None,
+                "distribution_access_type": "access" if access_url is not None else "download",
+                "access_url_semantic_model": str(conforms_to) if conforms_to is not None else None,
+                "file_format": str(media_type) if media_type is not None else None,
+                "theme": str(theme) if theme is not None else None,
+            }
+        )
+
+    return records
+
+def dataset_ntriples(graph: Graph) -> str:
+    return graph.serialize(format="nt")
+
+def ntriples_diff(old: str, new: str) -> tuple[str, str]:
+    """
+    Return the N-Triples lines to delete and to insert to get from ``old`` to
+    ``new``. Both must come from ``dataset_ntriples``, which writes one triple
+    per line in a stable form, so comparing lines compares triples.
     """
+    old_lines = {line for line in old.splitlines() if line.strip()}
+    new_lines = {line for line in new.splitlines() if line.strip()}
+    deleted = "".join(f"{line}\n" for line in sorted(old_lines - new_lines))
+    inserted = "".join(f"{line}\n" for line in sorted(new_lines - old_lines))
+    return deleted, inserted
 
-    res = requests.post(
-        "http://fuseki:3030/semantic_data_catalog/update",
-        headers={"Content-Type": "application/sparql-update"},
-        data=delete_query,
-        auth=HTTPBasicAuth("admin", "admin")
-    )
-    if res.status_code not in [200, 204]:
-        raise Exception(f"Failed to remove dataset from catalog: {res.status_code} – {res.text}")
+def _ntriples(operation: dict) -> str:
+    # Entries written before datasets were built as graphs carry Turtle.
+    if operation.get("format", "turtle") == "nt":
+        return operation["data"]
+    graph = Graph()
+    graph.parse(data=operation["data"], format="turtle")
+    return dataset_ntriples(graph)
+
+def touched_graphs(operations: list[dict]) -> set[str]:
+    """Named graphs whose contents change when the given outbox operations are applied."""
+    graphs = set()
+    for operation in operations:
+        if operation["op"] in {"catalog_add", "catalog_remove"}:
+            graphs.add(_catalog_uri())
+        else:
+            graphs.add(operation["graph"])
+    return graphs
+
+def build_sync_update(operations: list[dict]) -> str:
+    """
+    Turn outbox operations into a single SPARQL update request, which Fuseki
+    applies in one transaction.
+    """
+    catalog_uri = _catalog_uri()
+    statements = []
+    for operation in operations:
+        kind, graph_uri = operation["op"], operation["graph"]
+        if kind == "replace":
+            statements.append(f"DROP SILENT GRAPH <{graph_uri}>")
+            statements.append(f"INSERT DATA {{ GRAPH <{graph_uri}> {{\n{_ntriples(operation)}}} }}")
+        elif kind == "drop":
+            statements.append(f"DROP SILENT GRAPH <{graph_uri}>")
+        elif kind == "patch":
+            if operation["delete"]:
+                statements.append(f"DELETE DATA {{ GRAPH <{graph_uri}> {{\n{operation['delete']}}} }}")
+            if operation["insert"]:
+                statements.append(f"INSERT DATA {{ GRAPH <{graph_uri}> {{\n{operation['insert']}}} }}")
+        elif kind in {"catalog_add", "catalog_remove"}:
+            verb = "INSERT DATA" if kind == "catalog_add" else "DELETE DATA"
+            statements.append(
+                f"{verb} {{ GRAPH <{catalog_uri}> {{ <{catalog_uri}> <{DCAT.dataset}> <{graph_uri}> }} }}"
+            )
+        else:
+            raise ValueError(f"Unknown outbox operation: {kind}")
+    return " ;\n".join(statements)
@@ -0,0 +1,164 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from triplestore import EXPORT_QUERY, build_sync_update
+from triplestore_client import TriplestoreClient, TriplestoreError
+
+
+class QueryStream:
+    """A query result or export being read from the store; iterate ``aiter_bytes()`` and ``aclose()`` it."""
+
+    def __init__(
+        self,
+        media_type: str,
+        chunks: AsyncIterator[bytes],
+        close: Optional[Callable[[], Awaitable[None]]] = None,
+    ):
+        self.media_type = media_type
+        self._chunks = chunks
+        self._close = close
+
+    def aiter_bytes(self) -> AsyncIterator[bytes]:
+        return self._chunks
+
+    async def aclose(self):
+        if self._close is not None:
+            await self._close()
+
+
+async def _chunked(body: bytes, size: int = 64 * 1024) -> AsyncIterator[bytes]:
+    for start in range(0, len(body), size):
+        yield body[start : start + size]
+
+
+class TriplestoreBackend(ABC):
+    """
+    The storage operations the catalog needs from a triple store. Backends
+    implement the blocking methods; the ``a``-prefixed variants run them in a
+    worker thread unless a backend has its own async I/O.
+
+    Graph contents change through ``apply``, which takes outbox operations
+    (replace, drop, catalog_add, catalog_remove) and applies a whole batch
+    atomically. Query and export results are raw serialized bytes.
+    """
+
+    name = "base"
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    async def aclose(self):
+        self.close()
+
+    @abstractmethod
+    def apply(self, operations: list[dict]):
+        """Apply a batch of outbox operations atomically."""
+
+    @abstractmethod
+    def store_graph(self, graph_uri: Optional[str], data: bytes, content_type: str = "text/turtle"):
+        """Add RDF to a named graph (the default graph without ``graph_uri``)."""
+
+    def delete_graph(self, graph_uri: str):
+        self.apply([{"op": "drop", "graph": graph_uri}])
+
+    def add_to_catalog(self, dataset_uri: str):
+        self.apply([{"op": "catalog_add", "graph": dataset_uri}])
+
+    def remove_from_catalog(self, dataset_uri: str):
+        self.apply([{"op": "catalog_remove", "graph": dataset_uri}])
+
+    @abstractmethod
+    def query(self, query: str, accept: str) -> tuple[bytes, str]:
+        """Run a read-only query and return the serialized result and its media type."""
+
+    @abstractmethod
+    def export(self, media_type: str) -> tuple[bytes, str]:
+        """Serialize every named graph; N-Quads keep the graph names, other formats merge the graphs."""
+
+    async def aapply(self, operations: list[dict]):
+        await asyncio.to_thread(self.apply, operations)
+
+    async def astore_graph(self, graph_uri: Optional[str], data: bytes, content_type: str = "text/turtle"):
+        await asyncio.to_thread(self.store_graph, graph_uri, data, content_type)
+
+    async def adelete_graph(self, graph_uri: str):
+        await asyncio.to_thread(self.delete_graph, graph_uri)
+
+    async def aquery(self, query: str, accept: str, timeout: Optional[float] = None) -> QueryStream:
+        """
+        Like ``query``, streamed. After ``timeout`` seconds the call fails with
+        a 503 TriplestoreError, the status Fuseki uses for timed out queries.
+        """
+        try:
+            body, media_type = await asyncio.wait_for(asyncio.to_thread(self.query, query, accept), timeout)
+        except asyncio.TimeoutError as e:
+            raise TriplestoreError(f"Query exceeded {timeout}s", 503) from e
+        return QueryStream(media_type, _chunked(body))
+
+    async def aexport(self, media_type: str) -> QueryStream:
+        body, media_type = await asyncio.to_thread(self.export, media_type)
+        return QueryStream(media_type, _chunked(body))
+
+
+class FusekiBackend(TriplestoreBackend):
+    """
+    Fuseki over HTTP. Outbox batches become one SPARQL update (one Fuseki
+    transaction), and queries and exports are streamed from Fuseki as they are
+    produced. Ad-hoc queries are not retried.
+    """
+
+    name = "fuseki"
+
+    def __init__(self, client: TriplestoreClient):
+        self.client = client
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    def close(self):
+        self.client.close()
+
+    def apply(self, operations: list[dict]):
+        self.client.update(build_sync_update(operations), error="Failed to apply outbox batch")
+
+    async def aapply(self, operations: list[dict]):
+        await self.client.aupdate(build_sync_update(operations), error="Failed to apply outbox batch")
+
+    def store_graph(self, graph_uri: Optional[str], data: bytes, content_type: str = "text/turtle"):
+        self.client.store_graph(graph_uri, data, content_type)
+
+    async def astore_graph(self, graph_uri: Optional[str], data: bytes, content_type: str = "text/turtle"):
+        await self.client.astore_graph(graph_uri, data, content_type)
+
+    def delete_graph(self, graph_uri: str):
+        self.client.delete_graph(graph_uri)
+
+    async def adelete_graph(self, graph_uri: str):
+        await self.client.adelete_graph(graph_uri)
+
+    def query(self, query: str, accept: str) -> tuple[bytes, str]:
+        response = self.client.query(query, accept=accept)
+        return response.content, response.headers.get("content-type", accept)
+
+    def export(self, media_type: str) -> tuple[bytes, str]:
+        if media_type != "application/n-quads":
+            return self.query(EXPORT_QUERY, media_type)
+        response = self.client.request(
+            "GET", self.client.endpoint, error="Dataset export failed", headers={"Accept": media_type}
+        )
+        return response.content, response.headers.get("content-type", media_type)
+
+    async def aquery(self, query: str, accept: str, timeout: Optional[float] = None) -> QueryStream:
+        response = await self.client.aquery(query, accept=accept, stream=True, timeout=timeout, retries=0)
+        return QueryStream(response.headers.get("content-type", accept), response.aiter_bytes(), response.aclose)
+
+    async def aexport(self, media_type: str) -> QueryStream:
+        if media_type == "application/n-quads":
+            response = await self.client.astream_dataset(media_type)
+        else:
+            response = await self.client.aquery(EXPORT_QUERY, accept=media_type, stream=True)
+        return QueryStream(response.headers.get("content-type", media_type), response.aiter_bytes(), response.aclose)
@@ -0,0 +1,289 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Optional
+
+import httpx
+
+from metrics import FUSEKI_FAILURES, FUSEKI_SECONDS
+
+
+RETRY_STATUSES = {502, 503, 504}
+# Responses the breaker counts against the store; transport errors count too.
+FAILURE_STATUS = 500
+
+
+class TriplestoreError(Exception):
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class CircuitOpenError(TriplestoreError):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Opens after ``failure_threshold`` consecutive failed calls and rejects calls
+    until ``reset_timeout`` seconds have passed; a single call then probes the
+    store while others are still rejected, and either closes the circuit again
+    or re-opens it. A probe that never reports back is replaced by the next
+    call after another ``reset_timeout``.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            now = time.monotonic()
+            probing = self._probe_started is not None and now - self._probe_started < self.reset_timeout
+            if now - self._opened_at < self.reset_timeout or probing:
+                raise CircuitOpenError("Triplestore circuit is open, refusing call")
+            self._probe_started = now
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe_started = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_started = None
+            if self._failures >= self.failure_threshold or self._opened_at is not None:
+                self._opened_at = time.monotonic()
+
+
+class TriplestoreClient:
+    """
+    Shared HTTP client for the Fuseki dataset endpoint. Connections are pooled
+    and kept alive, every call has a timeout, transient failures are retried
+    with exponential backoff and repeated failures trip a circuit breaker.
+    Each operation has a blocking and an ``a``-prefixed asyncio variant.
+    """
+
+    def __init__(
+        self,
+        endpoint: Optional[str] = None,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        backoff: Optional[float] = None,
+        max_connections: Optional[int] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.endpoint = (endpoint or os.getenv("FUSEKI_ENDPOINT", "http://fuseki:3030/semantic_data_catalog")).rstrip("/")
+        username = username if username is not None else os.getenv("FUSEKI_USER", "admin")
+        password = password if password is not None else os.getenv("FUSEKI_PASSWORD", "admin")
+        self.auth = httpx.BasicAuth(username, password) if username else None
+        self.timeout = httpx.Timeout(timeout if timeout is not None else float(os.getenv("FUSEKI_TIMEOUT", "10")))
+        self.retries = retries if retries is not None else int(os.getenv("FUSEKI_RETRIES", "3"))
+        self.backoff = backoff if backoff is not None else float(os.getenv("FUSEKI_BACKOFF", "0.2"))
+        max_connections = max_connections or int(os.getenv("FUSEKI_MAX_CONNECTIONS", "20"))
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.breaker = breaker or CircuitBreaker(
+            failure_threshold=int(os.getenv("FUSEKI_BREAKER_THRESHOLD", "5")),
+            reset_timeout=float(os.getenv("FUSEKI_BREAKER_RESET", "30")),
+        )
+        self._client: Optional[httpx.Client] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._lock = threading.Lock()
+
+    @property
+    def data_url(self) -> str:
+        return f"{self.endpoint}/data"
+
+    @property
+    def update_url(self) -> str:
+        return f"{self.endpoint}/update"
+
+    @property
+    def sparql_url(self) -> str:
+        return f"{self.endpoint}/sparql"
+
+    def _sync_client(self) -> httpx.Client:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(auth=self.auth, timeout=self.timeout, limits=self.limits)
+        return self._client
+
+    def _aclient(self) -> httpx.AsyncClient:
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(auth=self.auth, timeout=self.timeout, limits=self.limits)
+        return self._async_client
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    async def aclose(self):
+        self.close()
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    def _check(self, response: httpx.Response, error: str) -> httpx.Response:
+        if response.status_code >= 300:
+            raise TriplestoreError(f"{error}: {response.status_code} – {response.text}", response.status_code)
+        return response
+
+    def _operation(self, url: str) -> str:
+        return url[len(self.endpoint) :].strip("/") or "dataset"
+
+    def _finish(self, operation: str, started: float, response: httpx.Response) -> httpx.Response:
+        FUSEKI_SECONDS.observe(time.perf_counter() - started, operation)
+        if response.status_code >= FAILURE_STATUS:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        if response.status_code >= 300:
+            FUSEKI_FAILURES.inc(operation, str(response.status_code))
+        return response
+
+    def request(self, method: str, url: str, error: str = "Triplestore request failed", **kwargs) -> httpx.Response:
+        operation = self._operation(url)
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            FUSEKI_FAILURES.inc(operation, "circuit_open")
+            raise
+        started = time.perf_counter()
+        for attempt in range(self.retries + 1):
+            try:
+                response = self._sync_client().request(method, url, **kwargs)
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    break
+            except httpx.TransportError as e:
+                if attempt == self.retries:
+                    self.breaker.record_failure()
+                    FUSEKI_FAILURES.inc(operation, "transport")
+                    raise TriplestoreError(f"{error}: {e}") from e
+            time.sleep(self.backoff * 2**attempt)
+
+        return self._check(self._finish(operation, started, response), error)
+
+    async def arequest(
+        self,
+        method: str,
+        url: str,
+        error: str = "Triplestore request failed",
+        stream: bool = False,
+        retries: Optional[int] = None,
+        **kwargs,
+    ) -> httpx.Response:
+        """
+        With ``stream=True`` the body is not read; the caller iterates it and
+        must ``aclose()`` the response.
+        """
+        retries = self.retries if retries is None else retries
+        operation = self._operation(url)
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            FUSEKI_FAILURES.inc(operation, "circuit_open")
+            raise
+        started = time.perf_counter()
+        client = self._aclient()
+        for attempt in range(retries + 1):
+            try:
+                response = await client.send(client.build_request(method, url, **kwargs), stream=stream)
+                if response.status_code not in RETRY_STATUSES or attempt == retries:
+                    break
+                await response.aclose()
+            except httpx.TransportError as e:
+                if attempt == retries:
+                    self.breaker.record_failure()
+                    FUSEKI_FAILURES.inc(operation, "transport")
+                    raise TriplestoreError(f"{error}: {e}") from e
+            await asyncio.sleep(self.backoff * 2**attempt)
+
+        self._finish(operation, started, response)
+        if stream and response.status_code >= 300:
+            await response.aread()
+            await response.aclose()
+        return self._check(response, error)
+
+    def _store_args(self, graph_uri: Optional[str], data: bytes, content_type: str) -> dict:
+        return {
+            "params": {"graph": graph_uri} if graph_uri else None,
+            "content": data,
+            "headers": {"Content-Type": content_type},
+        }
+
+    def _query_args(self, query: str, accept: str) -> dict:
+        return {"data": {"query": query}, "headers": {"Accept": accept}}
+
+    def _update_args(self, update: str) -> dict:
+        return {"content": update.encode("utf-8"), "headers": {"Content-Type": "application/sparql-update"}}
+
+    def store_graph(self, graph_uri: Optional[str], data: bytes, content_type: str = "text/turtle"):
+        self.request("POST", self.data_url, error="Insert failed", **self._store_args(graph_uri, data, content_type))
+
+    async def astore_graph(self, graph_uri: Optional[str], data: bytes, content_type: str = "text/turtle"):
+        await self.arequest("POST", self.data_url, error="Insert failed", **self._store_args(graph_uri, data, content_type))
+
+    def delete_graph(self, graph_uri: str):
+        self.request(
+            "DELETE", self.data_url, error=f"Failed to delete named graph {graph_uri}", params={"graph": graph_uri}
+        )
+
+    async def adelete_graph(self, graph_uri: str):
+        await self.arequest(
+            "DELETE", self.data_url, error=f"Failed to delete named graph {graph_uri}", params={"graph": graph_uri}
+        )
+
+    def update(self, update: str, error: str = "SPARQL update failed"):
+        self.request("POST", self.update_url, error=error, **self._update_args(update))
+
+    async def aupdate(self, update: str, error: str = "SPARQL update failed"):
+        await self.arequest("POST", self.update_url, error=error, **self._update_args(update))
+
+    def query(self, query: str, accept: str = "text/turtle") -> httpx.Response:
+        return self.request("POST", self.sparql_url, error="SPARQL query failed", **self._query_args(query, accept))
+
+    async def aquery(
+        self,
+        query: str,
+        accept: str = "text/turtle",
+        stream: bool = False,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+    ) -> httpx.Response:
+        """With ``timeout`` Fuseki is asked to abort the query after that many seconds, too."""
+        kwargs = self._query_args(query, accept)
+        if timeout is not None:
+            kwargs["data"]["timeout"] = str(int(timeout * 1000))
+            kwargs["timeout"] = httpx.Timeout(timeout + 5)
+        return await self.arequest(
+            "POST", self.sparql_url, error="SPARQL query failed", stream=stream, retries=retries, **kwargs
+        )
+
+    async def astream_dataset(self, accept: str = "application/n-quads") -> httpx.Response:
+        return await self.arequest(
+            "GET", self.endpoint, error="Dataset export failed", stream=True, headers={"Accept": accept}
+        )
+
+
+FUSEKI = TriplestoreClient()
@@ -0,0 +1,201 @@
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+
+from rdflib import Dataset, Graph
+
+from shacl_validation import SHAPES, validate_graph_batch
+from triplestore import build_dataset_graph, dataset_ntriples, dataset_records_from_graph, ntriples_diff
+
+
+class PoolBusy(Exception):
+    pass
+
+
+def _init_worker():
+    # Shutdown is driven by the parent; keep Ctrl+C from killing workers mid-task.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    SHAPES.load()
+
+
+def _timed(fn: Callable, args: tuple):
+    started_at = time.time()
+    return started_at, fn(*args)
+
+
+def _ready() -> bool:
+    return True
+
+
+def prepare_datasets(
+    records: list[dict], profile: Optional[str], previous: Optional[list[Optional[dict]]] = None
+) -> tuple[list[dict], str, dict]:
+    """
+    Build and validate the graph of every record. Each result is either
+    ``{"error": ...}`` for records that cannot be turned into RDF or
+    ``{"conforms": ..., "detail": ..., "data": ...}`` with N-Triples for the
+    conforming ones. Where ``previous`` holds the earlier version of a record,
+    conforming results also carry the ``delete`` and ``insert`` N-Triples that
+    turn the earlier graph into the new one. The last item holds the seconds
+    spent per stage.
+    """
+    started = time.perf_counter()
+    results: list[dict] = []
+    graphs: list[Graph] = []
+    slots = []
+    for record in records:
+        try:
+            graphs.append(build_dataset_graph(record))
+        except ValueError as e:
+            results.append({"error": str(e)})
+            continue
+        slots.append(len(results))
+        results.append({})
+
+    shapes = SHAPES.get(profile)
+    shape_version = f"{shapes.name}@{shapes.version}"
+    built = time.perf_counter()
+    if graphs:
+        verdicts, shape_version = validate_graph_batch(graphs, profile)
+        validated = time.perf_counter()
+        for slot, graph, (conforms, detail) in zip(slots, graphs, verdicts):
+            results[slot] = {
+                "conforms": conforms,
+                "detail": detail,
+                "data": dataset_ntriples(graph) if conforms else None,
+            }
+            earlier = previous[slot] if previous else None
+            if conforms and earlier is not None:
+                try:
+                    old = dataset_ntriples(build_dataset_graph(earlier))
+                except ValueError:
+                    # Records from before stricter IRI checks; replace them wholesale.
+                    continue
+                results[slot]["delete"], results[slot]["insert"] = ntriples_diff(old, results[slot]["data"])
+    else:
+        validated = built
+    timings = {"rdf": built - started + time.perf_counter() - validated, "validate": validated - built}
+    return results, shape_version, timings
+
+
+def parse_dataset_records(body: bytes, rdf_format: str) -> list[dict]:
+    graph = Graph() if rdf_format == "turtle" else Dataset(default_union=True)
+    graph.parse(data=body, format=rdf_format)
+    return dataset_records_from_graph(graph)
+
+
+class WorkerPool:
+    """
+    Process pool for CPU-bound RDF work (graph building, SHACL validation,
+    parsing) so it does not hold the GIL of the API process. At most
+    ``workers + queue_size`` tasks are admitted at once; ``run`` raises
+    ``PoolBusy`` beyond that unless asked to wait. With ``workers=0`` tasks
+    run inline in the calling thread under the same admission limit.
+    """
+
+    def __init__(self):
+        self.workers = int(os.getenv("VALIDATION_WORKERS", str(min(4, os.cpu_count() or 1))))
+        self.queue_size = int(os.getenv("VALIDATION_QUEUE_SIZE", str(max(self.workers, 1) * 8)))
+        self.retry_after = int(os.getenv("VALIDATION_RETRY_AFTER", "2"))
+        self.capacity = max(self.workers, 1) + self.queue_size
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.last_wait = 0.0
+
+    def start(self):
+        if self.workers <= 0 or self._executor is not None:
+            return
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+        for _ in range(self.workers):
+            self._executor.submit(_ready)
+
+    def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def busy(self) -> bool:
+        return self.in_flight >= self.capacity
+
+    def run(self, fn: Callable, *args, block: bool = False):
+        submitted_at = time.time()
+        if not self._slots.acquire(blocking=block):
+            with self._lock:
+                self.rejected += 1
+            raise PoolBusy(f"Validation queue is full ({self.capacity} tasks)")
+        with self._lock:
+            self.in_flight += 1
+            self.submitted += 1
+        try:
+            executor = self._executor
+            if executor is None:
+                started_at, result = _timed(fn, args)
+            else:
+                try:
+                    started_at, result = executor.submit(_timed, fn, args).result()
+                except BrokenProcessPool as e:
+                    print(f"Warning: Validation worker died, restarting the pool: {e}")
+                    self._restart(executor)
+                    raise PoolBusy("Validation workers are restarting") from e
+            self._record_wait(started_at - submitted_at)
+            return result
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            self._slots.release()
+
+    def _restart(self, broken: ProcessPoolExecutor):
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.start()
+
+    def _record_wait(self, wait: float):
+        wait = max(wait, 0.0)
+        with self._lock:
+            self.completed += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            self.last_wait = wait
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "capacity": self.capacity,
+                "in_flight": self.in_flight,
+                "queued": max(self.in_flight - max(self.workers, 1), 0),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "wait_seconds_avg": round(self.wait_total / self.completed, 6) if self.completed else 0.0,
+                "wait_seconds_max": round(self.wait_max, 6),
+                "wait_seconds_last": round(self.last_wait, 6),
+            }
+
+
+POOL = WorkerPool()